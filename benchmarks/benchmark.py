@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+"""
+Benchmarks printing the timings of k40nano against the previous implementations kept in the tests.
+
+python benchmarks/benchmark.py runs all the benchmarks, or only those named on the command line.
+"""
+
+import os
+import random
+import sys
+import time
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIRECTORY, os.pardir, "test"))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIRECTORY, os.pardir))
+
+from k40nano import *
+from k40nano.NanoPlotter import line_runs, nano_distance, nano_distances
+from k40nano.Plotter import Plotter
+
+from test_distance import concatenate_distance
+from test_egv_player import encode, vector_job
+from test_job_estimator import plotter_job, simulated_time
+from test_line_runs import bresenham_runs
+from test_nanoconnection import ConcatenateConnection, PacketConnection
+from test_path_optimizer import random_paths
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def benchmark_writes():
+    """
+    Per write cost against fragment size, bytearray buffering against the bytes concatenation.
+    """
+    data = b'B' * 30000
+    for fragment in (1, 3, 30, 300, 30000):
+        times = []
+        for connection in (ConcatenateConnection(), PacketConnection()):
+            writes = 0
+            start = time.time()
+            for i in range(0, len(data), fragment):
+                connection.write(data[i:i + fragment])
+                writes += 1
+            times.append((time.time() - start) * 1e6 / writes)
+        print("fragment %5d: concatenate %8.3f us/write, bytearray %8.3f us/write" % (fragment, times[0], times[1]))
+
+
+def benchmark_line_runs():
+    """
+    Time to encode long shallow lines, with the per step algorithm for comparison.
+    """
+    lines = [(10000, i) for i in range(0, 100)]
+    start = time.time()
+    for dx, dy in lines:
+        list(line_runs(dx, dy))
+    closed_form = time.time() - start
+    start = time.time()
+    for dx, dy in lines:
+        list(bresenham_runs(dx, dy))
+    per_step = time.time() - start
+    print("line runs: %.2f ms, per step: %.2f ms" % (closed_form * 1000.0, per_step * 1000.0))
+
+
+def benchmark_distances():
+    """
+    Encoding throughput of the distance table against the previous concatenating function.
+    """
+    rng = random.Random(1)
+    values = [rng.randint(0, 2000) for i in range(0, 100000)]
+    start = time.time()
+    for q in values:
+        concatenate_distance(q)
+    previous = time.time() - start
+    start = time.time()
+    for q in values:
+        nano_distance(q)
+    table = time.time() - start
+    start = time.time()
+    nano_distances(values)
+    bulk = time.time() - start
+    print("distances/s previous: %d, nano_distance: %d, nano_distances: %d" % (
+        len(values) / previous, len(values) / table, len(values) / bulk))
+
+
+def benchmark_path_optimizer():
+    """
+    Time to order many paths.
+    """
+    paths = random_paths(20000, 3)
+    optimizer = PathOptimizer()
+    start = time.time()
+    optimizer.optimize(paths)
+    print("%d paths ordered in %.2f s, travel %d to %d" % (
+        len(paths), time.time() - start, optimizer.before, optimizer.after))
+
+
+def benchmark_job_estimator():
+    """
+    Time to estimate a job, against simulating it token by token.
+    """
+    data = plotter_job() * 20
+    start = time.time()
+    JobEstimator().estimate(data)
+    elapsed = time.time() - start
+    start = time.time()
+    simulated_time(data)
+    per_token = time.time() - start
+    print("estimate %.2f MB: %.3f s, per token: %.3f s" % (len(data) / 1e6, elapsed, per_token))
+
+
+def benchmark_egv_player():
+    """
+    Time to replay a job into a plotter.
+    """
+    data = encode(vector_job) * 100
+    start = time.time()
+    tokens = EgvPlayer(Plotter()).play(data)
+    elapsed = time.time() - start
+    print("replay %.2f MB, %d tokens: %.3f s" % (len(data) / 1e6, tokens, elapsed))
+
+
+def benchmark_speed_cache():
+    """
+    Time to convert a speed to its code, uncached and cached.
+    """
+    count = 10000
+    start = time.time()
+    for i in range(0, count):
+        LaserSpeed.uncached_get_code_from_speed(30 + i % 5, 0, "LASER-M2")
+    uncached = time.time() - start
+    start = time.time()
+    for i in range(0, count):
+        LaserSpeed.get_code_from_speed(30 + i % 5, 0, "LASER-M2")
+    cached = time.time() - start
+    print("speed codes uncached: %.1f us, cached: %.1f us" % (uncached * 1e6 / count, cached * 1e6 / count))
+
+
+def benchmark_speed_table():
+    """
+    Time to build a SpeedTable and snap speeds to it, against solving each speed.
+    """
+    start = time.time()
+    table = SpeedTable("LASER-M2")
+    built = time.time() - start
+    rng = random.Random(7)
+    speeds = [rng.uniform(1.0, 240.0) for i in range(10000)]
+    start = time.time()
+    for speed in speeds:
+        table.snap(speed)
+    snapped = time.time() - start
+    start = time.time()
+    for speed in speeds:
+        LaserSpeed.solve_speed(speed)
+    solved = time.time() - start
+    print("SpeedTable: %d speeds built %.3fs, snap %.1fus, solve %.1fus" %
+          (len(table), built, snapped * 1e6 / len(speeds), solved * 1e6 / len(speeds)))
+
+
+def benchmark_png_raster():
+    """
+    Time to draw lines on a large raster and write it, with the python scanlines and with numpy if installed.
+    """
+    for use_numpy in (False, True):
+        if use_numpy and numpy is None:
+            continue
+        start = time.time()
+        raster = PngRaster(1000, 1000, 1, 0, use_numpy=use_numpy)
+        raster.fill(1)
+        for i in range(0, 1000, 10):
+            raster.draw_line(0, i, 999, 999 - i, 0)
+            raster.draw_line(i, 0, 999 - i, 999, 0)
+        raster.get_png_bytes()
+        print("PngRaster %s: 200 lines on 1000x1000 in %.3fs" %
+              ("numpy" if use_numpy else "python", time.time() - start))
+
+
+BENCHMARKS = [
+    ("writes", benchmark_writes),
+    ("line_runs", benchmark_line_runs),
+    ("distances", benchmark_distances),
+    ("path_optimizer", benchmark_path_optimizer),
+    ("job_estimator", benchmark_job_estimator),
+    ("egv_player", benchmark_egv_player),
+    ("speed_cache", benchmark_speed_cache),
+    ("speed_table", benchmark_speed_table),
+    ("png_raster", benchmark_png_raster),
+]
+
+
+def main(names):
+    known = [name for name, benchmark in BENCHMARKS]
+    for name in names:
+        if name not in known:
+            print("unknown benchmark %s, the benchmarks are: %s" % (name, " ".join(known)))
+            return 2
+    for name, benchmark in BENCHMARKS:
+        if not names or name in names:
+            benchmark()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
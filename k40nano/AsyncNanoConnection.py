@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .NanoConnection import NanoConnection
+
+try:
+    get_running_loop = asyncio.get_running_loop  # python 3.7+
+except AttributeError:
+    get_running_loop = asyncio.get_event_loop  # the running loop, when called from a coroutine.
+
+
+class AsyncNanoConnection:
+    """
+    asyncio variant of the Connection API for the K40 device. Requires python 3.5+
+
+    The USB transfers run on an executor, a single worker thread per connection unless an executor
+    is given, and the status polling while the device is busy uses asyncio.sleep, so many devices
+    can be driven from one event loop. Packetization and framing are done by a NanoConnection.
+
+    async with AsyncNanoConnection() as connection:
+        await connection.write(b'IPP')
+    """
+
+    def __init__(self, usb=None, executor=None, backoff=None, stats=None):
+        self.connection = NanoConnection(usb=usb, backoff=backoff, stats=stats)
+        self.executor = executor
+        self.owns_executor = executor is None
+        self.buffer = bytearray()
+        self.lock = None
+        self.lock_loop = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def run(self, function, *args):
+        """
+        Runs the blocking function on the executor.
+        """
+        loop = get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    async def open(self):
+        """
+        Connects to the USB device.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        await self.run(self.connection.open)
+
+    async def close(self):
+        """
+        Sends any buffered data and disconnects from USB device. An executor made by open() is shut down
+        even if sending fails.
+        """
+        try:
+            await self.flush()
+            await self.run(self.connection.usb.release_usb)
+        finally:
+            if self.owns_executor and self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+    async def send(self, data):
+        """
+        Writes all data immediately to the K40 device.
+        :param data:
+        :return:
+        """
+        await self.write(data)
+        await self.flush()
+
+    async def write(self, data=None):
+        """
+        Buffers data, sending any complete packets to the K40 device.
+
+        Tasks writing to the same connection take turns sending, so the data is sent once and in the
+        order it was written.
+        :param data:
+        :return:
+        """
+        if data is not None:
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            self.buffer += data
+        async with self.get_lock():
+            await self.send_buffer()
+
+    async def flush(self):
+        """
+        Writes all buffered data immediately.
+        :return:
+        """
+        async with self.get_lock():
+            await self.send_buffer()
+            if len(self.buffer) != 0:
+                packet = self.buffer
+                self.buffer = bytearray()
+                await self.send_valid_packet(packet)
+
+    def get_lock(self):
+        """
+        :return: lock taken while sending, one for the running event loop.
+        """
+        loop = get_running_loop()
+        if self.lock_loop is not loop:
+            self.lock = asyncio.Lock()
+            self.lock_loop = loop
+        return self.lock
+
+    async def send_buffer(self):
+        """
+        Sends the complete packets of the buffer, the lock must be held.
+        """
+        size = self.connection.PACKET_SIZE
+        buffer = self.buffer
+        end = len(buffer) - (len(buffer) % size)
+        for i in range(0, end, size):
+            await self.send_valid_packet(buffer[i:i + size])
+        del buffer[:end]
+
+    async def send_valid_packet(self, packet):
+        """
+        Sends the validated version of packet to the USB.
+        :param packet: 0-30 bytes to be validated and sent.
+        :return:
+        """
+        if self.connection.stats is not None:
+            self.connection.stats.frame(len(packet))
+        await self.send_packet(self.connection.make_valid_packet(packet))
+
+    async def send_packet(self, packet):
+        """
+        Attempts to send packet as NanoConnection.send_packet does, its usb transfers running on the
+        executor and the waits while the device is busy on the event loop.
+
+        :param packet: 34 byte framed packet.
+        :return:
+        """
+        waits = self.connection.send_packet_waits(packet)
+        while True:
+            delay = await self.run(next, waits, None)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)  # Wait and try again.
+
+    async def wait(self, estimate=None):
+        """
+        Waits for task complete.
+
+        :param estimate: optional time.time() at which the task is estimated to complete.
+        """
+        if estimate is not None:
+            remaining = estimate - time.time()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+        delays = self.connection.backoff.delays()
+        while True:
+            response = await self.send_hello()
+            if response == self.connection.RESPONSE_TASK_COMPLETE:
+                break
+            await asyncio.sleep(next(delays))
+
+    async def send_hello(self):
+        """
+        Checks the status response after sending a HELLO.
+        :return: status response.
+        """
+        return await self.run(self.connection.send_hello)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+from .AsyncNanoConnection import AsyncNanoConnection
+from .Connection import Connection
+from .NanoPlotter import NanoPlotter
+
+
+class DeferredConnection(Connection):
+    """
+    Connection which records the writes, flushes and waits made by a plotter to be replayed later.
+    """
+
+    def __init__(self):
+        Connection.__init__(self)
+        self.pending = []
+
+    def write(self, data=None):
+        if data is None:
+            return
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if len(self.pending) != 0 and self.pending[-1][0] == "write":
+            self.pending[-1][1].extend(data)
+        else:
+            self.pending.append(("write", bytearray(data)))
+
+    def flush(self):
+        self.pending.append(("flush",))
+
+    def wait(self, estimate=None):
+        self.pending.append(("wait", estimate))
+
+
+class AsyncNanoPlotter:
+    """
+    asyncio variant of the NanoPlotter. Requires python 3.5+
+
+    The LHYMICRO-GL is encoded by a NanoPlotter into a deferred connection, each awaited plotter call
+    then replays those writes, flushes and waits on an AsyncNanoConnection.
+
+    async with AsyncNanoPlotter() as plotter:
+        await plotter.enter_compact_mode(50)
+        await plotter.move(1000, 1000)
+    """
+
+    def __init__(self, board=None, connection=None, usb=None):
+        self.connection = connection
+        self.usb = usb
+        self.deferred = DeferredConnection()
+        self.plotter = NanoPlotter(board=board, connection=self.deferred)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def current_x(self):
+        return self.plotter.current_x
+
+    @property
+    def current_y(self):
+        return self.plotter.current_y
+
+    async def drain(self):
+        """
+        Replays everything the plotter has written on the async connection.
+        """
+        pending = self.deferred.pending
+        while len(pending) != 0:
+            operation = pending.pop(0)
+            if operation[0] == "write":
+                await self.connection.write(operation[1])
+            elif operation[0] == "flush":
+                await self.connection.flush()
+            elif operation[0] == "wait":
+                await self.connection.wait(operation[1])
+
+    async def open(self):
+        if self.connection is None:
+            self.connection = AsyncNanoConnection(usb=self.usb)
+        await self.connection.open()
+        self.plotter.open()
+        await self.drain()
+
+    async def close(self):
+        self.plotter.close()
+        await self.drain()
+        await self.connection.close()
+
+    async def move_abs(self, x, y):
+        self.plotter.move_abs(x, y)
+        await self.drain()
+
+    async def move(self, dx, dy):
+        self.plotter.move(dx, dy)
+        await self.drain()
+
+    async def down(self):
+        result = self.plotter.down()
+        await self.drain()
+        return result
+
+    async def up(self):
+        result = self.plotter.up()
+        await self.drain()
+        return result
+
+    async def h_switch(self):
+        result = self.plotter.h_switch()
+        await self.drain()
+        return result
+
+    async def v_switch(self):
+        result = self.plotter.v_switch()
+        await self.drain()
+        return result
+
+    async def enter_concat_mode(self):
+        result = self.plotter.enter_concat_mode()
+        await self.drain()
+        return result
+
+    async def enter_compact_mode(self, speed=None, raster_step=None):
+        self.plotter.enter_compact_mode(speed, raster_step)
+        await self.drain()
+
+    async def exit_compact_mode_finish(self):
+        result = self.plotter.exit_compact_mode_finish()
+        await self.drain()
+        return result
+
+    async def exit_compact_mode_reset(self):
+        result = self.plotter.exit_compact_mode_reset()
+        await self.drain()
+        return result
+
+    async def exit_compact_mode_break(self):
+        result = self.plotter.exit_compact_mode_break()
+        await self.drain()
+        return result
+
+    async def home(self, abort=False):
+        self.plotter.home(abort)
+        await self.drain()
+
+    async def lock_rail(self, abort=False):
+        self.plotter.lock_rail(abort)
+        await self.drain()
+
+    async def unlock_rail(self, abort=False):
+        self.plotter.unlock_rail(abort)
+        await self.drain()
+
+    async def abort(self):
+        self.plotter.abort()
+        await self.drain()
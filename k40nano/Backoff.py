@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+
+class Backoff:
+    """
+    Exponential backoff for polling the device status.
+
+    The first delay is the minimum interval, each following delay is multiplied by the factor
+    until it reaches the maximum interval.
+    """
+
+    def __init__(self, minimum=0.005, maximum=0.2, factor=2.0):
+        """
+        :param minimum: first delay in seconds.
+        :param maximum: largest delay in seconds.
+        :param factor: multiplier applied to the delay after each poll.
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+
+    def delays(self):
+        """
+        Generates the delays, in seconds, between successive polls.
+        """
+        delay = self.minimum
+        while True:
+            yield delay
+            delay = min(delay * self.factor, self.maximum)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+
+class BoardProfile(object):
+    """
+    Speed code equations of a board model.
+
+    Speed codes are values of 65536 - (b + mT), where T is the period in ms, with b and m set by the gear.
+    The gearing holds (b, m, gear) for each gear, gear 0 being the C-suffix notation. Speeds below
+    suffix_c_speed use gear 0, except raster speeds of boards with raster_suffix_c, which use its (b, m)
+    with gear 1. Boards with diagonal add the diagonal delay to their (non-raster) codes.
+
+    Speeds below min_speed, raster speeds below min_raster_speed and speeds within the error_band (low, high)
+    are in error on the board, and LaserSpeed.validate_speed() raises them to the nearest valid speed.
+
+    Profiles are frozen once made. Register them with LaserSpeed.register_board() to use them by name.
+    """
+
+    def __init__(self, name, gearing, diagonal=True, suffix_c_speed=None, raster_suffix_c=None,
+                 min_speed=None, min_raster_speed=None, error_band=None):
+        """
+        :param name: board name, as given to the LaserSpeed functions.
+        :param gearing: sequence of the (b, m) of each gear, from gear 0.
+        :param diagonal: whether the speed codes have the diagonal delay.
+        :param suffix_c_speed: speed in mm/s below which the C-suffix notation is used, if any.
+        :param raster_suffix_c: (b, m) of raster speeds below suffix_c_speed, otherwise they use gear 0.
+        :param min_speed: slowest valid speed in mm/s.
+        :param min_raster_speed: slowest valid raster speed in mm/s.
+        :param error_band: (low, high) speeds in mm/s, from low and below high, which are in error.
+        """
+        gearing = tuple((float(gear[0]), float(gear[1]), i) for i, gear in enumerate(gearing))
+        if raster_suffix_c is not None:
+            raster_suffix_c = (float(raster_suffix_c[0]), float(raster_suffix_c[1]), 1)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "gearing", gearing)
+        object.__setattr__(self, "diagonal", diagonal)
+        object.__setattr__(self, "suffix_c_speed", suffix_c_speed)
+        object.__setattr__(self, "raster_suffix_c", raster_suffix_c)
+        object.__setattr__(self, "min_speed", min_speed)
+        object.__setattr__(self, "min_raster_speed", min_raster_speed)
+        object.__setattr__(self, "error_band", error_band)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("BoardProfile is frozen")
+
+    def __repr__(self):
+        return "BoardProfile(%r)" % self.name
+
+
+A_B_B1 = [
+    (784.0, 2000.0),  # A, B, B1 have no known suffix-C equations.
+    (784.0, 2000.0),
+    (784.0, 2000.0),
+    (896.0, 2000.0),
+    (1024.0, 2000.0)
+]
+M_M1 = [
+    (5120.0, 12120.0),  # M, M1 has no known suffix-C equations.
+    (5120.0, 12120.0),
+    (5120.0, 12120.0),
+    (5632.0, 12120.0),
+    (6144.0, 12120.0)
+]
+BOARD_M_M1 = [
+    (5120.0, 11148.0),  # M has no known suffix-C equations.
+    (5120.0, 11148.0),
+    (5120.0, 11148.0),
+    (5632.0, 11148.0),
+    (6144.0, 11148.0)
+    # The physical speed elements were guessed at with regard to the M2 that were tested
+]
+
+DEFAULT_PROFILES = [
+    BoardProfile("A", A_B_B1, diagonal=False, min_speed=0.785),
+    BoardProfile("B", A_B_B1, diagonal=False, min_speed=0.785),
+    BoardProfile("B1", A_B_B1, min_speed=0.785),
+    # speeds below 9.509 will be in error. But the Chinese Software drew the line for suffix-C at
+    # 7 so, this package does as well. Even though it means impossible speeds at between 7 and 9.509.
+    # The raster speeds below 7 are C-suffix codes pretending to be gear 1, which do not actually provide
+    # full circle capabilities. There are no permitted very slow raster speed codes. But to properly
+    # emulate the Chinese software this is added because that is how it works in that package.
+    BoardProfile("B2", [
+        (784.0, 2020.0),
+        (784.0, 24240.0),
+        (784.0, 24240.0),
+        (896.0, 24240.0),
+        (1024.0, 24240.0)
+    ], suffix_c_speed=7, raster_suffix_c=(784.0, 2020.0), min_speed=0.793, min_raster_speed=9.509,
+        error_band=(7, 9.509)),
+    BoardProfile("M", M_M1, diagonal=False, min_speed=5.096),
+    BoardProfile("M1", M_M1, min_speed=5.096),
+    BoardProfile("M2", [
+        (8.0, 1010.0),
+        (5120.0, 12120.0),
+        (5120.0, 12120.0),
+        (5632.0, 12120.0),
+        (6144.0, 12120.0)
+    ], suffix_c_speed=7, min_speed=0.392, min_raster_speed=5.096),
+    # It is unknown if the LASER-A, LASER-B and LASER-B1 values are correct with regard to physical speed.
+    # The boards manufacturer says specifically the correct slowest speed is  0.762 mm
+    # This suggests the speed for these boards is likely 3% slower.
+    BoardProfile("LASER-A", A_B_B1, diagonal=False, min_speed=0.785),
+    BoardProfile("LASER-B", A_B_B1, diagonal=False, min_speed=0.785),
+    BoardProfile("LASER-B1", A_B_B1, min_speed=0.785),
+    # The physical speed elements were assumed to be 2x the real M2 values.
+    # Speeds below 8.75 will be in error.
+    # The LASER-XX spec is intended to fix things, so the error code range of the B2 are dismissed
+    BoardProfile("LASER-B2", [
+        (784.0, 1858.0),
+        (784.0, 22296.0),
+        (784.0, 22296.0),
+        (896.0, 22296.0),
+        (1024.0, 22296.0)
+    ], suffix_c_speed=8.75, raster_suffix_c=(784.0, 1858.0), min_speed=0.730, min_raster_speed=8.750),
+    BoardProfile("LASER-M", BOARD_M_M1, diagonal=False, min_speed=4.688),
+    BoardProfile("LASER-M1", BOARD_M_M1, min_speed=4.688),
+    BoardProfile("LASER-M2", [
+        (8.0, 929.0),
+        (5120.0, 11148.0),
+        (5120.0, 11148.0),
+        (5632.0, 11148.0),
+        (6144.0, 11148.0)
+    ], suffix_c_speed=7, min_speed=0.361, min_raster_speed=4.688),
+]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+from .Plotter import Plotter
+
+
+def segment_distance(px, py, x0, y0, x1, y1):
+    """
+    :return: distance from the point px, py to the segment x0, y0 to x1, y1.
+    """
+    dx = x1 - x0
+    dy = y1 - y0
+    length = dx * dx + dy * dy
+    if length == 0:
+        t = 0.0
+    else:
+        t = max(0.0, min(1.0, float((px - x0) * dx + (py - y0) * dy) / length))
+    ex = x0 + t * dx - px
+    ey = y0 + t * dy - py
+    return (ex * ex + ey * ey) ** 0.5
+
+
+def simplify(points, tolerance):
+    """
+    Douglas-Peucker simplification, keeping the points needed for the path to stay within tolerance.
+
+    Distances are measured to the segments rather than their lines, so a path doubling back on itself
+    keeps its turning point.
+
+    :param points: list of (x, y) positions.
+    :param tolerance: largest distance, in steps, a removed point may be from the simplified path.
+    :return: list of the kept positions, including the first and last.
+    """
+    if len(points) <= 2:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = True
+    keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while len(stack) != 0:
+        start, end = stack.pop()
+        x0, y0 = points[start]
+        x1, y1 = points[end]
+        farthest = None
+        farthest_distance = tolerance
+        for i in range(start + 1, end):
+            d = segment_distance(points[i][0], points[i][1], x0, y0, x1, y1)
+            if d > farthest_distance:
+                farthest = i
+                farthest_distance = d
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((start, farthest))
+            stack.append((farthest, end))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class CoalescePlotter(Plotter):
+    """
+    Plotter which merges consecutive moves before passing them to another plotter.
+
+    Moves in the same direction with the laser in the same state are merged into a single move. With a
+    tolerance, each run of moves between laser or mode changes is also simplified with Douglas-Peucker,
+    so no removed position is further than tolerance steps from the path taken.
+
+    Moves are held until the laser or mode changes, buffer_size positions are held, or the plotter is
+    closed. Call flush() before using the wrapped plotter directly.
+    """
+
+    def __init__(self, plotter, tolerance=0, buffer_size=4096):
+        """
+        :param plotter: plotter the moves are passed to.
+        :param tolerance: distance in steps within which runs of moves are simplified.
+        :param buffer_size: most positions held before they are passed on.
+        """
+        Plotter.__init__(self, plotter.current_x, plotter.current_y)
+        self.plotter = plotter
+        self.tolerance = tolerance
+        self.buffer_size = buffer_size
+        self.points = [(plotter.current_x, plotter.current_y)]
+        self.moves_in = 0
+        self.moves_out = 0
+
+    def open(self):
+        self.plotter.open()
+
+    def close(self):
+        self.flush()
+        self.plotter.close()
+
+    def move(self, dx, dy):
+        if dx == 0 and dy == 0:
+            return
+        self.moves_in += 1
+        Plotter.move(self, dx, dy)
+        points = self.points
+        if len(points) >= 2:
+            px, py = points[-2]
+            lx = points[-1][0] - px
+            ly = points[-1][1] - py
+            if lx * dy == ly * dx and lx * dx + ly * dy > 0:  # Same direction.
+                points[-1] = (self.current_x, self.current_y)
+                return
+        points.append((self.current_x, self.current_y))
+        if len(points) > self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Passes the held moves to the plotter.
+        """
+        points = self.points
+        if len(points) >= 2:
+            if self.tolerance > 0:
+                points = simplify(points, self.tolerance)
+            plotter = self.plotter
+            for x, y in points[1:]:
+                plotter.move_abs(x, y)
+            self.moves_out += len(points) - 1
+        self.sync()
+
+    def sync(self):
+        """
+        Takes the position of the plotter, which mode changes may have moved.
+        """
+        self.current_x = self.plotter.current_x
+        self.current_y = self.plotter.current_y
+        self.check_bounds()
+        self.points = [(self.current_x, self.current_y)]
+
+    def call(self, method, *args):
+        """
+        Calls the plotter method after passing on the held moves.
+        """
+        self.flush()
+        result = method(*args)
+        self.sync()
+        return result
+
+    def down(self):
+        self.pen_down = True
+        return self.call(self.plotter.down)
+
+    def up(self):
+        self.pen_down = False
+        return self.call(self.plotter.up)
+
+    def v_switch(self):
+        return self.call(self.plotter.v_switch)
+
+    def h_switch(self):
+        return self.call(self.plotter.h_switch)
+
+    def enter_concat_mode(self):
+        return self.call(self.plotter.enter_concat_mode)
+
+    def enter_compact_mode(self, speed=None, raster_step=None):
+        return self.call(self.plotter.enter_compact_mode, speed, raster_step)
+
+    def exit_compact_mode_finish(self):
+        return self.call(self.plotter.exit_compact_mode_finish)
+
+    def exit_compact_mode_reset(self):
+        return self.call(self.plotter.exit_compact_mode_reset)
+
+    def exit_compact_mode_break(self):
+        return self.call(self.plotter.exit_compact_mode_break)
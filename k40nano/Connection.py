@@ -58,8 +58,9 @@ class Connection:
         """
         pass
 
-    def wait(self):
+    def wait(self, estimate=None):
         """
         Waits for writes to finish.
+        :param estimate: optional time.time() at which the writes are estimated to finish.
         """
         pass
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+import re
+
+TOKEN = re.compile(
+    br'([BTLRM])(z*)(\|[a-z]|[a-y]|[0-9]{3})?'  # direction or angle, with distance.
+    br'|(C?V[0-9]+(?:G[0-9]{3})?C?)'  # speed code.
+    br'|S([0-9]?[EP])'  # S1E, S1P, S2P, SE
+    br'|([IDUNF@P])'
+)
+
+# A token can only begin at these characters and no token continues past one, so the data
+# before the last of them can be tokenized without waiting for more data.
+BOUNDARY = re.compile(br'[BTLRMDUNIF@S][^BTLRMDUNIF@S]*$')
+
+DISTANCE_VALUES = dict((bytes(bytearray([96 + i])), i) for i in range(1, 26))  # a-y, 1-25
+DISTANCE_VALUES.update((b'|' + bytes(bytearray([96 + i - 25])), i) for i in range(26, 52))  # |a-|z, 26-51
+
+COMMAND_NAMES = dict((c.encode("ascii"), c) for c in "BTLRMIDUNF@P")
+
+
+class EgvParser:
+    """
+    Incremental tokenizer for LHYMICRO-GL (EGV) data.
+
+    Data is fed in chunks of any size, a token split across chunks is held until it is complete.
+    Each token is a tuple (command, value):
+
+    ('B', distance), ('T', distance), ('L', distance), ('R', distance), ('M', distance)
+    ('C', speed code), the complete speed code, eg. 'CV0051131001065112C' or 'V1551921G002'
+    ('S', '1E'), ('S', '1P'), ('S', '2P'), ('S', 'E')
+    ('I', None), ('D', None), ('U', None), ('N', None), ('F', None), ('@', None), ('P', None)
+
+    Anything else, like newlines, is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = b''
+
+    def feed(self, data):
+        """
+        :param data: next chunk of EGV data.
+        :return: list of the tokens completed by the data.
+        """
+        return self.tokenize(self.complete(data))
+
+    def flush(self):
+        """
+        :return: list of the tokens in any held data, at the end of the data.
+        """
+        return self.tokenize(self.release())
+
+    def complete(self, data):
+        """
+        Holds back the end of data, from where a token may continue into the next chunk.
+
+        :param data: next chunk of EGV data.
+        :return: the data of the tokens completed by the chunk, following any held data.
+        """
+        if isinstance(data, str) and not isinstance(data, bytes):  # python 3 str.
+            data = data.encode("utf-8")
+        data = self.buffer + bytes(data)
+        # The last token start is almost always near the end, so the end is searched first.
+        match = BOUNDARY.search(data, max(len(data) - 256, 0))
+        if match is None and len(data) > 256:
+            match = BOUNDARY.search(data)
+        if match is None:
+            self.buffer = b''
+            return data
+        self.buffer = data[match.start():]
+        return data[:match.start()]
+
+    def release(self):
+        """
+        :return: any held data, at the end of the data.
+        """
+        data = self.buffer
+        self.buffer = b''
+        return data
+
+    @staticmethod
+    def tokenize(data):
+        tokens = []
+        append = tokens.append
+        for command, zs, tail, speed, s, single in TOKEN.findall(data):
+            if command:
+                value = 255 * len(zs)
+                if tail:
+                    value += DISTANCE_VALUES.get(tail) or int(tail)
+                append((COMMAND_NAMES[command], value))
+            elif single:
+                append((COMMAND_NAMES[single], None))
+            elif s:
+                append(('S', s.decode("ascii")))
+            elif speed:
+                append(('C', speed.decode("ascii")))
+        return tokens
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+from .EgvParser import COMMAND_NAMES, DISTANCE_VALUES, EgvParser, TOKEN
+from .LaserSpeed import LaserSpeed
+
+
+class EgvPlayer:
+    """
+    Replays LHYMICRO-GL (EGV) data into a plotter, such as an SvgPlotter or PngPlotter to preview it, or a
+    NanoPlotter to send it again.
+
+    The data is parsed in chunks as it is read, so files of any size are replayed in little memory. The
+    head directions are followed as the board follows them: each move is passed to the plotter as a
+    relative move, a direction switch in raster compact mode steps by the raster step, as a NanoPlotter
+    steps when its direction switches or as a move of its own for other plotters, and compact mode is
+    entered, broken, reset and finished as the data does. Rail locks and unlocks are replayed into
+    plotters having lock_rail() and unlock_rail().
+
+    Consecutive moves in the same direction are passed on as one move, as are the rapid moves of a
+    default mode command.
+    """
+
+    def __init__(self, plotter):
+        """
+        :param plotter: plotter the data is replayed into.
+        """
+        self.plotter = plotter
+        self.parser = EgvParser()
+        self.compact = False
+        self.is_on = False
+        self.is_left = False
+        self.is_top = False
+        self.speed_code = None
+        self.raster_step = 0
+        self.dx = 0
+        self.dy = 0
+        self.homed = False
+        self.tokens = 0
+
+    def play(self, egv, chunk_size=1 << 20):
+        """
+        Replays all of egv, then any held moves.
+
+        :param egv: filename, binary file-like object or bytes of EGV data.
+        :param chunk_size: bytes read at a time.
+        :return: number of tokens replayed.
+        """
+        if isinstance(egv, (bytes, bytearray)):
+            self.feed(egv)
+        elif hasattr(egv, "read"):
+            while True:
+                chunk = egv.read(chunk_size)
+                if len(chunk) == 0:
+                    break
+                self.feed(chunk)
+        else:
+            with open(egv, "rb") as stream:
+                return self.play(stream, chunk_size)
+        self.flush()
+        return self.tokens
+
+    def feed(self, data):
+        """
+        :param data: next chunk of EGV data.
+        """
+        self.replay(self.parser.complete(data))
+
+    def flush(self):
+        """
+        Replays any held data and moves.
+        """
+        self.replay(self.parser.release())
+        self.move()
+
+    def replay(self, data):
+        # The moves are followed in local variables, as nearly every token is a move.
+        plotter_move = self.plotter.move
+        dx = self.dx
+        dy = self.dy
+        is_left = self.is_left
+        is_top = self.is_top
+        tokens = 0
+        for command, zs, tail, speed, s, single in TOKEN.findall(data):
+            tokens += 1
+            if command:
+                value = 255 * len(zs)
+                if tail:
+                    value += DISTANCE_VALUES.get(tail) or int(tail)
+                if command == b'B' or command == b'T':
+                    if (command == b'T') != is_left:
+                        is_left = not is_left
+                        if self.compact and self.raster_step:
+                            if dx != 0 or dy != 0:
+                                plotter_move(dx, dy)
+                                dx = dy = 0
+                            self.is_top = is_top
+                            self.raster_switch()
+                    mx = -value if is_left else value
+                    my = 0
+                elif command == b'L' or command == b'R':
+                    is_top = command == b'L'
+                    mx = 0
+                    my = -value if is_top else value
+                else:
+                    mx = -value if is_left else value
+                    my = -value if is_top else value
+                if value == 0:
+                    continue
+                if dx != 0 or dy != 0:
+                    # Rapid moves are joined, anything else only continuing in the same direction.
+                    if (self.compact or self.is_on) and (dx * my != dy * mx or dx * mx + dy * my < 0):
+                        plotter_move(dx, dy)
+                        dx = dy = 0
+                self.homed = False
+                dx += mx
+                dy += my
+                continue
+            self.dx = dx
+            self.dy = dy
+            self.is_left = is_left
+            self.is_top = is_top
+            if single:
+                self.command(COMMAND_NAMES[single])
+            elif s:
+                if s == b'1P' and (self.dx != 0 or self.dy != 0):
+                    self.move()  # the end of a default mode move.
+                elif s == b'1P' or s == b'2P':
+                    self.rail(s == b'1P')
+                else:
+                    self.move()
+                    if s == b'1E' and not self.compact:
+                        self.enter_compact_mode()
+            elif speed:
+                self.move()
+                self.speed_code = str(speed.decode("ascii"))  # str on python 2 as well, as NanoPlotter expects.
+                self.raster_step = LaserSpeed.parse_speed_code(self.speed_code)[4]
+            dx = self.dx
+            dy = self.dy
+            is_left = self.is_left
+            is_top = self.is_top
+        self.dx = dx
+        self.dy = dy
+        self.is_left = is_left
+        self.is_top = is_top
+        self.tokens += tokens
+
+    def move(self):
+        """
+        Passes the held move on to the plotter.
+        """
+        if self.dx != 0 or self.dy != 0:
+            self.plotter.move(self.dx, self.dy)
+            self.dx = 0
+            self.dy = 0
+
+    def raster_switch(self):
+        """
+        Steps to the next raster line, the board does so whenever the horizontal direction switches.
+        """
+        plotter = self.plotter
+        if hasattr(plotter, "move_right"):
+            # NanoPlotter follows the step when its direction switches in raster mode.
+            if self.is_left:
+                plotter.move_left()
+            else:
+                plotter.move_right()
+            plotter.check_bounds()
+        elif not plotter.h_switch():
+            plotter.move(0, -self.raster_step if self.is_top else self.raster_step)
+
+    def rail(self, lock):
+        """
+        Locks or unlocks the rail, compact mode is left by the data itself.
+        """
+        plotter = self.plotter
+        if lock and hasattr(plotter, "lock_rail"):
+            plotter.lock_rail(abort=True)
+        elif not lock and hasattr(plotter, "unlock_rail"):
+            plotter.unlock_rail(abort=True)
+
+    def enter_compact_mode(self):
+        plotter = self.plotter
+        if self.raster_step and hasattr(plotter, "is_left"):
+            # Plotters following the directions themselves start from those declared for the raster.
+            plotter.is_left = self.is_left
+            plotter.is_top = self.is_top
+        if self.speed_code is None:
+            plotter.enter_compact_mode()
+        else:
+            plotter.enter_compact_mode(self.speed_code, self.raster_step)
+        self.compact = True
+
+    def command(self, name):
+        plotter = self.plotter
+        if name == 'I':
+            return
+        self.move()
+        if name == 'D':
+            plotter.down()
+            self.is_on = True
+        elif name == 'U':
+            plotter.up()
+            self.is_on = False
+        elif name == 'N':
+            if self.compact:
+                plotter.exit_compact_mode_break()
+                self.compact = False
+        elif name == '@':
+            if self.compact:
+                plotter.exit_compact_mode_reset()
+                self.compact = False
+            self.is_on = False
+        elif name == 'F':
+            if self.compact:
+                plotter.exit_compact_mode_finish()
+                self.compact = False
+            self.is_on = False
+        elif name == 'P':
+            if self.homed:
+                return  # homing is sent as 'PP'.
+            self.homed = True
+            if hasattr(plotter, "home"):
+                plotter.home()
+            else:
+                plotter.up()
+                plotter.move_abs(0, 0)
+            self.is_on = False
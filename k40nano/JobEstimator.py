@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+import re
+from collections import Counter
+
+from .Connection import Connection
+from .EgvParser import DISTANCE_VALUES, EgvParser
+from .LaserSpeed import LaserSpeed
+
+# Diagonal moves other than those of a single letter a-y, which are counted.
+DIAGONAL_LONG = re.compile(br'M(z+(?:\|[a-z]|[a-y]|[0-9]{3})?|\|[a-z]|[0-9]{3})')
+DIGITS = re.compile(br'[0-9]{3}')
+
+# Commands which begin or end a section, and speed codes. The lookahead lets the search skip ahead.
+SECTION = re.compile(br'(?=[CVS@F])(?:C?V[0-9]+(?:G[0-9]{3})?C?|S1E|@|F)')
+
+LETTERS = [(bytes(bytearray([96 + i])), i) for i in range(1, 26)]  # a-y, 1-25
+DIAGONAL_LETTERS = [(b'M' + letter, value) for letter, value in LETTERS]
+NOT_HORIZONTAL = bytes(bytearray(i for i in range(256) if i not in bytearray(b'BT')))
+
+
+def distance_value(code):
+    """
+    :param code: encoded distance, as z* followed by a-y, |a-|z or 3 digits.
+    :return: distance in steps.
+    """
+    tail = code.lstrip(b'z')
+    zs = len(code) - len(tail)
+    if len(tail) == 0:
+        return 255 * zs
+    return 255 * zs + (DISTANCE_VALUES.get(tail) or int(tail))
+
+
+def distance_total(data):
+    """
+    Totals every distance within data, which holds no speed codes.
+
+    Lowercase letters, '|' and digits only occur within distances, so each is counted over all of data.
+    '|' adds 25 to the letter after it, where z is 26 rather than 255.
+
+    :return: total of the distances of all the moves within data.
+    """
+    total = 255 * data.count(b'z') + 25 * data.count(b'|') - 229 * data.count(b'|z')
+    for letter, value in LETTERS:
+        total += value * data.count(letter)
+    if DIGITS.search(data) is not None:
+        total += sum(int(digits) for digits in DIGITS.findall(data))
+    return total
+
+
+def diagonal_total(data):
+    """
+    :return: total of the distances of the diagonal moves within data.
+    """
+    total = 0
+    for move, value in DIAGONAL_LETTERS:
+        total += value * data.count(move)
+    for code, count in Counter(DIAGONAL_LONG.findall(data)).items():
+        total += distance_value(code) * count
+    return total
+
+
+class JobEstimator(Connection):
+    """
+    Estimates the running time of LHYMICRO-GL (EGV) data.
+
+    The data is split into sections: each compact mode section at its speed code, and the default mode
+    moves between them. Within a section the straight and diagonal steps are totalled and converted to
+    time with the period of the speed code, as LaserSpeed gears it for the board, and the diagonal delay.
+    Each direction switch of a raster section adds the raster step. Default mode moves run at rapid_speed.
+
+    Steps are totalled by counting the distance characters of each section rather than parsing it command
+    by command, so large files are estimated quickly. Homing time is not included, as it depends on the head position.
+
+    Data is fed in chunks of any size with feed(), or the estimator is used as the connection of a
+    NanoPlotter to estimate the plotter calls.
+    """
+
+    def __init__(self, board="LASER-M2", rapid_speed=100.0):
+        """
+        :param board: board the speed codes are interpreted for.
+        :param rapid_speed: speed in mm/s of default mode moves.
+        """
+        Connection.__init__(self)
+        self.board = board
+        self.rapid_step_time = 0.0254 / rapid_speed
+        self.parser = EgvParser()
+        self.sections = []
+        self.section = None
+        self.speed_code = None
+        self.step_time = 0.0
+        self.diagonal_time = 0.0
+        self.raster_step = 0
+        self.is_left = False
+        self.start_section(False)
+
+    @property
+    def time(self):
+        """
+        :return: estimated seconds of the data fed.
+        """
+        return sum(section["time"] for section in self.sections)
+
+    @staticmethod
+    def step_times(speed_code, board="LASER-M2"):
+        """
+        :param speed_code: speed code, eg. 'CV0051131001065112C' or 'V1551921G002'.
+        :param board: board the speed code is interpreted for.
+        :return: seconds per straight step, seconds per diagonal step, raster step.
+        """
+        code_value, gear, step_value, diagonal, raster_step = LaserSpeed.parse_speed_code(speed_code)
+        b, m, gear = LaserSpeed.get_gearing(board, gear=gear, uses_raster_step=raster_step != 0)
+        step_time = max(LaserSpeed.get_period_from_value(code_value, b, m), 0.0) / 1000.0
+        diagonal_time = max(LaserSpeed.get_period_from_value(code_value + diagonal, b, m), 0.0) / 1000.0
+        return step_time, diagonal_time, raster_step
+
+    def write(self, data=None):
+        self.feed(data)
+
+    def flush(self):
+        self.process(self.parser.release())
+
+    def feed(self, data):
+        """
+        :param data: next chunk of EGV data.
+        """
+        self.process(self.parser.complete(data))
+
+    def estimate(self, data):
+        """
+        Feeds all of data, as bytes or a file object read in chunks.
+
+        :return: estimated seconds of all the data fed.
+        """
+        if hasattr(data, "read"):
+            while True:
+                chunk = data.read(1 << 20)
+                if len(chunk) == 0:
+                    break
+                self.feed(chunk)
+        else:
+            self.feed(data)
+        self.flush()
+        return self.time
+
+    def start_section(self, compact):
+        self.section = {
+            "speed_code": self.speed_code if compact else None,
+            "compact": compact,
+            "straight": 0,
+            "diagonal": 0,
+            "switches": 0,
+            "time": 0.0,
+        }
+        self.sections.append(self.section)
+        if compact and self.speed_code is not None:
+            self.step_time, self.diagonal_time, self.raster_step = self.step_times(self.speed_code, self.board)
+
+    def process(self, data):
+        position = 0
+        for match in SECTION.finditer(data):
+            self.segment(data[position:match.start()])
+            command = match.group(0)
+            if command == b'S1E':
+                if not self.section["compact"]:
+                    self.start_section(True)
+            elif command == b'@' or command == b'F':
+                if self.section["compact"]:
+                    self.start_section(False)
+            else:
+                self.speed_code = command.decode("ascii")
+            position = match.end()
+        self.segment(data[position:])
+
+    def segment(self, data):
+        """
+        Totals the steps of data within the current section.
+        """
+        if len(data) == 0:
+            return
+        section = self.section
+        diagonal = diagonal_total(data)
+        straight = distance_total(data) - diagonal
+        horizontal = data.translate(None, NOT_HORIZONTAL)
+        if section["compact"]:
+            switches = 0
+            if self.raster_step and len(horizontal) != 0:
+                horizontal = (b'T' if self.is_left else b'B') + horizontal
+                switches = horizontal.count(b'BT') + horizontal.count(b'TB')
+            section["switches"] += switches
+            section["time"] += straight * self.step_time + diagonal * self.diagonal_time + \
+                switches * self.raster_step * self.step_time
+        else:
+            section["time"] += (straight + diagonal) * self.rapid_step_time
+        section["straight"] += straight
+        section["diagonal"] += diagonal
+        if len(horizontal) != 0:
+            self.is_left = horizontal[-1:] == b'T'
@@ -2,6 +2,29 @@
 
 from math import floor
 
+from .BoardProfile import BoardProfile, DEFAULT_PROFILES
+from .SpeedCache import SpeedCache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # batch conversions fall back to python.
+
+DEFAULT_D_RATIO = 0.261199033289
+
+# Common speeds in mm/s, preloaded by LaserSpeed.preload().
+SPEED_GRID = [float(speed) for speed in range(1, 100)] + [float(speed) for speed in range(100, 241, 5)]
+
+BOARDS = dict((profile.name, profile) for profile in DEFAULT_PROFILES)
+
+# Gear of a speed, for vector and for raster step speeds: the gear of the first limit the speed is within,
+# as (mm/s, whether the limit itself is within, gear), else TOP_GEAR. Used by the single and batch conversions.
+GEAR_LIMITS = {
+    False: ((25.4, True, 1), (60.0, True, 2), (127.0, False, 3)),
+    True: ((25.4, True, 1), (60.0, True, 2), (127.0, False, 2), (320.0, True, 3)),
+}
+TOP_GEAR = 4
+
 
 class LaserSpeed:
     """
@@ -36,17 +59,27 @@ class LaserSpeed:
     are used.
     """
 
+    # Conversions are cached, as jobs convert the same few speeds whenever they enter compact mode.
+    code_cache = SpeedCache()
+    speed_cache = SpeedCache()
+    parse_cache = SpeedCache()
+
     def __init__(self):
         pass
 
     @staticmethod
     def get_speed_from_code(speed_code, board="LASER-M2"):
+        return LaserSpeed.speed_cache.get((speed_code, LaserSpeed.get_board(board)),
+                                          LaserSpeed.uncached_get_speed_from_code)
+
+    @staticmethod
+    def uncached_get_speed_from_code(speed_code, board="LASER-M2"):
         code_value, gear, step_value, diagonal, raster_step = LaserSpeed.parse_speed_code(speed_code)
         b, m, gear = LaserSpeed.get_gearing(board, gear=gear, uses_raster_step=raster_step != 0)
         return LaserSpeed.get_speed_from_value(code_value, b, m)
 
     @staticmethod
-    def get_code_from_speed(mm_per_second, raster_step=0, board="LASER-M2", d_ratio=0.261199033289, gear=None):
+    def get_code_from_speed(mm_per_second, raster_step=0, board="LASER-M2", d_ratio=DEFAULT_D_RATIO, gear=None):
         """
         Get a speedcode from a given speed. The raster step appends the 'G' value and uses speed ranges.
         The d_ratio uses the default/auto ratio. The gearing is optional and forces the speedcode to work
@@ -59,13 +92,47 @@ class LaserSpeed:
         :param gear: Optional force gearing rather than default gear for that speed.
         :return: speed code produced.
         """
+        key = (mm_per_second, raster_step, LaserSpeed.get_board(board), d_ratio, gear)
+        return LaserSpeed.code_cache.get(key, LaserSpeed.uncached_get_code_from_speed)
+
+    @staticmethod
+    def uncached_get_code_from_speed(mm_per_second, raster_step=0, board="LASER-M2", d_ratio=DEFAULT_D_RATIO,
+                                     gear=None):
         if mm_per_second > 240 and raster_step == 0:
             mm_per_second = 19.05  # Arbitrary default speed for out range value.
         b, m, gear = LaserSpeed.get_gearing(board, mm_per_second, raster_step != 0, gear)
 
         speed_value = LaserSpeed.get_value_from_speed(mm_per_second, b, m)
-        encoded_speed = LaserSpeed.encode_value(speed_value)
+        step_value = None
+        d_value = None
+        if raster_step == 0 and d_ratio != 0 and LaserSpeed.get_board(board).diagonal:
+            step_value, d_value = LaserSpeed.get_diagonal(mm_per_second, m, d_ratio)
+        return LaserSpeed.format_code(speed_value, gear, raster_step, step_value, d_value)
 
+    @staticmethod
+    def get_diagonal(mm_per_second, m, d_ratio=DEFAULT_D_RATIO):
+        """
+        :return: step value and diagonal value of the speed code of the speed.
+        """
+        step_value = min(int(floor(mm_per_second) + 1), 128)
+        frequency_kHz = float(mm_per_second) / 25.4
+        try:
+            period_in_ms = 1 / frequency_kHz
+        except ZeroDivisionError:
+            period_in_ms = 0
+        return step_value, d_ratio * m * period_in_ms / float(step_value)
+
+    @staticmethod
+    def format_code(speed_value, gear, raster_step, step_value=None, d_value=None):
+        """
+        :param speed_value: speed value of the code.
+        :param gear: gear of the code, 0 for C-suffix notation.
+        :param raster_step: raster step of the code.
+        :param step_value: step value of the diagonal, None when the code has no diagonal.
+        :param d_value: diagonal value of the code.
+        :return: speed code.
+        """
+        encoded_speed = LaserSpeed.encode_value(speed_value)
         if raster_step != 0:
             if gear == 0:  # There is no C suffix notation for gear raster step.
                 gear = 1
@@ -74,42 +141,226 @@ class LaserSpeed:
                 gear,
                 raster_step
             )
-
-        if d_ratio == 0 or board == "A" or board == "B" or board == "M" or board == "LASER-A" or board == "LASER-B" or board == "LASER-M":
+        if step_value is None:
             # We do not need the diagonal code.
-            if raster_step == 0:
-                if gear == 0:
-                    return "CV%s1C" % (
-                        encoded_speed
-                    )
-                else:
-                    return "CV%s%1d" % (
-                        encoded_speed,
-                        gear)
-        else:
-            step_value = min(int(floor(mm_per_second) + 1), 128)
-            frequency_kHz = float(mm_per_second) / 25.4
-            try:
-                period_in_ms = 1 / frequency_kHz
-            except ZeroDivisionError:
-                period_in_ms = 0
-            d_value = d_ratio * m * period_in_ms / float(step_value)
-            encoded_diagonal = LaserSpeed.encode_value(d_value)
             if gear == 0:
-                return "CV%s1%03d%sC" % (
-                    encoded_speed,
-                    step_value,
-                    encoded_diagonal
+                return "CV%s1C" % (
+                    encoded_speed
                 )
             else:
-                return "CV%s%1d%03d%s" % (
+                return "CV%s%1d" % (
                     encoded_speed,
-                    gear,
-                    step_value,
-                    encoded_diagonal)
+                    gear)
+        encoded_diagonal = LaserSpeed.encode_value(d_value)
+        if gear == 0:
+            return "CV%s1%03d%sC" % (
+                encoded_speed,
+                step_value,
+                encoded_diagonal
+            )
+        else:
+            return "CV%s%1d%03d%s" % (
+                encoded_speed,
+                gear,
+                step_value,
+                encoded_diagonal)
+
+    @staticmethod
+    def solve_speed(mm_per_second, raster_step=0, board="LASER-M2", d_ratio=DEFAULT_D_RATIO):
+        """
+        Finds the achievable speed nearest a requested speed.
+
+        Speed codes hold whole values, so only some speeds can be set. Within the gear the requested speed
+        uses, the values either side of the exact value are tried and the nearer speed kept. The speeds are
+        those the board gives its codes, so raster speeds below the C-suffix speed of the board are solved
+        in the gear their codes are read in.
+
+        :param mm_per_second: requested speed.
+        :param raster_step: raster step mode to use.
+        :param board: Nano Board Model, or BoardProfile.
+        :param d_ratio: M1, M2, B1, B2 have ratio of optional speed
+        :return: dict of the achieved "speed", its "code", "gear" and "value", and the relative "error".
+        """
+        if mm_per_second <= 0:
+            raise ValueError("Speed must be positive.")
+        board = LaserSpeed.get_board(board)
+        b, m, gear = LaserSpeed.get_code_gearing(board, mm_per_second, raster_step)
+        exact = LaserSpeed.get_value_from_speed(mm_per_second, b, m)
+        highest = LaserSpeed.get_highest_value(b)
+        best = None
+        best_error = None
+        for value in (int(floor(exact)), int(floor(exact)) + 1):
+            value = max(min(value, highest), 0)
+            error = abs(LaserSpeed.get_speed_from_value(65536 - value, b, m) - mm_per_second)
+            if best is None or error < best_error:
+                best = value
+                best_error = error
+        return LaserSpeed.get_solution(best, (b, m, gear), mm_per_second, raster_step, board, d_ratio)
+
+    @staticmethod
+    def get_code_gearing(board, mm_per_second, raster_step=0):
+        """
+        :return: gearing the speed code of the speed is read in: raster codes have no gear 0.
+        """
+        board = LaserSpeed.get_board(board)
+        gear = LaserSpeed.get_gearing(board, mm_per_second, raster_step != 0)[2]
+        if raster_step != 0 and gear == 0:
+            gear = 1
+        return board.gearing[gear]
+
+    @staticmethod
+    def get_highest_value(b):
+        """
+        :return: highest speed value of a gearing with a positive period.
+        """
+        return min(65535, int(floor(65536 - b - 1e-9)))
+
+    @staticmethod
+    def get_solution(value, gearing, mm_per_second, raster_step, board, d_ratio=DEFAULT_D_RATIO):
+        """
+        :param value: speed value of the code.
+        :param gearing: (b, m, gear) the value is read in.
+        :param mm_per_second: requested speed.
+        :return: dict of the achieved "speed", its "code", "gear" and "value", and the relative "error".
+        """
+        b, m, gear = gearing
+        speed = LaserSpeed.get_speed_from_value(65536 - value, b, m)
+        step_value = None
+        d_value = None
+        if raster_step == 0 and d_ratio != 0 and LaserSpeed.get_board(board).diagonal:
+            step_value, d_value = LaserSpeed.get_diagonal(speed, m, d_ratio)
+        return {
+            "speed": speed,
+            "code": LaserSpeed.format_code(value, gear, raster_step, step_value, d_value),
+            "gear": gear,
+            "value": value,
+            "error": (speed - mm_per_second) / float(mm_per_second),
+        }
+
+    @staticmethod
+    def get_achievable_values(low, high, raster_step=0, board="LASER-M2"):
+        """
+        Lists every achievable speed from low to high, each in the gear its speed uses.
+
+        :param low: slowest speed in mm/s, above 0.
+        :param high: fastest speed in mm/s.
+        :param raster_step: raster step mode to use.
+        :param board: Nano Board Model, or BoardProfile.
+        :return: sorted list of (speed, value, (b, m, gear)).
+        """
+        board = LaserSpeed.get_board(board)
+        achievable = []
+        for gearing in board.gearing:
+            b, m, gear = gearing
+            highest = LaserSpeed.get_highest_value(b)
+            first = max(int(floor(LaserSpeed.get_value_from_speed(low, b, m))), 0)
+            last = min(int(floor(LaserSpeed.get_value_from_speed(high, b, m))) + 1, highest)
+            for value in range(first, last + 1):
+                speed = LaserSpeed.get_speed_from_value(65536 - value, b, m)
+                if low <= speed <= high and LaserSpeed.get_code_gearing(board, speed, raster_step) == gearing:
+                    achievable.append((speed, value, gearing))
+        achievable.sort()
+        return achievable
+
+    @staticmethod
+    def get_codes_from_speeds(speeds, raster_steps=0, board="LASER-M2", d_ratio=DEFAULT_D_RATIO, gear=None,
+                              use_numpy=None):
+        """
+        Gets the speed codes of many speeds at once, as get_code_from_speed gets each.
+
+        With numpy the gearing and values of all the speeds are computed as arrays, and only the codes are
+        formatted one at a time. The conversions are not cached.
+
+        :param speeds: sequence of speeds to convert to codes.
+        :param raster_steps: raster step of all the speeds, or a sequence of the raster step of each.
+        :param board: Nano Board Model to do the conversion for.
+        :param d_ratio: M1, M2, B1, B2 have ratio of optional speed
+        :param gear: Optional force gearing rather than default gear for the speeds.
+        :param use_numpy: whether numpy is used, by default when it is installed.
+        :return: list of the speed codes produced.
+        """
+        speeds = list(speeds)
+        if isinstance(raster_steps, int):
+            raster_steps = [raster_steps] * len(speeds)
+        else:
+            raster_steps = list(raster_steps)
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if not use_numpy:
+            convert = LaserSpeed.uncached_get_code_from_speed
+            return [convert(speed, raster_step, board, d_ratio, gear)
+                    for speed, raster_step in zip(speeds, raster_steps)]
+        s = numpy.array(speeds, dtype=float)
+        r = numpy.array(raster_steps, dtype=int)
+        s = numpy.where((s > 240) & (r == 0), 19.05, s)  # Arbitrary default speed for out range value.
+        b, m, g = LaserSpeed.get_gearings(board, s, r != 0, gear)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            period_in_ms = 1.0 / (s / 25.4)
+            speed_value = numpy.where(s == 0, 65536 - b, 65536 - (m * period_in_ms + b))
+            step_value = numpy.minimum(numpy.floor(s) + 1, 128)
+            d_value = d_ratio * m * numpy.where(s == 0, 0.0, period_in_ms) / step_value
+        diagonal = d_ratio != 0 and LaserSpeed.get_board(board).diagonal
+        format_code = LaserSpeed.format_code
+        return [
+            format_code(v, gv, rv, int(sv) if diagonal and rv == 0 else None, dv)
+            for v, gv, rv, sv, dv in zip(speed_value.tolist(), g.tolist(), r.tolist(), step_value.tolist(),
+                                         d_value.tolist())
+        ]
+
+    @staticmethod
+    def get_speeds_from_codes(speed_codes, board="LASER-M2", use_numpy=None):
+        """
+        Gets the speeds of many speed codes at once, as get_speed_from_code gets each.
+
+        :param speed_codes: sequence of speed codes.
+        :param board: Nano Board Model to do the conversion for.
+        :param use_numpy: whether numpy is used, by default when it is installed.
+        :return: list of the speeds in mm/s.
+        """
+        parsed = LaserSpeed.parse_speed_codes(speed_codes)
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if not use_numpy:
+            get_gearing = LaserSpeed.get_gearing
+            get_speed_from_value = LaserSpeed.get_speed_from_value
+            speeds = []
+            for code_value, gear, step_value, diagonal, raster_step in parsed:
+                b, m, gear = get_gearing(board, gear=gear, uses_raster_step=raster_step != 0)
+                speeds.append(get_speed_from_value(code_value, b, m))
+            return speeds
+        if len(parsed) == 0:
+            return []
+        table = numpy.array(LaserSpeed.get_board(board).gearing, dtype=float)
+        values = numpy.array([code[0] for code in parsed], dtype=float)
+        gears = numpy.array([code[1] for code in parsed], dtype=int)
+        b = table[gears, 0]
+        m = table[gears, 1]
+        with numpy.errstate(divide='ignore'):
+            period_in_ms = (values - b) / m
+            speeds = numpy.where(period_in_ms == 0, 0.0, 25.4 * (1 / period_in_ms))
+        return speeds.tolist()
+
+    @staticmethod
+    def parse_speed_codes(speed_codes):
+        """
+        Parses many speed codes at once, as parse_speed_code parses each. The parses are not cached.
+
+        :param speed_codes: sequence of speed codes.
+        :return: list of the code value, gear, step value, diagonal, raster step of each code.
+        """
+        parse = LaserSpeed.uncached_parse_speed_code
+        return [parse(speed_code) for speed_code in speed_codes]
 
     @staticmethod
     def parse_speed_code(speed_code):
+        """
+        :param speed_code: speed code, eg. 'CV0051131001065112C' or 'V1551921G002'.
+        :return: code value, gear, step value, diagonal, raster step.
+        """
+        return LaserSpeed.parse_cache.get((speed_code,), LaserSpeed.uncached_parse_speed_code)
+
+    @staticmethod
+    def uncached_parse_speed_code(speed_code):
         is_shortened = False
         normal = False
         if speed_code[0] == "C":
@@ -149,6 +400,69 @@ class LaserSpeed:
                 raster_step = int(speed_code[-3:])
             return code_value, gear, 1, 1, raster_step
 
+    @staticmethod
+    def preload(board="LASER-M2", speeds=None, raster_steps=(0,)):
+        """
+        Preloads the conversions of a grid of speeds for the board, which stay cached however many other
+        conversions are made. Typically called once at startup with the speeds a shop uses.
+
+        :param board: Nano Board Model to preload the conversions of.
+        :param speeds: speeds in mm/s, SPEED_GRID by default.
+        :param raster_steps: raster steps to preload each speed with.
+        """
+        if speeds is None:
+            speeds = SPEED_GRID
+        board = LaserSpeed.get_board(board)
+        for raster_step in raster_steps:
+            for mm_per_second in speeds:
+                speed_code = LaserSpeed.uncached_get_code_from_speed(mm_per_second, raster_step, board)
+                LaserSpeed.code_cache.preload((mm_per_second, raster_step, board, DEFAULT_D_RATIO, None), speed_code)
+                LaserSpeed.speed_cache.preload((speed_code, board),
+                                               LaserSpeed.uncached_get_speed_from_code(speed_code, board))
+                LaserSpeed.parse_cache.preload((speed_code,), LaserSpeed.uncached_parse_speed_code(speed_code))
+
+    @staticmethod
+    def cache_stats():
+        """
+        :return: dict of the stats of each conversion cache.
+        """
+        return {
+            "get_code_from_speed": LaserSpeed.code_cache.stats(),
+            "get_speed_from_code": LaserSpeed.speed_cache.stats(),
+            "parse_speed_code": LaserSpeed.parse_cache.stats(),
+        }
+
+    @staticmethod
+    def clear_caches(table=False):
+        """
+        :param table: whether the preloaded conversions are also dropped.
+        """
+        LaserSpeed.code_cache.clear(table)
+        LaserSpeed.speed_cache.clear(table)
+        LaserSpeed.parse_cache.clear(table)
+
+    @staticmethod
+    def get_board(board):
+        """
+        :param board: Nano Board Model name, or a BoardProfile.
+        :return: BoardProfile of the board.
+        """
+        if isinstance(board, BoardProfile):
+            return board
+        return BOARDS[board]
+
+    @staticmethod
+    def register_board(profile):
+        """
+        Registers a BoardProfile, such as one measured for a particular machine, under its name. A profile
+        replacing one of the same name drops the cached and preloaded conversions.
+
+        :param profile: BoardProfile to register.
+        """
+        if profile.name in BOARDS:
+            LaserSpeed.clear_caches(table=True)
+        BOARDS[profile.name] = profile
+
     @staticmethod
     def get_value_from_speed(mm_per_second, b, m):
         """
@@ -204,22 +518,10 @@ class LaserSpeed:
 
     @staticmethod
     def get_gear_for_speed(mm_per_second, uses_raster_step=False):
-        if mm_per_second <= 25.4:
-            return 1
-        if 25.4 < mm_per_second <= 60:
-            return 2
-        if not uses_raster_step:
-            if 60 < mm_per_second < 127:
-                return 3
-            if 127 <= mm_per_second:
-                return 4
-        else:
-            if 60 < mm_per_second < 127:
-                return 2
-            if 127 <= mm_per_second <= 320:
-                return 3
-            if 320 <= mm_per_second:
-                return 4
+        for limit, within, gear in GEAR_LIMITS[bool(uses_raster_step)]:
+            if mm_per_second < limit or (within and mm_per_second == limit):
+                return gear
+        return TOP_GEAR
 
     @staticmethod
     def get_gearing(board, mm_per_second=None, uses_raster_step=False, gear=None):
@@ -235,102 +537,50 @@ class LaserSpeed:
         board being twice the M2 board. However it is not known for A or B, B1 or B2
         In this case LASER-X returns the same value as X.
         """
+        board = LaserSpeed.get_board(board)
         if gear is None:
             gear = LaserSpeed.get_gear_for_speed(mm_per_second, uses_raster_step)
-            if board == "B2":
-                if mm_per_second < 7:
-                    # speeds below 9.509 will be in error. But the Chinese Software drew the line for suffix-C at
-                    # 7 so, this package does as well. Even though it means impossible speeds at between 7 and 9.509.
-                    if uses_raster_step:
-                        return 784.0, 2020.0, 1
-                        # C-suffix code, pretending to be gear 1, the results are raster
-                        # speedcodes that do not actually provide full circle capabilities.
-                        # There are no permitted very slow raster speed codes. But to properly
-                        # emulate the Chinese software this is added because that is how it
-                        # works in that package.
-                    else:
-                        gear = 0
-                        # Use C-suffice notation.
-            elif board == "LASER-B2":
-                if mm_per_second < 8.75:
-                    if uses_raster_step:
-                        return 784.0, 1858.0, 1
-                    # Speeds below 8.75 will be in error.
-                    # The LASER-XX spec is intended to fix things, so the error code range of the B2 are dismissed
-                    gear = 0  # Use C-suffix notion below this level.
-            elif board == "M2":
-                if mm_per_second < 7:
-                    gear = 0  # Use C-suffix notion below this level.
-            elif board == "LASER-M2":
-                if mm_per_second < 7:
-                    gear = 0  # Use C-suffix notion below this level.
-        A_B_B1 = [
-            (784.0, 2000.0, 0),  # A, B, B1 have no known suffix-C equations.
-            (784.0, 2000.0, 1),
-            (784.0, 2000.0, 2),
-            (896.0, 2000.0, 3),
-            (1024.0, 2000.0, 4)
-        ]
-        M_M1 = [
-            (5120.0, 12120.0, 0),  # M, M1 has no known suffix-C equations.
-            (5120.0, 12120.0, 1),
-            (5120.0, 12120.0, 2),
-            (5632.0, 12120.0, 3),
-            (6144.0, 12120.0, 4)
-        ]
-        BOARD_M_M1 = [
-                (5120.0, 11148.0, 0),  # M has no known suffix-C equations.
-                (5120.0, 11148.0, 1),
-                (5120.0, 11148.0, 2),
-                (5632.0, 11148.0, 3),
-                (6144.0, 11148.0, 4)
-                # The physical speed elements were guessed at with regard to the M2 that were tested
-            ]
-        speedcode_dict = {
-            "A": A_B_B1,
-            "B": A_B_B1,
-            "B1": A_B_B1,
-            "B2": [
-                (784.0, 2020.0, 0),
-                (784.0, 24240.0, 1),
-                (784.0, 24240.0, 2),
-                (896.0, 24240.0, 3),
-                (1024.0, 24240.0, 4)
-            ],
-            "M": M_M1,
-            "M1": M_M1,
-            "M2": [
-                (8.0, 1010.0, 0),
-                (5120.0, 12120.0, 1),
-                (5120.0, 12120.0, 2),
-                (5632.0, 12120.0, 3),
-                (6144.0, 12120.0, 4)
-            ],
-            "LASER-A": A_B_B1,
-            # It is unknown if these values are correct with regard to physical speed.
-            "LASER-B": A_B_B1,
-            # It is unknown if these values are correct with regard to physical speed.
-            "LASER-B1": A_B_B1,
-            # It is unknown if these values are correct with regard to physical speed.
-            "LASER-B2": [
-                (784.0, 1858.0, 0),
-                (784.0, 22296.0, 1),
-                (784.0, 22296.0, 2),
-                (896.0, 22296.0, 3),
-                (1024.0, 22296.0, 4)
-                # The physical speed elements were assumed to be 2x the real M2 values.
-            ],
-            "LASER-M": BOARD_M_M1,
-            "LASER-M1": BOARD_M_M1,
-            "LASER-M2": [
-                (8.0, 929.0, 0),
-                (5120.0, 11148.0, 1),
-                (5120.0, 11148.0, 2),
-                (5632.0, 11148.0, 3),
-                (6144.0, 11148.0, 4)
-            ],
-        }
-        return speedcode_dict[board][gear]
+            if board.suffix_c_speed is not None and mm_per_second < board.suffix_c_speed:
+                if uses_raster_step and board.raster_suffix_c is not None:
+                    return board.raster_suffix_c
+                gear = 0  # Use C-suffix notion below this level.
+        return board.gearing[gear]
+
+    @staticmethod
+    def get_gearings(board, speeds, uses_raster_step, gear=None):
+        """
+        Gets the gearing of an array of speeds, as get_gearing gets each. Requires numpy.
+
+        :param board: Nano Board Model.
+        :param speeds: numpy array of speeds in mm/s.
+        :param uses_raster_step: numpy array of whether each speed is for a raster step.
+        :param gear: Optional force gearing rather than default gear for the speeds.
+        :return: numpy arrays of the b, m and gear of each speed.
+        """
+        board = LaserSpeed.get_board(board)
+        table = numpy.array(board.gearing, dtype=float)
+        if gear is not None:
+            gears = numpy.full(speeds.shape, gear, dtype=int)
+            return table[gears, 0], table[gears, 1], gears
+        conditions = []
+        choices = []
+        for raster in (False, True):
+            mode = uses_raster_step if raster else ~uses_raster_step
+            for limit, within, limit_gear in GEAR_LIMITS[raster]:
+                conditions.append(mode & ((speeds <= limit) if within else (speeds < limit)))
+                choices.append(limit_gear)
+        gears = numpy.select(conditions, choices, TOP_GEAR)
+        if board.suffix_c_speed is None:
+            return table[gears, 0], table[gears, 1], gears
+        low = speeds < board.suffix_c_speed
+        if board.raster_suffix_c is None:
+            gears = numpy.where(low, 0, gears)
+            return table[gears, 0], table[gears, 1], gears
+        gears = numpy.where(low, numpy.where(uses_raster_step, 1, 0), gears)
+        raster = low & uses_raster_step
+        b = numpy.where(raster, board.raster_suffix_c[0], table[gears, 0])
+        m = numpy.where(raster, board.raster_suffix_c[1], table[gears, 1])
+        return b, m, gears
 
     @staticmethod
     def validate_speed(mm_per_second, board, uses_raster_step=False):
@@ -345,40 +595,15 @@ class LaserSpeed:
         :param uses_raster_step: is this speed for a raster_step
         :return: validated speed.
         """
-        if board == "A" or board == "B" or board == "B1":
-            if mm_per_second < 0.785:
-                return 0.785
-        elif board == "LASER-A" or board == "LASER-B" or board == "LASER-B1":
-            # The boards manufacturer says specifically the correct slowest speed is  0.762 mm
-            # This suggests the speed for these boards is likely 3% slower.
-            if mm_per_second < 0.785:
-                return 0.785
-        elif board == "LASER-B2":
-            if mm_per_second < 8.750 and uses_raster_step:
-                return 8.750
-            if mm_per_second < 0.730:
-                return 0.730
-        elif board == "B2":
-            if mm_per_second < 9.509 and (mm_per_second >= 7 or uses_raster_step):
-                return 9.509
-            if mm_per_second < 0.793:
-                return 0.793
-        elif board == "M" or board == "M1":
-            if mm_per_second < 5.096:
-                return 5.096
-        elif board == "LASER-M" or board == "LASER-M1":
-            if mm_per_second < 4.688:
-                return 4.688
-        elif board == "M2":
-            if mm_per_second < 5.096 and uses_raster_step:
-                return 5.096
-            if mm_per_second < 0.392:
-                return 0.392
-        elif board == "LASER-M2":
-            if mm_per_second < 4.688 and uses_raster_step:
-                return 4.688
-            if mm_per_second < 0.361:
-                return 0.361
+        if not isinstance(board, BoardProfile):
+            board = BOARDS.get(board)
+        if board is not None:
+            if uses_raster_step and board.min_raster_speed is not None and mm_per_second < board.min_raster_speed:
+                return board.min_raster_speed
+            if board.error_band is not None and board.error_band[0] <= mm_per_second < board.error_band[1]:
+                return board.error_band[1]
+            if board.min_speed is not None and mm_per_second < board.min_speed:
+                return board.min_speed
         if uses_raster_step:
             if mm_per_second > 500:
                 return 500.0
@@ -4,11 +4,21 @@
 
 from __future__ import print_function
 
+from .SimulatedUsb import SimulatedUsb
 
-class MockUsb:
-    def __init__(self):
-        self.device = None
-        self.finish = 0
+
+class MockUsb(SimulatedUsb):
+    """
+    Stand-in usb used when pyusb is not available, a SimulatedUsb which announces itself.
+    """
+
+    def __init__(self, verbose=False, **kwargs):
+        """
+        :param verbose: print every packet written.
+        :param kwargs: passed to SimulatedUsb.
+        """
+        SimulatedUsb.__init__(self, **kwargs)
+        self.verbose = verbose
 
     def initialize(self):
         """
@@ -23,7 +33,7 @@ class MockUsb:
         print("This is merely for testing purposes. There is no connection.")
         print("Connection requires pyusb and a working backend driver.")
         print("----")
-        self.device = self
+        SimulatedUsb.initialize(self)
 
     def reset_usb(self):
         print("Device Reset")
@@ -32,32 +42,20 @@ class MockUsb:
         if self.device is None:
             print("Device already released.")
         else:
-            self.device = None
+            SimulatedUsb.release_usb(self)
             print("Device Released")
 
-    def read(self):
-        return self.device.get_mock_read_value()
-
     def write(self, packet):
-        self.device.do_mock_write(packet)
-
-    def get_mock_read_value(self):
-        self.finish -= 1
-        if self.finish == 0:
-            return 236
-        return 206
-
-    def do_mock_write(self, packet):
-        ps = ""
-        for p in packet:
-            ps += chr(p)
-        if "F" in ps:
-            self.finish = 10
-        print(ps, " ", packet)
+        if self.verbose:
+            ps = ""
+            for p in packet:
+                ps += chr(p)
+            print(ps, " ", packet)
+        SimulatedUsb.write(self, packet)
 
 
 if __name__ == "__main__":
-    connection = MockUsb()
+    connection = MockUsb(verbose=True)
     connection.initialize()
     connection.write([160])
     connection.write([166, 0, 73, 80, 80, 70, 70, 70,
@@ -65,3 +63,5 @@ if __name__ == "__main__":
                      70, 70, 70, 70, 70, 70, 70, 70,
                      70, 70, 70, 70, 70, 70, 70, 70,
                      166, 228])
+    connection.write([160])
+    print(connection.read())
@@ -29,41 +29,42 @@ try:
 except:
     from .MockUsb import MockUsb as Usb
 
+from .Backoff import Backoff
 from .Connection import Connection
+from .OneWireCrc import onewire_crc_lookup
 
-crc_table = [
-    0x00, 0x5E, 0xBC, 0xE2, 0x61, 0x3F, 0xDD, 0x83,
-    0xC2, 0x9C, 0x7E, 0x20, 0xA3, 0xFD, 0x1F, 0x41,
-    0x00, 0x9D, 0x23, 0xBE, 0x46, 0xDB, 0x65, 0xF8,
-    0x8C, 0x11, 0xAF, 0x32, 0xCA, 0x57, 0xE9, 0x74]
-
-
-def onewire_crc_lookup(line):
-    """
-    License: 2-clause "simplified" BSD license
-    Copyright (C) 1992-2017 Arjen Lentz
-    https://lentz.com.au/blog/calculating-crc-with-a-tiny-32-entry-lookup-table
-
-    :param line: line to be CRC'd
-    :return: 8 bit crc of line.
-    """
-    crc = 0
-    for i in range(2, 32):
-        crc = line[i] ^ crc
-        crc = crc_table[crc & 0x0f] ^ crc_table[16 + ((crc >> 4) & 0x0f)]
-    return crc
+packet_padding = [b'F' * (30 - i) for i in range(31)]
 
 
 class NanoConnection(Connection):
-    def __init__(self, usb=None):
+    def __init__(self, usb=None, window=None, backoff=None, stats=None):
+        """
+        :param usb: usb device to use, NanoUsb if not given.
+        :param window: optional pipelined mode, sends up to window packets back to back between status polls.
+        Experimental, it is untested on hardware. The window is capped at MAX_WINDOW.
+        :param backoff: polling strategy while the device is busy or working, Backoff() if not given.
+        :param stats: optional TransportStats to record the transport into.
+        """
         Connection.__init__(self)
         self.usb = usb
+        self.window = window
+        self.stats = stats
+        self.window_start = 0.0
+        self.backoff = backoff
+        if self.backoff is None:
+            self.backoff = Backoff()
+        self.unacknowledged = []
+        self.ready = False
         self.PACKET_SIZE = 30
-        self.buffer = b''
+        self.buffer = bytearray()
         self.position = 0
+        self.frame = bytearray([166, 0]) + bytearray(packet_padding[0]) + bytearray([166, 0])
 
         self.MAX_ERRORS = 10
         self.MAX_TIMEOUTS = 10
+        self.MAX_WINDOW = 16  # packets, the input buffer depth assumed for the board.
+        if self.window is not None and self.window > self.MAX_WINDOW:
+            self.window = self.MAX_WINDOW
 
         self.HELLO = [160]
 
@@ -90,20 +91,19 @@ class NanoConnection(Connection):
         :param data:
         :return:
         """
-        size = self.PACKET_SIZE
-        if data is None:
-            data = self.buffer
-        else:
-            if isinstance(data, str):
+        if data is not None:
+            if isinstance(data, str) and not isinstance(data, bytes):  # python 3 str.
                 data = data.encode("utf-8")
-            data = self.buffer + data
-        chunks = [data[i:i + size] for i in range(0, len(data), size)]
-        for chunk in chunks[:-1]:
-            self.send_valid_packet(chunk)
-        self.buffer = chunks[-1]
-        if len(self.buffer) == self.PACKET_SIZE:
-            self.send_valid_packet(self.buffer)
-            self.buffer = b''
+            self.buffer += data
+        buffer = self.buffer
+        size = self.PACKET_SIZE
+        length = len(buffer)
+        if length < size:
+            return
+        end = length - (length % size)
+        for i in range(0, end, size):
+            self.send_valid_packet(buffer[i:i + size])
+        del buffer[:end]
 
     def flush(self):
         """
@@ -111,14 +111,20 @@ class NanoConnection(Connection):
         :param data:
         :return:
         """
-        if len(self.buffer) == 0:
-            return
-        data = self.buffer
-        size = self.PACKET_SIZE
-        chunks = [data[i:i + size] for i in range(0, len(data), size)]
-        for chunk in chunks:
-            self.send_valid_packet(chunk)
-        self.buffer = b''
+        self.send_buffer()
+        if len(self.unacknowledged) != 0:
+            self.acknowledge()
+
+    def send_buffer(self):
+        """
+        Sends all buffered data as packets, the final packet may be short.
+        :return:
+        """
+        self.write()
+        if len(self.buffer) != 0:
+            packet = self.buffer[:]
+            del self.buffer[:]
+            self.send_valid_packet(packet)
 
     def buffer(self, data):
         """
@@ -143,16 +149,22 @@ class NanoConnection(Connection):
         self.flush()
         self.usb.release_usb()
 
-    def make_valid_packet(self, packet):
-        p = [166] + [0] + ([ord('F')] * self.PACKET_SIZE) + [166] + [0]
-        for i in range(0, len(packet)):
-            v = packet[i]
-            if isinstance(v, str):  # if python_2
-                v = ord(v)
-            p[i + 2] = v
-        crc = onewire_crc_lookup(p)
-        p[33] = crc
-        return p
+    def make_valid_packet(self, packet, frame=None):
+        """
+        Frames the packet, padding with 'F' and setting the crc. The frame is a reused bytearray
+        which is overwritten by the next call, unless a frame to write into is given.
+
+        :param packet: 0-30 bytes of payload.
+        :param frame: optional 34 byte bytearray to frame the packet into.
+        :return: 34 byte framed packet.
+        """
+        if frame is None:
+            frame = self.frame
+        length = len(packet)
+        frame[2:2 + length] = packet
+        frame[2 + length:32] = packet_padding[length]
+        frame[33] = onewire_crc_lookup(frame)
+        return frame
 
     def send_valid_packet(self, packet):
         """
@@ -160,8 +172,17 @@ class NanoConnection(Connection):
         :param packet: packet to be validated and sent.
         :return:
         """
-        if isinstance(packet, str):
-            packet = list(packet)
+        if not isinstance(packet, (bytes, bytearray, memoryview)):
+            if isinstance(packet, str):  # python 3 str.
+                packet = packet.encode("utf-8")
+            else:
+                packet = bytearray(packet)
+        if self.stats is not None:
+            self.stats.frame(len(packet))
+        if self.window:
+            # Unacknowledged packets are kept for resending, so each needs its own frame.
+            self.send_pipelined_packet(self.make_valid_packet(packet, bytearray(self.frame)))
+            return
         valid_packet = self.make_valid_packet(packet)
         self.send_packet(valid_packet)
 
@@ -181,43 +202,162 @@ class NanoConnection(Connection):
         :param packet: 0-30 bytes as int list.
         :return:
         """
+        for delay in self.send_packet_waits(packet):
+            time.sleep(delay)
+
+    def send_packet_waits(self, packet):
+        """
+        Attempts to send packet as send_packet does, yielding the delay to wait whenever the device is busy
+        rather than waiting, so the caller chooses how to wait.
+
+        :param packet: 0-30 bytes as int list.
+        :return: generator of the delays in seconds.
+        """
+        stats = self.stats
+        if stats is not None:
+            start = time.time()
         timeout_count = 0
         error_count = 0
         buffer_count = 0
+        delays = self.backoff.delays()
         while True:
             response = self.send_hello()
             if response == self.RESPONSE_OK or response == self.RESPONSE_CRC_ERROR:
                 pass  # Ready to send packet.
             elif response == self.RESPONSE_BUSY or response == self.RESPONSE_POWER:
                 buffer_count += 1
-                time.sleep(0.1)  # Wait 0.1 seconds and try again.
+                yield next(delays)  # Wait and try again.
                 continue  # Cannot send packet.
             try:
                 self.usb.write(packet)
             except IOError:
                 timeout_count += 1
+                if stats is not None:
+                    stats.timeout()
                 if timeout_count >= self.MAX_TIMEOUTS:
                     raise Exception
+                continue  # must resend.
 
             response = self.send_hello()
             if response == self.RESPONSE_CRC_ERROR:
                 error_count += 1
-                if error_count < self.MAX_ERRORS:
+                if stats is not None:
+                    stats.resend()
+                if error_count >= self.MAX_ERRORS:
                     raise IOError
                 continue  # must resend.
             break
+        if stats is not None:
+            stats.packet(time.time() - start)
 
-    def wait(self):
+    def send_pipelined_packet(self, packet):
+        """
+        Sends the packet without a status poll, polling only once window packets are unacknowledged.
+
+        Experimental, none of this has been verified on hardware. It requires the device to discard all
+        the packets sent since the last status poll when it reports a CRC error, so the whole
+        unacknowledged window can be resent, were the good packets kept they would be sent twice. It also
+        requires the device to have room for the window whenever it does not report BUSY.
+
+        :param packet: 34 byte framed packet, kept until acknowledged.
+        :return:
+        """
+        if len(self.unacknowledged) == 0:
+            if not self.ready:
+                self.acknowledge()
+            if self.stats is not None:
+                self.window_start = time.time()
+        self.unacknowledged.append(packet)
+        self.write_packet(packet)
+        if len(self.unacknowledged) >= self.window:
+            self.acknowledge()
+
+    def acknowledge(self):
+        """
+        Polls the status for the unacknowledged packets, resending them all on CRC error and
+        waiting while the device is busy. On return the device is ready for the next window.
+
+        Only OK, BUSY, POWER and TASK_COMPLETE acknowledge the packets. If the status cannot be read at all, whether the
+        device accepted the packets is unknown, neither dropping nor resending them is safe, so IOError is raised.
+
+        The latency recorded for each packet of the window is measured from the first write of the window.
+        """
+        stats = self.stats
+        error_count = 0
+        delays = self.backoff.delays()
+        while True:
+            response = self.send_hello()
+            if response is None:
+                raise IOError("No status response from the device.")
+            if len(self.unacknowledged) != 0:
+                if response == self.RESPONSE_CRC_ERROR:
+                    error_count += 1
+                    if error_count >= self.MAX_ERRORS:
+                        raise IOError
+                    for packet in self.unacknowledged:
+                        if stats is not None:
+                            stats.resend()
+                        self.write_packet(packet)  # must resend the window.
+                    continue
+                if response != self.RESPONSE_OK and response != self.RESPONSE_BUSY \
+                        and response != self.RESPONSE_POWER and response != self.RESPONSE_TASK_COMPLETE:
+                    error_count += 1
+                    if error_count >= self.MAX_ERRORS:
+                        raise IOError
+                    continue  # Not an acknowledgement, poll again.
+                if stats is not None:
+                    latency = time.time() - self.window_start
+                    for packet in self.unacknowledged:
+                        stats.packet(latency)
+                self.unacknowledged = []
+            if response == self.RESPONSE_BUSY or response == self.RESPONSE_POWER:
+                self.ready = False
+                time.sleep(next(delays))  # Wait and try again.
+                continue
+            break
+        self.ready = True
+
+    def write_packet(self, packet):
+        """
+        Writes the packet to the USB, retrying on timeout.
+
+        :param packet: 34 byte framed packet.
+        :return:
+        """
+        timeout_count = 0
+        while True:
+            try:
+                self.usb.write(packet)
+                return
+            except IOError:
+                timeout_count += 1
+                if self.stats is not None:
+                    self.stats.timeout()
+                if timeout_count >= self.MAX_TIMEOUTS:
+                    raise Exception
+
+    def wait(self, estimate=None):
         """
         Waits for task complete.
+
+        :param estimate: optional time.time() at which the task is estimated to complete. No polling is done
+        before then, after it the polling starts tight and backs off.
         """
+        if len(self.unacknowledged) != 0:
+            self.acknowledge()
+        self.ready = False
+        if estimate is not None:
+            remaining = estimate - time.time()
+            if remaining > 0:
+                time.sleep(remaining)
         timeout_count = 0
+        delays = self.backoff.delays()
         while True:
             response = self.send_hello()
             if response == self.RESPONSE_TASK_COMPLETE:
                 break
             timeout_count += 1
-            time.sleep(0.1)
+            time.sleep(next(delays))
 
     def send_hello(self):
         """
@@ -230,9 +370,21 @@ class NanoConnection(Connection):
                 self.usb.write(self.HELLO)
             except IOError:
                 timeout_count += 1
+                if self.stats is not None:
+                    self.stats.timeout()
                 if timeout_count >= self.MAX_TIMEOUTS:
+                    if self.stats is not None:
+                        self.stats.status(None)
                     return None
-            return self.read_response()
+                continue
+            response = self.read_response()
+            if response is None:
+                timeout_count += 1
+                if timeout_count < self.MAX_TIMEOUTS:
+                    continue  # Status was lost, ask again.
+            if self.stats is not None:
+                self.stats.status(response)
+            return response
 
     def read_response(self):
         """
@@ -252,4 +404,6 @@ class NanoConnection(Connection):
                     return response
                 return response
             except IOError:
+                if self.stats is not None:
+                    self.stats.timeout()
                 return None
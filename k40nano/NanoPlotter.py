@@ -2,9 +2,13 @@
 
 # MIT license
 
+import time
+from itertools import groupby
+
 from .LaserSpeed import LaserSpeed
 from .NanoConnection import NanoConnection
 from .Plotter import Plotter
+from .PngRaster import PngRaster
 
 DEFAULT_SPEED = 75.0
 COMMAND_RIGHT = b'B'
@@ -29,24 +33,158 @@ distance_lookup = [
 ]
 
 
+DISTANCE_TABLE_SIZE = 16384  # Covers moves of over 16 inches.
+
+distance_table = [
+    b'z' * (v // 255) + (b'%03d' % (v % 255) if v % 255 >= 52 else distance_lookup[v % 255])
+    for v in range(DISTANCE_TABLE_SIZE)
+]
+
+
 def nano_distance(v):
-    dist = b''
-    if v >= 255:
-        zs = int(v / 255)
-        v %= 255
-        dist += (b'z' * zs)
-    if v >= 52:
-        return dist + b'%03d' % v
-    return dist + distance_lookup[v]
+    if v < DISTANCE_TABLE_SIZE:
+        return distance_table[v]
+    zs, v = divmod(v, 255)
+    return b'z' * zs + distance_table[v]
+
+
+def nano_distances(values):
+    """
+    Encodes a sequence of distances.
+
+    :param values: sequence of non-negative distances.
+    :return: concatenated encoding of the distances.
+    """
+    if not isinstance(values, (list, tuple)):
+        values = list(values)
+    try:
+        return b''.join([distance_table[v] for v in values])
+    except IndexError:  # Beyond the table.
+        return b''.join([nano_distance(v) for v in values])
+
+
+def is_black(sample):
+    """
+    Lists of 2 or 4 channel samples are greyscale or RGB with alpha, the alpha sample is not a colour and
+    transparent samples are not black. An indexed sample is taken as black at index 0, whatever colour
+    the palette gives index 0.
+
+    :param sample: greyscale or indexed sample, or list of channel samples.
+    :return: whether the sample is black (0).
+    """
+    if isinstance(sample, list):
+        if len(sample) == 2 or len(sample) == 4:
+            return sample[-1] != 0 and not any(sample[:-1])
+        return not any(sample)
+    return sample == 0
+
+
+def burn_runs(row, burn, pixel_width):
+    """
+    :param row: samples of the row.
+    :param burn: function of a sample returning whether to burn it.
+    :param pixel_width: steps per pixel.
+    :return: list of (start, end) steps of the burned runs of the row, and the length of the row in steps.
+    """
+    runs = []
+    position = 0
+    for on, samples in groupby(row, burn):
+        end = position + sum(1 for sample in samples) * pixel_width
+        if on:
+            runs.append((position, end))
+        position = end
+    return runs, position
+
+
+def line_run_lengths(major, minor):
+    """
+    Run lengths of Bresenham's line draw algorithm, computed in closed form rather than per step.
+
+    After t steps the line has taken (2 * minor * t + major) // (2 * major) diagonal steps, so the
+    j-th diagonal step is step (2 * major * j + major + 2 * minor - 1) // (2 * minor) - 1 and the k-th
+    straight step is step (2 * major * k + major) // (2 * (major - minor)). Only the positions of the
+    rarer kind of step are computed, every run lies between two of them.
+
+    :param major: steps along the major axis.
+    :param minor: steps along the minor axis, minor <= major.
+    :return: yields (straight, diagonal) counts, a straight run followed by a diagonal run.
+    """
+    if minor == 0:
+        if major != 0:
+            yield major, 0
+        return
+    if minor == major:
+        yield 0, major
+        return
+    two_major = major << 1
+    straight = 0
+    diagonal = 0
+    position = 0
+    if minor <= major - minor:
+        two_minor = minor << 1
+        offset = major + two_minor - 1
+        for j in range(0, minor):
+            i = (two_major * j + offset) // two_minor - 1
+            if i != position and diagonal != 0:
+                yield straight, diagonal
+                straight = 0
+                diagonal = 0
+            straight += i - position
+            diagonal += 1
+            position = i + 1
+        yield straight, diagonal
+        if position != major:
+            yield major - position, 0
+    else:
+        two_straight = (major - minor) << 1
+        for k in range(0, major - minor):
+            i = (two_major * k + major) // two_straight
+            if i != position:
+                yield straight, i - position
+                straight = 0
+            straight += 1
+            position = i + 1
+        yield straight, major - position
+
+
+def line_runs(dx, dy):
+    """
+    Yields the straight and diagonal runs of Bresenham's line of dx, dy, in order, as the relative move of each run.
+    """
+    step_x = -1 if dx < 0 else 1
+    step_y = -1 if dy < 0 else 1
+    dx = abs(dx)
+    dy = abs(dy)
+    if dx > dy:
+        runs = line_run_lengths(dx, dy)
+        for straight, diagonal in runs:
+            if straight != 0:
+                yield straight * step_x, 0
+            if diagonal != 0:
+                yield diagonal * step_x, diagonal * step_y
+    else:
+        runs = line_run_lengths(dy, dx)
+        for straight, diagonal in runs:
+            if straight != 0:
+                yield 0, straight * step_y
+            if diagonal != 0:
+                yield diagonal * step_x, diagonal * step_y
 
 
 class NanoPlotter(Plotter):
 
-    def __init__(self, board=None, connection=None, usb=None):
+    def __init__(self, board=None, connection=None, usb=None, buffer_size=1024):
+        """
+        :param board: board the speed codes are generated for, a name or a BoardProfile.
+        :param connection: connection to write to, a NanoConnection over usb by default.
+        :param usb: usb of the default NanoConnection.
+        :param buffer_size: bytes encoded before they are written to the connection.
+        """
         Plotter.__init__(self)
         self.board = board
         if self.board is None:
             self.board = "M2"
+        self.profile = LaserSpeed.get_board(self.board)  # resolved once, rather than on every conversion.
         self.connection = connection
         self.usb = usb
         self.state = STATE_DEFAULT
@@ -65,6 +203,13 @@ class NanoPlotter(Plotter):
         self.previous_set_speed_code = None
         self.previous_set_speed = None
 
+        self.step_time = 0.0
+        self.job_start = None
+        self.job_time = 0.0
+
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+
     def open(self):
         if self.connection is None:
             self.connection = NanoConnection(usb=self.usb)
@@ -74,47 +219,73 @@ class NanoPlotter(Plotter):
 
     def close(self):
         if self.state == STATE_CONCAT:
-            self.connection.write(b'S1P')
+            self.write(b'S1P')
         if self.state == STATE_UNFINISHED:
             self.enter_compact_mode()
             self.exit_compact_mode_finish()
         elif self.state == STATE_COMPACT:
             self.exit_compact_mode_finish()
+        self.write_buffer()
         self.connection.flush()
         self.connection.close()
 
+    def write(self, data):
+        """
+        Buffers encoded data, writing it to the connection once buffer_size bytes are buffered.
+        """
+        self.buffer += data
+        if len(self.buffer) >= self.buffer_size:
+            self.write_buffer()
+
+    def send(self, data):
+        """
+        Writes the buffered data and data to the connection, and flushes it.
+        """
+        self.buffer += data
+        self.write_buffer()
+        self.connection.flush()
+
+    def write_buffer(self):
+        """
+        Writes the buffered data to the connection. Called at every mode boundary.
+        """
+        if len(self.buffer) != 0:
+            self.connection.write(bytes(self.buffer))
+            del self.buffer[:]
+
     def move(self, dx, dy):
         if dx == 0 and dy == 0:
             return
         if self.state == STATE_DEFAULT:
-            self.connection.write(b'I')
+            self.write(b'I')
             if dx != 0:
                 self.move_x(dx)
             if dy != 0:
                 self.move_y(dy)
-            self.connection.send(b'S1P')
+            self.send(b'S1P')
         elif self.state == STATE_COMPACT:
+            self.job_time += max(abs(dx), abs(dy)) * self.step_time
             self.move_line(dx, dy)
         elif self.state == STATE_CONCAT or self.state == STATE_UNFINISHED:
             if dx != 0:
                 self.move_x(dx)
             if dy != 0:
                 self.move_y(dy)
-            self.connection.write(b'N')
+            self.write(b'N')
         self.check_bounds()
 
     def down(self):
         if self.is_on:
             return False
         if self.state == STATE_DEFAULT:
-            self.connection.write(b'I')
-            self.connection.write(COMMAND_ON)
-            self.connection.send(b'S1P')
+            self.write(b'I')
+            self.write(COMMAND_ON)
+            self.send(b'S1P')
         elif self.state == STATE_COMPACT:
-            self.connection.write(COMMAND_ON)
+            self.write(COMMAND_ON)
         elif self.state == STATE_CONCAT or self.state == STATE_UNFINISHED:
-            self.connection.write(COMMAND_ON)
-            self.connection.write(b'N')
+            self.write(COMMAND_ON)
+            self.write(b'N')
         self.is_on = True
         return True
 
@@ -122,14 +293,14 @@ class NanoPlotter(Plotter):
         if not self.is_on:
             return False
         if self.state == STATE_DEFAULT:
-            self.connection.write(b'I')
-            self.connection.write(COMMAND_OFF)
-            self.connection.send(b'S1P')
+            self.write(b'I')
+            self.write(COMMAND_OFF)
+            self.send(b'S1P')
         elif self.state == STATE_COMPACT:
-            self.connection.write(COMMAND_OFF)
+            self.write(COMMAND_OFF)
         elif self.state == STATE_CONCAT or self.state == STATE_UNFINISHED:
-            self.connection.write(COMMAND_OFF)
-            self.connection.write(b'N')
+            self.write(COMMAND_OFF)
+            self.write(b'N')
         self.is_on = False
         return True
 
@@ -137,7 +308,7 @@ class NanoPlotter(Plotter):
         if self.state == STATE_COMPACT:
             return
         if self.state == STATE_DEFAULT:
-            self.connection.write(b"I")
+            self.write(b"I")
         changing = (
                            self.is_speed and
                            speed is not None and
@@ -175,18 +346,21 @@ class NanoPlotter(Plotter):
                     speed = self.previous_set_speed
                 else:
                     speed = DEFAULT_SPEED
-                speed_code = LaserSpeed.get_code_from_speed(speed, raster_step, self.board)
+                speed_code = LaserSpeed.get_code_from_speed(speed, raster_step, self.profile)
             elif isinstance(speed, str):
                 speed_code = speed
             else:
-                speed_code = LaserSpeed.get_code_from_speed(speed, raster_step, self.board)
+                speed_code = LaserSpeed.get_code_from_speed(speed, raster_step, self.profile)
         if changing:
             # We can't perform this operation within concat. We must reset.
-            self.connection.write(b'S1E@NSE')  # Jump into compact mode and reset.
+            self.write(b'S1E@NSE')  # Jump into compact mode and reset.
             self.reset_modes()
         if not self.is_speed:
-            self.connection.write(speed_code)
-            self.connection.write(b'N')
+            if isinstance(speed_code, bytes):
+                self.write(speed_code)
+            else:
+                self.write(speed_code.encode("utf-8"))
+            self.write(b'N')
         self.set_speed_code = speed_code
         self.previous_set_speed_code = speed_code
         if speed is not None and isinstance(speed, (float, int)):
@@ -199,15 +373,25 @@ class NanoPlotter(Plotter):
         self.is_raster_step = 'G' in speed_code
         self.is_cut = 'C' in speed_code
 
+        mm_per_second = LaserSpeed.get_speed_from_code(speed_code, self.profile)
+        if mm_per_second > 0:
+            self.step_time = 0.0254 / mm_per_second  # seconds per 1 mil step.
+        if self.job_start is None:
+            self.job_start = time.time()
+
         self.declare_directions()
-        self.connection.write(b'S1E')
+        self.write(b'S1E')
         self.state = STATE_COMPACT
 
     def exit_compact_mode_finish(self):
         if self.state == STATE_COMPACT:
-            self.connection.write(b'FNSE')
+            self.write(b'FNSE')
+            self.write_buffer()
             self.connection.flush()
-            self.connection.wait()
+            # The device cannot finish before the job started plus its duration at the set speeds.
+            self.connection.wait(self.job_start + self.job_time)
+            self.job_start = None
+            self.job_time = 0.0
             self.reset_modes()
             self.state = STATE_DEFAULT
             return True
@@ -215,7 +399,8 @@ class NanoPlotter(Plotter):
 
     def exit_compact_mode_reset(self):
         if self.state == STATE_COMPACT:
-            self.connection.write(b'@NSE')
+            self.write(b'@NSE')
+            self.write_buffer()
             self.reset_modes()
             self.state = STATE_UNFINISHED
             return True
@@ -223,38 +408,39 @@ class NanoPlotter(Plotter):
 
     def exit_compact_mode_break(self):
         if self.state == STATE_COMPACT:
-            self.connection.write(b'N')
+            self.write(b'N')
+            self.write_buffer()
             self.state = STATE_UNFINISHED
             return True
         return False
 
     def enter_concat_mode(self):
         if self.state == STATE_DEFAULT:
-            self.connection.write(b"I")
+            self.write(b"I")
             self.state = STATE_CONCAT
             return True
         return False
 
     def h_switch(self):
         if self.is_left:
-            self.connection.write(COMMAND_RIGHT)
+            self.write(COMMAND_RIGHT)
         else:
-            self.connection.write(COMMAND_LEFT)
+            self.write(COMMAND_LEFT)
         self.is_left = not self.is_left
         return True
 
     def v_switch(self):
         if self.is_top:
-            self.connection.write(COMMAND_BOTTOM)
+            self.write(COMMAND_BOTTOM)
         else:
-            self.connection.write(COMMAND_TOP)
+            self.write(COMMAND_TOP)
         self.is_top = not self.is_top
         return True
 
     def home(self, abort=False):
         if not abort:
             self.exit_compact_mode_finish()
-        self.connection.send(b'IPP')
+        self.send(b'IPP')
         self.current_x = 0
         self.current_y = 0
         self.reset_modes()
@@ -263,19 +449,247 @@ class NanoPlotter(Plotter):
     def lock_rail(self, abort=False):
         if not abort:
             self.exit_compact_mode_finish()
-        self.connection.send(b'IS1P')
+        self.send(b'IS1P')
 
     def unlock_rail(self, abort=False):
         if not abort:
             self.exit_compact_mode_finish()
-        self.connection.send(b'IS2P')
+        self.send(b'IS2P')
 
     def abort(self):
-        self.connection.send(b'I')
+        self.send(b'I')
+        self.job_start = None
+        self.job_time = 0.0
+
+    def plot_polyline(self, points, laser_on=True):
+        """
+        Plots the path through points, moving to the first point with the laser off.
+
+        In compact mode, outside of raster mode, the whole path is encoded in a single pass and
+        written at once. The bytes are the same as moving to each point in turn.
+
+        :param points: sequence of absolute (x, y) positions.
+        :param laser_on: whether the laser is on along the path.
+        :return:
+        """
+        points = iter(points)
+        for x, y in points:
+            if x != self.current_x or y != self.current_y:
+                self.up()
+                self.move_abs(x, y)
+            break
+        else:
+            return
+        if laser_on:
+            self.down()
+        else:
+            self.up()
+        if self.state != STATE_COMPACT or self.is_raster_step:
+            for x, y in points:
+                self.move_abs(x, y)
+            return
+        data = bytearray()
+        is_left = self.is_left
+        is_top = self.is_top
+        current_x = self.current_x
+        current_y = self.current_y
+        min_x = self.min_x
+        min_y = self.min_y
+        max_x = self.max_x
+        max_y = self.max_y
+        steps = 0
+        for x, y in points:
+            x = int(x)
+            y = int(y)
+            dx = x - current_x
+            dy = y - current_y
+            if dx == 0 and dy == 0:
+                continue
+            steps += max(abs(dx), abs(dy))
+            for run_x, run_y in line_runs(dx, dy):
+                if run_x != 0 and run_y != 0:
+                    if run_x < 0 and not is_left:
+                        data += COMMAND_LEFT
+                        is_left = True
+                    elif run_x > 0 and is_left:
+                        data += COMMAND_RIGHT
+                        is_left = False
+                    if run_y < 0 and not is_top:
+                        data += COMMAND_TOP
+                        is_top = True
+                    elif run_y > 0 and is_top:
+                        data += COMMAND_BOTTOM
+                        is_top = False
+                    data += COMMAND_ANGLE
+                    data += nano_distance(abs(run_y))
+                elif run_x != 0:
+                    is_left = run_x < 0
+                    data += COMMAND_LEFT if is_left else COMMAND_RIGHT
+                    data += nano_distance(abs(run_x))
+                else:
+                    is_top = run_y < 0
+                    data += COMMAND_TOP if is_top else COMMAND_BOTTOM
+                    data += nano_distance(abs(run_y))
+            current_x = x
+            current_y = y
+            # Lines are monotonic, so the bounds only need to include the points.
+            if x < min_x:
+                min_x = x
+            elif x > max_x:
+                max_x = x
+            if y < min_y:
+                min_y = y
+            elif y > max_y:
+                max_y = y
+        self.is_left = is_left
+        self.is_top = is_top
+        self.current_x = current_x
+        self.current_y = current_y
+        self.min_x = min_x
+        self.min_y = min_y
+        self.max_x = max_x
+        self.max_y = max_y
+        self.job_time += steps * self.step_time
+        if len(data) != 0:
+            self.write(data)
+
+    def plot_polylines(self, paths, laser_on=True):
+        """
+        Plots each path in turn, see plot_polyline.
+
+        :param paths: sequence of paths, each a sequence of absolute (x, y) positions.
+        :param laser_on: whether the laser is on along the paths.
+        :return:
+        """
+        for points in paths:
+            self.plot_polyline(points, laser_on)
+
+    def raster(self, image, speed=None, raster_step=1, pixel_width=None, burn=None, overscan=0, reposition=4):
+        """
+        Engraves the image from the current position, downward and to the right.
+
+        Each row of the image is one raster line, rastered left to right then right to left in turn. The
+        direction switch between rows steps the head down by raster_step. Rows are read one at a time,
+        so the image can be an iterator of scanlines from PngRaster.png_scanlines() over a file.
+
+        Each row is only travelled from overscan before its first burn to overscan after its last burn,
+        and rows without burns are stepped through without travel. Where reposition or more rows are
+        blank, the head instead leaves compact mode and moves rapidly to whichever end of the next
+        burns is nearer, rastering that row from there.
+
+        The plotter is left in compact mode.
+
+        :param image: PngRaster, or iterable of rows of samples.
+        :param speed: speed in mm/s or speed code, as enter_compact_mode.
+        :param raster_step: steps between rows.
+        :param pixel_width: steps per pixel along a row, raster_step by default.
+        :param burn: function of a sample returning whether to burn it, black (0) samples by default. Transparent
+        samples are not burned, indexed samples are burned at index 0 whether or not the palette makes it black.
+        :param overscan: steps travelled beyond the burns of each row.
+        :param reposition: blank rows from which they are skipped by a rapid move.
+        :return: dict of the rows rastered and blank, the steps travelled at raster speed and rapidly, and the
+        raster travel saved compared to travelling every row in full.
+        """
+        if isinstance(image, PngRaster):
+            image = image.get_samples()
+        if burn is None:
+            burn = is_black
+        if pixel_width is None:
+            pixel_width = raster_step
+        origin_x = self.current_x
+        origin_y = self.current_y
+        stats = {"rows": 0, "blank_rows": 0, "travel": 0, "rapid": 0, "saved": 0}
+        row_index = None  # Row of the head, None before the first burn.
+        for index, row in enumerate(image):
+            runs, length = burn_runs(row, burn, pixel_width)
+            stats["saved"] += length
+            if len(runs) == 0:
+                stats["blank_rows"] += 1
+                continue
+            stats["rows"] += 1
+            start = runs[0][0] - overscan
+            end = runs[-1][1] + overscan
+            x = self.current_x - origin_x
+            if row_index is None or index - row_index >= reposition:
+                is_left = abs(x - end) < abs(x - start)
+                y = origin_y + index * raster_step
+                target = origin_x + (end if is_left else start)
+                stats["rapid"] += max(abs(target - self.current_x), abs(y - self.current_y))
+                self.raster_reposition(target, y, speed, raster_step, is_left)
+            else:
+                for i in range(index - row_index, 0, -1):
+                    if i == 1:
+                        # Travel far enough that the row after the last switch starts behind its burns.
+                        if self.is_left and x > start:
+                            stats["travel"] += self.raster_travel(start - x)
+                        elif not self.is_left and x < end:
+                            stats["travel"] += self.raster_travel(end - x)
+                    self.raster_switch()
+            row_index = index
+            if self.is_left:
+                edges = [(run_end, run_start) for run_start, run_end in reversed(runs)]
+                final = start
+            else:
+                edges = runs
+                final = end
+            for begin, finish in edges:
+                self.laser(False)
+                stats["travel"] += self.raster_travel(origin_x + begin - self.current_x)
+                self.laser(True)
+                stats["travel"] += self.raster_travel(origin_x + finish - self.current_x)
+            self.laser(False)
+            stats["travel"] += self.raster_travel(origin_x + final - self.current_x)
+        stats["saved"] -= stats["travel"]
+        return stats
 
     # Do not call anything below this point directly.
     # These assume machine states that may not be verified.
 
+    def laser(self, on):
+        """
+        Turns the laser on or off within compact mode.
+        """
+        if on != self.is_on:
+            self.write(COMMAND_ON if on else COMMAND_OFF)
+            self.is_on = on
+
+    def raster_reposition(self, x, y, speed, raster_step, is_left):
+        """
+        Moves rapidly to x, y and enters raster compact mode heading left or right.
+        """
+        if self.state == STATE_COMPACT:
+            self.exit_compact_mode_reset()
+        elif self.state == STATE_UNFINISHED and self.is_speed:
+            # A speed change resets the directions, so any reset is done before they are set.
+            self.enter_compact_mode(speed, raster_step)
+            self.exit_compact_mode_reset()
+        self.up()
+        self.move(x - self.current_x, y - self.current_y)
+        self.is_left = is_left
+        self.is_top = False
+        self.enter_compact_mode(speed, raster_step)
+
+    def raster_travel(self, dx):
+        """
+        Travels along the raster line.
+
+        :return: steps travelled.
+        """
+        if dx != 0:
+            self.move(dx, 0)
+        return abs(dx)
+
+    def raster_switch(self):
+        """
+        Switches the raster direction, stepping to the next row.
+        """
+        self.laser(False)
+        if self.is_left:
+            self.move_right()
+        else:
+            self.move_left()
+        self.check_bounds()
+
     def reset_modes(self):
         self.is_on = False
         self.is_left = False
@@ -311,18 +725,18 @@ class NanoPlotter(Plotter):
         self.current_x += dx
         self.current_y += dy
         self.check_bounds()
-        self.connection.write(COMMAND_ANGLE)
-        self.connection.write(nano_distance(abs(dy)))  # dx == dy
+        self.write(COMMAND_ANGLE)
+        self.write(nano_distance(abs(dy)))  # dx == dy
 
     def declare_directions(self):
         if self.is_top:
-            self.connection.write(COMMAND_TOP)
+            self.write(COMMAND_TOP)
         else:
-            self.connection.write(COMMAND_BOTTOM)
+            self.write(COMMAND_BOTTOM)
         if self.is_left:
-            self.connection.write(COMMAND_LEFT)
+            self.write(COMMAND_LEFT)
         else:
-            self.connection.write(COMMAND_RIGHT)
+            self.write(COMMAND_RIGHT)
 
     def move_right(self, dx=0):
         self.current_x += dx
@@ -334,9 +748,9 @@ class NanoPlotter(Plotter):
                 self.current_y += self.set_step
             self.is_on = False
         self.is_left = False
-        self.connection.write(COMMAND_RIGHT)
+        self.write(COMMAND_RIGHT)
         if dx != 0:
-            self.connection.write(nano_distance(abs(dx)))
+            self.write(nano_distance(abs(dx)))
             self.check_bounds()
 
     def move_left(self, dx=0):
@@ -349,9 +763,9 @@ class NanoPlotter(Plotter):
                 self.current_y += self.set_step
             self.is_on = False
         self.is_left = True
-        self.connection.write(COMMAND_LEFT)
+        self.write(COMMAND_LEFT)
         if dx != 0:
-            self.connection.write(nano_distance(abs(dx)))
+            self.write(nano_distance(abs(dx)))
             self.check_bounds()
 
     def move_bottom(self, dy=0):
@@ -364,9 +778,9 @@ class NanoPlotter(Plotter):
                 self.current_x += self.set_step
             self.is_on = False
         self.is_top = False
-        self.connection.write(COMMAND_BOTTOM)
+        self.write(COMMAND_BOTTOM)
         if dy != 0:
-            self.connection.write(nano_distance(abs(dy)))
+            self.write(nano_distance(abs(dy)))
             self.check_bounds()
 
     def move_top(self, dy=0):
@@ -379,75 +793,19 @@ class NanoPlotter(Plotter):
             else:
                 self.current_x += self.set_step
             self.is_on = False
-        self.connection.write(COMMAND_TOP)
+        self.write(COMMAND_TOP)
         if dy != 0:
-            self.connection.write(nano_distance(abs(dy)))
+            self.write(nano_distance(abs(dy)))
             self.check_bounds()
 
     def move_line(self, dx, dy):
         """
-        Implementation of Bresenham's line draw algorithm.
-        Checks for the changes between straight and diagonal parts calls the move functions during mode change.
+        Moves along the Bresenham line of dx, dy as its straight and diagonal runs.
         """
-        x0 = self.current_x
-        y0 = self.current_y
-        x1 = self.current_x + dx
-        y1 = self.current_y + dy
-        diagonal = 0
-        straight = 0
-        if dy < 0:
-            dy = -dy
-            step_y = -1
-        else:
-            step_y = 1
-        if dx < 0:
-            dx = -dx
-            step_x = -1
-        else:
-            step_x = 1
-        if dx > dy:
-            dy <<= 1  # dy is now 2*dy
-            dx <<= 1
-            fraction = dy - (dx >> 1)  # same as 2*dy - dx
-
-            while x0 != x1:
-                if fraction >= 0:
-                    y0 += step_y
-                    fraction -= dx  # same as fraction -= 2*dx
-                    if straight != 0:
-                        self.move_x(straight * step_x)
-                        straight = 0
-                    diagonal += 1
-                else:
-                    if diagonal != 0:
-                        self.move_angle(diagonal * step_x, diagonal * step_y)
-                        diagonal = 0
-                    straight += 1
-                x0 += step_x
-                fraction += dy  # same as fraction += 2*dy
-            if straight != 0:
-                self.move_x(straight * step_x)
-        else:
-            dy <<= 1  # dy is now 2*dy
-            dx <<= 1  # dx is now 2*dx
-            fraction = dx - (dy >> 1)
-
-            while y0 != y1:
-                if fraction >= 0:
-                    x0 += step_x
-                    fraction -= dy
-                    if straight != 0:
-                        self.move_y(straight * step_y)
-                        straight = 0
-                    diagonal += 1
-                else:
-                    if diagonal != 0:
-                        self.move_angle(diagonal * step_x, diagonal * step_y)
-                        diagonal = 0
-                    straight += 1
-                y0 += step_y
-                fraction += dx
-            if straight != 0:
-                self.move_y(straight * step_y)
-        if diagonal != 0:
-            self.move_angle(diagonal * step_x, diagonal * step_y)
+        for run_x, run_y in line_runs(dx, dy):
+            if run_x != 0 and run_y != 0:
+                self.move_angle(run_x, run_y)
+            elif run_x != 0:
+                self.move_x(run_x)
+            else:
+                self.move_y(run_y)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""
+Onewire crc used by the K40 packets.
+
+License: 2-clause "simplified" BSD license
+Copyright (C) 1992-2017 Arjen Lentz
+"""
+
+crc_table = [
+    0x00, 0x5E, 0xBC, 0xE2, 0x61, 0x3F, 0xDD, 0x83,
+    0xC2, 0x9C, 0x7E, 0x20, 0xA3, 0xFD, 0x1F, 0x41,
+    0x00, 0x9D, 0x23, 0xBE, 0x46, 0xDB, 0x65, 0xF8,
+    0x8C, 0x11, 0xAF, 0x32, 0xCA, 0x57, 0xE9, 0x74]
+
+
+crc_table_256 = [crc_table[i & 0x0f] ^ crc_table[16 + ((i >> 4) & 0x0f)] for i in range(256)]
+
+
+def onewire_crc_lookup(line):
+    """
+    License: 2-clause "simplified" BSD license
+    Copyright (C) 1992-2017 Arjen Lentz
+    https://lentz.com.au/blog/calculating-crc-with-a-tiny-32-entry-lookup-table
+
+    The two nibble lookups of the 32 entry table are folded into a single 256 entry table.
+
+    :param line: line to be CRC'd
+    :return: 8 bit crc of line.
+    """
+    table = crc_table_256
+    crc = 0
+    for i in range(2, 32):
+        crc = table[line[i] ^ crc]
+    return crc
+
+
+def onewire_crc_batch(data, size=30):
+    """
+    Calculates the onewire crc of every packet within data.
+
+    :param data: bytes of N * size payloads, a short final payload is padded with 'F' as packets are.
+    :param size: size of each payload.
+    :return: bytearray of N crcs, one per payload.
+    """
+    table = crc_table_256
+    data = bytearray(data)
+    if len(data) % size != 0:
+        data += b'F' * (size - len(data) % size)
+    crcs = bytearray()
+    for start in range(0, len(data), size):
+        crc = 0
+        for v in data[start:start + size]:
+            crc = table[v ^ crc]
+        crcs.append(crc)
+    return crcs
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+
+def distance(x0, y0, x1, y1):
+    """
+    Travel distance between two positions. The head moves both axes at once, so a move takes as long
+    as its longer axis.
+    """
+    return max(abs(x1 - x0), abs(y1 - y0))
+
+
+class PathOptimizer:
+    """
+    Orders paths to reduce the travel between them, the rapid moves with the laser off.
+
+    The order is built nearest neighbor first, with the endpoints held in a grid so each nearest path is
+    found by searching outwards from the current position. With reverse, a path may be cut from either
+    end, and the order is then improved by 2-opt: reversing a run of up to window consecutive paths
+    whenever that shortens the travel, for up to passes passes.
+
+    Distances are in steps and measured as the longer axis of the move.
+    """
+
+    def __init__(self, reverse=True, window=10, passes=4):
+        """
+        :param reverse: whether paths may be cut in reverse.
+        :param window: longest run of paths reversed by 2-opt.
+        :param passes: most 2-opt passes over the order.
+        """
+        self.reverse = reverse
+        self.window = window
+        self.passes = passes
+        self.before = None
+        self.after = None
+
+    def optimize(self, paths, start=(0, 0)):
+        """
+        Orders the paths, setting before and after to the travel of the given order and of the new order.
+
+        :param paths: list of paths, each a sequence of (x, y) positions.
+        :param start: position of the head before the first path.
+        :return: list of (index, reversed) giving each path in cut order, and whether it is cut in reverse.
+        """
+        endpoints = [(path[0][0], path[0][1], path[-1][0], path[-1][1]) for path in paths if len(path) != 0]
+        indexes = [i for i, path in enumerate(paths) if len(path) != 0]
+        order = self.nearest_neighbor(endpoints, start)
+        if self.reverse and self.window >= 1:
+            order = self.two_opt(endpoints, order, start)
+        self.before = self.travel(paths, None, start)
+        order = [(indexes[i], flip) for i, flip in order]
+        order.extend((i, False) for i, path in enumerate(paths) if len(path) == 0)
+        self.after = self.travel(paths, order, start)
+        return order
+
+    def ordered(self, paths, start=(0, 0)):
+        """
+        :param paths: list of paths, each a sequence of (x, y) positions.
+        :param start: position of the head before the first path.
+        :return: list of the paths in cut order, reversed as needed.
+        """
+        return [list(reversed(paths[i])) if flip else paths[i] for i, flip in self.optimize(paths, start)]
+
+    @staticmethod
+    def travel(paths, order=None, start=(0, 0)):
+        """
+        :param paths: list of paths, each a sequence of (x, y) positions.
+        :param order: list of (index, reversed), the given order by default.
+        :param start: position of the head before the first path.
+        :return: travel from start through the paths in order.
+        """
+        if order is None:
+            order = [(i, False) for i in range(len(paths))]
+        x, y = start
+        total = 0
+        for i, flip in order:
+            path = paths[i]
+            if len(path) == 0:
+                continue
+            first, last = (path[-1], path[0]) if flip else (path[0], path[-1])
+            total += distance(x, y, first[0], first[1])
+            x, y = last[0], last[1]
+        return total
+
+    def nearest_neighbor(self, endpoints, start):
+        """
+        :param endpoints: list of (start x, start y, end x, end y) of each path.
+        :param start: position of the head before the first path.
+        :return: list of (index, reversed) in nearest neighbor order.
+        """
+        remaining = len(endpoints)
+        used = [False] * remaining
+        order = []
+        x, y = start
+        grid, cell, bounds = self.build_grid(endpoints, range(remaining))
+        built = remaining
+        while remaining != 0:
+            if remaining * 4 < built:
+                # Sparse grids have too many empty cells to search, so the grid is rebuilt coarser.
+                grid, cell, bounds = self.build_grid(endpoints, [i for i in range(len(endpoints)) if not used[i]])
+                built = remaining
+            index, end = self.nearest(grid, cell, x, y, bounds)
+            used[index] = True
+            sx, sy, ex, ey = endpoints[index]
+            for entry in ((sx, sy, index, 0), (ex, ey, index, 1)):
+                key = (entry[0] // cell, entry[1] // cell)
+                entries = grid.get(key)
+                if entries is not None:
+                    entries.discard(entry)
+                    if len(entries) == 0:
+                        del grid[key]
+            if end == 1:
+                order.append((index, True))
+                x, y = sx, sy
+            else:
+                order.append((index, False))
+                x, y = ex, ey
+            remaining -= 1
+        return order
+
+    def build_grid(self, endpoints, indexes):
+        """
+        :return: dict of grid cell to set of (x, y, index, end) within it, the size of the cells, and the
+        bounds (min x, min y, max x, max y) of the cells.
+        """
+        indexes = list(indexes)
+        if len(indexes) == 0:
+            return {}, 1, (0, 0, 0, 0)
+        xs = [endpoints[i][0] for i in indexes] + [endpoints[i][2] for i in indexes]
+        ys = [endpoints[i][1] for i in indexes] + [endpoints[i][3] for i in indexes]
+        extent = max(max(xs) - min(xs), max(ys) - min(ys), 1)
+        cell = max(int(extent / (len(indexes) ** 0.5)), 1)  # about two endpoints per cell.
+        grid = {}
+        for i in indexes:
+            sx, sy, ex, ey = endpoints[i]
+            grid.setdefault((sx // cell, sy // cell), set()).add((sx, sy, i, 0))
+            if self.reverse:
+                grid.setdefault((ex // cell, ey // cell), set()).add((ex, ey, i, 1))
+        return grid, cell, (min(xs) // cell, min(ys) // cell, max(xs) // cell, max(ys) // cell)
+
+    @staticmethod
+    def nearest(grid, cell, x, y, bounds):
+        """
+        Searches the grid in rings of cells around x, y for the nearest endpoint. Only the cells within
+        bounds are searched, so a position far from the grid starts at the first ring reaching it.
+
+        :param bounds: (min x, min y, max x, max y) of the cells of the grid.
+        :return: index and end (0 start, 1 end) of the nearest endpoint.
+        """
+        cx = x // cell
+        cy = y // cell
+        # Distance from x, y to the nearest edge of its cell.
+        margin = min(x - cx * cell, (cx + 1) * cell - 1 - x, y - cy * cell, (cy + 1) * cell - 1 - y)
+        x0, y0, x1, y1 = bounds
+        ring = max(x0 - cx, cx - x1, y0 - cy, cy - y1, 0)  # nearer rings are outside the grid.
+        last = max(cx - x0, x1 - cx, cy - y0, y1 - cy)  # the ring reaching the far corner of the grid.
+        best = None
+        best_distance = None
+        while True:
+            if ring == 0:
+                cells = ((cx, cy),)
+            else:
+                columns = range(max(cx - ring, x0), min(cx + ring, x1) + 1)
+                rows = range(max(cy - ring + 1, y0), min(cy + ring - 1, y1) + 1)
+                cells = []
+                if y0 <= cy - ring <= y1:
+                    cells += [(i, cy - ring) for i in columns]
+                if y0 <= cy + ring <= y1:
+                    cells += [(i, cy + ring) for i in columns]
+                if x0 <= cx - ring <= x1:
+                    cells += [(cx - ring, j) for j in rows]
+                if x0 <= cx + ring <= x1:
+                    cells += [(cx + ring, j) for j in rows]
+            for key in cells:
+                entries = grid.get(key)
+                if entries is None:
+                    continue
+                for entry in entries:
+                    d = max(abs(entry[0] - x), abs(entry[1] - y))
+                    if best_distance is None or d < best_distance or (d == best_distance and entry < best):
+                        best = entry
+                        best_distance = d
+            # Anything beyond this ring is further than ring cells and the margin away.
+            if best is not None and (best_distance <= ring * cell + margin or ring >= last):
+                return best[2], best[3]
+            ring += 1
+
+    def two_opt(self, endpoints, order, start):
+        """
+        Reverses runs of up to window paths within the order whenever that reduces the travel.
+
+        :return: improved list of (index, reversed).
+        """
+        n = len(order)
+        if n < 2:
+            return order
+        # Position i + 1 holds the path cut i-th, position 0 is the start.
+        indexes = [None] + [i for i, flip in order]
+        flips = [False] + [flip for i, flip in order]
+        sx = [start[0]]
+        sy = [start[1]]
+        ex = [start[0]]
+        ey = [start[1]]
+        for i, flip in order:
+            x0, y0, x1, y1 = endpoints[i]
+            if flip:
+                x0, y0, x1, y1 = x1, y1, x0, y0
+            sx.append(x0)
+            sy.append(y0)
+            ex.append(x1)
+            ey.append(y1)
+        # gap[j] is the travel after position j.
+        gap = [max(abs(ex[j] - sx[j + 1]), abs(ey[j] - sy[j + 1])) for j in range(0, n)] + [0]
+        # Positions to search, after the first pass only those near a reversal are searched again.
+        active = [True] * n
+        window = self.window
+        for p in range(self.passes):
+            improved = False
+            for i in range(0, n):
+                if not active[i]:
+                    continue
+                active[i] = False
+                # Reversing positions i + 1 to j joins the end of i to the end of j, and the start of i + 1
+                # to the start of j + 1.
+                a_x = ex[i]
+                a_y = ey[i]
+                b_x = sx[i + 1]
+                b_y = sy[i + 1]
+                d_ab = gap[i]
+                for j in range(i + 1, min(i + window, n) + 1):
+                    c_x = ex[j]
+                    c_y = ey[j]
+                    d_ac = max(abs(a_x - c_x), abs(a_y - c_y))
+                    if j < n:
+                        d_bd = max(abs(b_x - sx[j + 1]), abs(b_y - sy[j + 1]))
+                    else:
+                        d_bd = 0
+                    if d_ac + d_bd < d_ab + gap[j]:
+                        k = j + 1
+                        sx[i + 1:k], ex[i + 1:k] = ex[j:i:-1], sx[j:i:-1]
+                        sy[i + 1:k], ey[i + 1:k] = ey[j:i:-1], sy[j:i:-1]
+                        indexes[i + 1:k] = indexes[j:i:-1]
+                        flips[i + 1:k] = [not flip for flip in flips[j:i:-1]]
+                        gap[i + 1:j] = gap[j - 1:i:-1]
+                        gap[i] = d_ac
+                        gap[j] = d_bd
+                        for q in range(max(i - window, 0), min(j + 1, n)):
+                            active[q] = True
+                        improved = True
+                        b_x = sx[i + 1]
+                        b_y = sy[i + 1]
+                        d_ab = d_ac
+            if not improved:
+                break
+        return list(zip(indexes[1:], flips[1:]))
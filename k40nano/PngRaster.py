@@ -4,6 +4,11 @@ import struct
 import zlib
 from math import ceil
 
+try:
+    import numpy
+except ImportError:
+    numpy = None  # rasters fall back to python scanlines.
+
 
 # MIT LICENSE
 
@@ -16,9 +21,21 @@ class PngRaster:
     generally permitted by PNG and basically nothing will read them. You should stick to the permitted values.
 
     http://www.libpng.org/pub/png/spec/1.2/PNG-Chunks.html
+
+    With numpy installed, the pixels are held in a 2-D numpy array, one value per pixel, and packed into
+    scanlines only to write the png. Pixels are then read and written directly, lines are drawn and the
+    raster is filled as arrays. Without numpy, or for pixels over 64 bits or not whole bytes above 8 bits,
+    each scanline is held as a bytearray. Pngs read with filtered scanlines are also held as bytearrays, keeping
+    their filter type bytes.
     """
 
-    def __init__(self, width=None, height=None, bit_depth=8, color_type=2):
+    def __init__(self, width=None, height=None, bit_depth=8, color_type=2, use_numpy=None):
+        """
+        :param use_numpy: whether the pixels are held in a numpy array, by default when it is installed.
+        """
+        self.use_numpy = use_numpy
+        self.is_array = False
+        self.palette = None
         if height is not None:
             self.width = width
             self.height = height
@@ -26,10 +43,33 @@ class PngRaster:
             self.color_type = color_type
             self.samples_per_pixel = self.get_sample_count(color_type)
             self.stride = self.get_stride(self.samples_per_pixel, self.bit_depth, self.width) + 1
-            self.palette = None
-            self.buf = []
-            for i in range(height):
-                self.buf.append(bytearray(b'\x00' * self.stride))
+            self.is_array = self.uses_array()
+            if self.is_array:
+                self.buf = numpy.zeros((height, width), dtype=self.get_pixel_dtype(self.pixel_length()))
+            else:
+                self.buf = []
+                for i in range(height):
+                    self.buf.append(bytearray(b'\x00' * self.stride))
+
+    def pixel_length(self):
+        return self.samples_per_pixel * self.bit_depth
+
+    def uses_array(self):
+        """
+        :return: whether the pixels of this format are held in a numpy array.
+        """
+        pixel_length_in_bits = self.pixel_length()
+        if pixel_length_in_bits > 64 or (pixel_length_in_bits > 8 and pixel_length_in_bits % 8 != 0):
+            return False
+        if self.use_numpy is None:
+            return numpy is not None
+        return self.use_numpy
+
+    @staticmethod
+    def get_pixel_dtype(pixel_length_in_bits):
+        for dtype in (numpy.uint8, numpy.uint16, numpy.uint32, numpy.uint64):
+            if pixel_length_in_bits <= numpy.dtype(dtype).itemsize * 8:
+                return dtype
 
     def index_color(self, index, value=None):
         byte_index_start = index * 3
@@ -56,8 +96,13 @@ class PngRaster:
         :param sample: sample value, this should be in the units of the png file.
         :return: the value of the sample in that location.
         """
-        scanline = self.buf[y]
         pixel_length_in_bits = self.samples_per_pixel * self.bit_depth
+        if self.is_array:
+            original = int(self.buf[y, x])
+            if sample is not None:
+                self.buf[y, x] = sample & ((1 << pixel_length_in_bits) - 1)
+            return original
+        scanline = self.buf[y]
         return self.scanline_sample(scanline, pixel_length_in_bits, x, sample)
 
     @staticmethod
@@ -108,10 +153,9 @@ class PngRaster:
             f.write(self.get_png_bytes())
 
     def get_png_bytes(self):
-        buf = self.buf
         width = self.width
         height = self.height
-        raw_data = b''.join(bytes(buf[i]) for i in range(0, height))
+        raw_data = self.get_raw_data()
 
         def png_pack(png_tag, data):
             chunk_head = png_tag + data
@@ -128,9 +172,74 @@ class PngRaster:
             png_pack(b'IDAT', zlib.compress(raw_data, 9)),
             png_pack(b'IEND', b'')])
 
+    def get_raw_data(self):
+        """
+        :return: the scanlines of the png, each led by its filter type byte.
+        """
+        if not self.is_array:
+            return b''.join(bytes(self.buf[i]) for i in range(0, self.height))
+        pixels = self.buf
+        height, width = pixels.shape
+        pixel_length_in_bits = self.pixel_length()
+        data = numpy.zeros((height, self.stride), dtype=numpy.uint8)
+        if pixel_length_in_bits % 8 == 0:
+            pixel_length_in_bytes = pixel_length_in_bits // 8
+            itemsize = pixels.dtype.itemsize
+            octets = pixels.astype('>u%d' % itemsize).view(numpy.uint8).reshape(height, width, itemsize)
+            data[:, 1:] = octets[:, :, itemsize - pixel_length_in_bytes:].reshape(height, -1)
+        else:
+            shifts = numpy.arange(pixel_length_in_bits - 1, -1, -1, dtype=pixels.dtype)
+            bits = ((pixels[:, :, None] >> shifts) & 1).astype(numpy.uint8)
+            data[:, 1:] = numpy.packbits(bits.reshape(height, -1), axis=1)
+        return data.tobytes()
+
+    def set_raw_data(self, png_data):
+        """
+        :param png_data: the scanlines of the png, each led by its filter type byte.
+        """
+        stride = self.stride
+        self.is_array = self.uses_array()
+        if self.is_array:
+            data = numpy.frombuffer(png_data, dtype=numpy.uint8)
+            data = data[:len(data) - len(data) % stride].reshape(-1, stride)
+            self.is_array = not data[:, 0].any()  # the array has no filter types to write back.
+        if not self.is_array:
+            self.buf = [
+                bytearray(png_data[line:line + stride])
+                for line in range(0, len(png_data), stride)
+            ]
+            return
+        width = self.width
+        pixel_length_in_bits = self.pixel_length()
+        dtype = self.get_pixel_dtype(pixel_length_in_bits)
+        data = data[:, 1:]
+        height = data.shape[0]
+        if pixel_length_in_bits % 8 == 0:
+            pixel_length_in_bytes = pixel_length_in_bits // 8
+            itemsize = numpy.dtype(dtype).itemsize
+            octets = numpy.zeros((height, width, itemsize), dtype=numpy.uint8)
+            octets[:, :, itemsize - pixel_length_in_bytes:] = data.reshape(height, width, pixel_length_in_bytes)
+            self.buf = octets.view('>u%d' % itemsize).reshape(height, width).astype(dtype)
+        else:
+            bits = numpy.unpackbits(data, axis=1)[:, :width * pixel_length_in_bits]
+            bits = bits.reshape(height, width, pixel_length_in_bits).astype(dtype)
+            weights = (1 << numpy.arange(pixel_length_in_bits - 1, -1, -1)).astype(dtype)
+            self.buf = (bits * weights).sum(axis=2, dtype=dtype)
+
     def get_samples(self):
-        for scanline in self.buf:
-            yield self.as_samples(self.bit_depth, self.get_sample_count(self.color_type), scanline)
+        sample_count = self.get_sample_count(self.color_type)
+        if not self.is_array:
+            for scanline in self.buf:
+                yield list(self.as_samples(self.bit_depth, sample_count, scanline, self.width))
+            return
+        if sample_count == 1:
+            for row in self.buf:
+                yield row.tolist()
+            return
+        bit_depth_mask = (1 << self.bit_depth) - 1
+        shifts = numpy.arange((sample_count - 1) * self.bit_depth, -1, -self.bit_depth, dtype=self.buf.dtype)
+        for row in self.buf:
+            yield ((row[:, None] >> shifts) & bit_depth_mask).tolist()
 
     @staticmethod
     def read_png_chunks(file):
@@ -150,11 +259,13 @@ class PngRaster:
                 break
 
     @staticmethod
-    def as_samples(bit_depth, sample_count, scanline):
+    def as_samples(bit_depth, sample_count, scanline, width=None):
         pixel_length_in_bits = bit_depth * sample_count
         bit_depth_mask = (1 << bit_depth) - 1
         mask_sample_bits = (1 << pixel_length_in_bits) - 1
         total_samples = int(((len(scanline) - 1) * 8) / pixel_length_in_bits)
+        if width is not None:
+            total_samples = min(total_samples, width)  # the padding bits of the scanline are not samples.
         for i in range(0, total_samples):
             start_pos_in_bits = (i * pixel_length_in_bits) + 8
             end_pos_in_bits = start_pos_in_bits + pixel_length_in_bits - 1
@@ -181,6 +292,7 @@ class PngRaster:
         decompress = zlib.decompressobj()
         buf = b''
         bit_depth = 0
+        width = None
         stride = 1
         sample_count = 1
         while True:
@@ -213,14 +325,14 @@ class PngRaster:
                     buf += decompress.decompress(file.read(read_amount))
                     length -= read_amount
                     while len(buf) >= stride:
-                        yield [x for x in PngRaster.as_samples(bit_depth, sample_count, buf[:stride])]
+                        yield [x for x in PngRaster.as_samples(bit_depth, sample_count, buf[:stride], width)]
                         buf = buf[stride:]
                 file.seek(4, 1)  # skip crc
                 continue
             if signature == 'IEND':
                 buf += decompress.flush()
                 while len(buf) >= stride:
-                    yield [x for x in PngRaster.as_samples(bit_depth, sample_count, buf[:stride])]
+                    yield [x for x in PngRaster.as_samples(bit_depth, sample_count, buf[:stride], width)]
                     buf = buf[stride:]
                 file.seek(4, 1)
                 return
@@ -242,7 +354,11 @@ class PngRaster:
                 self.width = struct.unpack(">I", data[0:4])[0]
                 self.height = struct.unpack(">I", data[4:8])[0]
                 self.bit_depth = data[8]
+                if isinstance(self.bit_depth, str):
+                    self.bit_depth = ord(self.bit_depth)
                 self.color_type = data[9]
+                if isinstance(self.color_type, str):
+                    self.color_type = ord(self.color_type)
             elif signature == 'PLTE':
                 self.palette = bytearray(data)
             elif signature == 'IDAT':
@@ -252,10 +368,7 @@ class PngRaster:
         png_data = zlib.decompress(zlib_data)
         self.samples_per_pixel = self.get_sample_count(self.color_type)
         self.stride = self.get_stride(self.samples_per_pixel, self.bit_depth, self.width) + 1
-        self.buf = [
-            bytearray(png_data[line:line + self.stride])
-            for line in range(0, len(png_data), self.stride)
-        ]
+        self.set_raw_data(png_data)
 
     def draw_line(self, x0, y0, x1, y1, color=0):
         """
@@ -268,6 +381,9 @@ class PngRaster:
         :param color: the color we are writing.
         :return:
         """
+        if self.is_array:
+            self.draw_line_array(x0, y0, x1, y1, color)
+            return
         dy = y1 - y0  # BRESENHAM LINE DRAW ALGORITHM
         dx = x1 - x0
         if dy < 0:
@@ -308,7 +424,35 @@ class PngRaster:
                 if y0 != y1:
                     self.plot(x0, y0, color)
 
+    def draw_line_array(self, x0, y0, x1, y1, color=0):
+        """
+        Draws the same line as draw_line(), with the points of the line computed as arrays.
+
+        Along the longer axis, the step i of the shorter axis is floor((2 * short * i + long) / (2 * long)),
+        which is where the Bresenham fraction takes the steps.
+        """
+        dx = abs(x1 - x0)
+        dy = abs(y1 - y0)
+        step_x = -1 if x1 < x0 else 1
+        step_y = -1 if y1 < y0 else 1
+        if dx > dy:
+            i = numpy.arange(dx)
+            xs = x0 + step_x * i
+            ys = y0 + step_y * ((2 * dy * i + dx) // (2 * dx))
+        elif dy != 0:
+            i = numpy.arange(dy)
+            xs = x0 + step_x * ((2 * dx * i + dy) // (2 * dy))
+            ys = y0 + step_y * i
+        else:
+            self.plot(x0, y0, color)
+            return
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.buf[ys[inside], xs[inside]] = color & ((1 << self.pixel_length()) - 1)
+
     def fill(self, color):
+        if self.is_array:
+            self.buf.fill(color & ((1 << self.pixel_length()) - 1))
+            return
         sample_count = self.get_sample_count(self.color_type)
         pixel_length_in_bits = self.bit_depth * sample_count
         scanline_length_in_bits = self.width * pixel_length_in_bits + 8
@@ -319,16 +463,20 @@ class PngRaster:
             color = color | (color << color_length_in_bits)
             color_length_in_bits *= 2
 
+        if len(self.buf) == 0:
+            return
+        filled = self.buf[0]
+        value_digits = scanline_remainder
+        bit_buffer = 0
+        for pos in range(scanline_length_in_bytes - 1, 0, -1):
+            while value_digits < 8:
+                bit_buffer |= (color << value_digits)
+                value_digits += color_length_in_bits
+            filled[pos] = bit_buffer & 0xff
+            bit_buffer >>= 8
+            value_digits -= 8
         for scanline in self.buf:
-            value_digits = scanline_remainder
-            bit_buffer = 0
-            for pos in range(scanline_length_in_bytes - 1, 0, -1):
-                while value_digits < 8:
-                    bit_buffer |= (color << value_digits)
-                    value_digits += color_length_in_bits
-                scanline[pos] = bit_buffer & 0xff
-                bit_buffer >>= 8
-                value_digits -= 8
+            scanline[1:] = filled[1:]  # Every scanline is filled alike.
 
     def plot(self, x, y, color):
         if 0 <= x < self.width and 0 <= y < self.height:
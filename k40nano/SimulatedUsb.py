@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+import random
+import time
+from collections import deque
+
+from .EgvParser import EgvParser
+from .JobEstimator import JobEstimator
+from .OneWireCrc import onewire_crc_lookup
+
+STATUS_OK = 206
+STATUS_BUSY = 238
+STATUS_CRC_ERROR = 207
+STATUS_TASK_COMPLETE = 236
+
+
+class SimulatedUsb:
+    """
+    Simulated K40 board, a usb which parses the LHYMICRO-GL it receives and models its execution time.
+
+    Packets are checked against their crc. Packets received since the previous HELLO are accepted by
+    that HELLO, unless any of them failed the crc in which case the status is CRC_ERROR and all of them
+    are discarded, or with discard_window False only those which failed. Accepted packets wait in an
+    input buffer of buffer_size packets and are executed in order. The status is BUSY while that buffer
+    is full, packets written while it is full are dropped and counted in dropped. The status is
+    TASK_COMPLETE once a finish ('F' in compact mode) has been executed.
+
+    How the board treats a CRC error and a full buffer is assumed, not known, the two discard modes let
+    the pipelined mode of NanoConnection be tested against either.
+
+    Execution time is estimated from the speed code of each compact mode section through LaserSpeed, with
+    the diagonal delay for angled moves and the raster step for each horizontal switch in raster mode.
+    Default mode moves run at rapid_speed. The simulated time runs time_scale times faster than the clock.
+
+    CRC errors and timeouts can be injected at a given rate, the injection is seeded so runs are repeatable.
+    All accepted payload bytes are kept in received.
+    """
+
+    def __init__(self, board="LASER-M2", buffer_size=16, time_scale=1.0, rapid_speed=100.0,
+                 crc_error_rate=0.0, timeout_rate=0.0, seed=0, clock=time.time, discard_window=True):
+        """
+        :param board: board the speed codes are interpreted for.
+        :param buffer_size: number of packets the input buffer holds.
+        :param time_scale: speed of simulated time relative to the clock.
+        :param rapid_speed: speed in mm/s of default mode moves.
+        :param crc_error_rate: probability of a packet failing the crc.
+        :param timeout_rate: probability of a usb write or read timing out.
+        :param seed: seed of the error injection.
+        :param clock: clock the simulated time follows.
+        :param discard_window: whether a crc error discards all the packets since the previous HELLO.
+        """
+        self.board = board
+        self.buffer_size = buffer_size
+        self.time_scale = time_scale
+        self.rapid_step_time = 0.0254 / rapid_speed
+        self.crc_error_rate = crc_error_rate
+        self.timeout_rate = timeout_rate
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.discard_window = discard_window
+        self.device = None
+
+        self.parser = EgvParser()
+        self.start_time = 0.0
+        self.staged = []
+        self.staged_failed = False
+        self.status = STATUS_OK
+        self.executing = deque()
+        self.last_finish = 0.0
+        self.finish_time = None
+        self.received = bytearray()
+        self.dropped = 0
+
+        self.compact = False
+        self.step_time = 0.0
+        self.diagonal_time = 0.0
+        self.raster_step = 0
+        self.is_left = False
+        self.is_top = False
+        self.is_on = False
+        self.x = 0
+        self.y = 0
+
+    def initialize(self):
+        self.device = self
+        self.start_time = self.clock()
+
+    def reset_usb(self):
+        pass
+
+    def release_usb(self):
+        self.device = None
+
+    def now(self):
+        """
+        :return: simulated seconds since the device was initialized.
+        """
+        return (self.clock() - self.start_time) * self.time_scale
+
+    def read(self):
+        if self.timeout_rate and self.random.random() < self.timeout_rate:
+            raise IOError("Simulated read timeout.")
+        return self.status
+
+    def write(self, packet):
+        if self.timeout_rate and self.random.random() < self.timeout_rate:
+            raise IOError("Simulated write timeout.")
+        if len(packet) == 1:
+            self.hello()
+            return
+        self.drain(self.now())
+        if len(self.executing) + len(self.staged) >= self.buffer_size:
+            self.dropped += 1  # No room in the input buffer.
+            return
+        packet = bytearray(packet)
+        if self.crc_error_rate and self.random.random() < self.crc_error_rate:
+            packet[33] ^= 0xFF
+        if len(packet) != 34 or packet[0] != 166 or onewire_crc_lookup(packet) != packet[33]:
+            self.staged_failed = True
+            if not self.discard_window:
+                return
+        self.staged.append(bytes(packet[2:32]))
+
+    def drain(self, now):
+        """
+        Removes the packets executed by now from the input buffer.
+        """
+        executing = self.executing
+        while len(executing) != 0 and executing[0] <= now:
+            executing.popleft()
+
+    def hello(self):
+        """
+        Accepts the staged packets, and sets the status reported by the next read.
+        """
+        now = self.now()
+        self.drain(now)
+        executing = self.executing
+        if len(self.staged) == 0 and not self.staged_failed and self.status == STATUS_CRC_ERROR:
+            return  # The error stands until the packets are resent.
+        if self.staged_failed and self.discard_window:
+            self.status = STATUS_CRC_ERROR
+        else:
+            if len(self.staged) != 0 and self.finish_time is not None and self.finish_time <= now:
+                self.finish_time = None  # Completed task is followed by new data.
+            for payload in self.staged:
+                self.received += payload
+                duration, finished = self.execute(self.parser.feed(payload))
+                self.last_finish = max(now, self.last_finish) + duration
+                executing.append(self.last_finish)
+                if finished:
+                    self.finish_time = self.last_finish
+            if self.staged_failed:
+                self.status = STATUS_CRC_ERROR
+            elif len(executing) >= self.buffer_size:
+                self.status = STATUS_BUSY
+            elif self.finish_time is not None and self.finish_time <= now:
+                self.status = STATUS_TASK_COMPLETE
+            else:
+                self.status = STATUS_OK
+        self.staged = []
+        self.staged_failed = False
+
+    def execute(self, tokens):
+        """
+        Executes the tokens on the simulated head.
+
+        :return: seconds the tokens take to execute, whether they finish the task.
+        """
+        duration = 0.0
+        finished = False
+        for command, value in tokens:
+            if command == 'B' or command == 'T':
+                is_left = command == 'T'
+                if self.compact and self.raster_step and is_left != self.is_left:
+                    self.y += -self.raster_step if self.is_top else self.raster_step
+                    duration += self.raster_step * self.step_time
+                self.is_left = is_left
+                self.x += -value if is_left else value
+                duration += value * (self.step_time if self.compact else self.rapid_step_time)
+            elif command == 'L' or command == 'R':
+                self.is_top = command == 'L'
+                self.y += -value if self.is_top else value
+                duration += value * (self.step_time if self.compact else self.rapid_step_time)
+            elif command == 'M':
+                self.x += -value if self.is_left else value
+                self.y += -value if self.is_top else value
+                duration += value * (self.diagonal_time if self.compact else self.rapid_step_time)
+            elif command == 'D':
+                self.is_on = True
+            elif command == 'U':
+                self.is_on = False
+            elif command == 'C':
+                self.set_speed_code(value)
+            elif command == 'S':
+                if value == '1E':
+                    self.compact = True
+            elif command == 'F':
+                if self.compact:
+                    self.compact = False
+                    self.is_on = False
+                    finished = True
+            elif command == '@':
+                self.compact = False
+                self.is_on = False
+            elif command == 'P':
+                duration += max(abs(self.x), abs(self.y)) * self.rapid_step_time
+                self.x = 0
+                self.y = 0
+        return duration, finished
+
+    def set_speed_code(self, speed_code):
+        self.step_time, self.diagonal_time, self.raster_step = JobEstimator.step_times(speed_code, self.board)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+from collections import OrderedDict
+
+
+class SpeedCache:
+    """
+    Bounded cache of speed code conversions.
+
+    The most recently used size conversions are kept, the least recently used being dropped first. Conversions
+    preloaded into the table are kept regardless and do not count toward the size.
+    """
+
+    def __init__(self, size=1024):
+        """
+        :param size: most conversions kept, besides those of the table.
+        """
+        self.size = size
+        self.table = {}
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """
+        :param key: tuple of the arguments of the conversion.
+        :param compute: function converting the arguments, called with them on a miss.
+        :return: the conversion of the arguments.
+        """
+        value = self.table.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        entries = self.entries
+        try:
+            value = entries.pop(key)
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            value = compute(*key)
+            while len(entries) >= self.size > 0:
+                entries.popitem(last=False)
+            if self.size <= 0:
+                return value
+        entries[key] = value
+        return value
+
+    def preload(self, key, value):
+        self.table[key] = value
+
+    def clear(self, table=False):
+        """
+        Drops the cached conversions and resets the stats.
+
+        :param table: whether the preloaded table is also dropped.
+        """
+        self.entries.clear()
+        if table:
+            self.table.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        :return: dict of the hits, misses, cached conversions and table conversions.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "table": len(self.table),
+        }
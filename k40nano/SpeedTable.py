@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+from bisect import bisect_left
+
+from .LaserSpeed import LaserSpeed, DEFAULT_D_RATIO
+
+
+class SpeedTable:
+    """
+    Table of the speeds a board can actually run, from slowest to fastest.
+
+    Speed codes hold whole values, so of any range of speeds only some can be set. The table lists each of
+    these once, in the gear its speed is coded with, so requested speeds, such as those of a material
+    library, snap to the nearest speed the board will run. Snapping is a binary search of the table.
+    """
+
+    def __init__(self, board="LASER-M2", raster_step=0, low=None, high=240.0, d_ratio=DEFAULT_D_RATIO):
+        """
+        :param board: Nano Board Model, or BoardProfile.
+        :param raster_step: raster step mode of the speeds.
+        :param low: slowest speed in mm/s, by default the slowest valid speed of the board.
+        :param high: fastest speed in mm/s.
+        :param d_ratio: M1, M2, B1, B2 have ratio of optional speed
+        """
+        self.board = LaserSpeed.get_board(board)
+        self.raster_step = raster_step
+        self.d_ratio = d_ratio
+        if low is None:
+            if raster_step != 0 and self.board.min_raster_speed is not None:
+                low = self.board.min_raster_speed
+            else:
+                low = self.board.min_speed or 0.1
+        achievable = LaserSpeed.get_achievable_values(low, high, raster_step, self.board)
+        self.speeds = [entry[0] for entry in achievable]
+        self.entries = [(entry[1], entry[2]) for entry in achievable]
+
+    def __len__(self):
+        return len(self.speeds)
+
+    def snap(self, mm_per_second):
+        """
+        Finds the speed of the table nearest a requested speed. Speeds beyond the table snap to its ends.
+
+        :param mm_per_second: requested speed.
+        :return: dict of the achieved "speed", its "code", "gear" and "value", and the relative "error".
+        """
+        if mm_per_second <= 0:
+            raise ValueError("Speed must be positive.")
+        speeds = self.speeds
+        if len(speeds) == 0:
+            raise ValueError("No speeds in table.")
+        i = bisect_left(speeds, mm_per_second)
+        if i == len(speeds) or (i > 0 and mm_per_second - speeds[i - 1] <= speeds[i] - mm_per_second):
+            i -= 1
+        value, gearing = self.entries[i]
+        return LaserSpeed.get_solution(value, gearing, mm_per_second, self.raster_step, self.board, self.d_ratio)
+
+    def snap_speed(self, mm_per_second):
+        """
+        :return: the speed of the table nearest the requested speed.
+        """
+        return self.snap(mm_per_second)["speed"]
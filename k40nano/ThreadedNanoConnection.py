@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+import threading
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue  # python 2
+
+from .NanoConnection import NanoConnection
+
+
+class ThreadedNanoConnection(NanoConnection):
+    """
+    NanoConnection which transmits on a dedicated thread.
+
+    Complete packets are framed and placed in a bounded queue which the transmit thread drains into
+    the USB, so the plotter encodes the next data while the current data is sent. Writing blocks
+    only while the queue is full. flush() and wait() are barriers, they return once every queued
+    packet has been sent. An error raised while transmitting fails the connection: the queued packets
+    are discarded, and the error is raised by every following write, flush or wait, as the device would
+    otherwise receive data with a gap in it. Closing and reopening the connection clears the failure.
+    """
+
+    def __init__(self, usb=None, window=None, queue_size=64, backoff=None, stats=None):
+        """
+        :param usb: usb device to use, NanoUsb if not given.
+        :param window: optional pipelined mode, sends up to window packets back to back between status polls.
+        :param queue_size: number of packets the queue holds before writing blocks.
+        :param backoff: polling strategy while the device is busy or working, Backoff() if not given.
+        :param stats: optional TransportStats to record the transport into.
+        """
+        NanoConnection.__init__(self, usb, window, backoff, stats)
+        self.queue = Queue(queue_size)
+        self.thread = None
+        self.error = None
+        self.raised = False
+
+    def open(self):
+        """
+        Connects to the USB device and starts the transmit thread.
+        Data left over from a failed connection is not sent.
+        """
+        NanoConnection.open(self)
+        self.error = None
+        self.raised = False
+        del self.buffer[:]
+        self.unacknowledged = []
+        self.ready = False
+        self.thread = threading.Thread(target=self.transmit, name="k40nano-transmit")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def close(self):
+        """
+        Sends all remaining data, stops the transmit thread and disconnects from the USB device.
+        A failed connection sends nothing more, its error is raised unless it already has been.
+        """
+        try:
+            if not self.raised:
+                self.flush()
+        finally:
+            if self.thread is not None:
+                self.queue.put(None)
+                self.thread.join()
+                self.thread = None
+            self.usb.release_usb()
+
+    def send_valid_packet(self, packet):
+        """
+        Queues the validated version of the packet for the transmit thread.
+        :param packet: packet to be validated and sent.
+        :return:
+        """
+        self.raise_error()
+        if isinstance(packet, str) and not isinstance(packet, bytes):  # python 3 str.
+            packet = packet.encode("utf-8")
+        if self.stats is not None:
+            self.stats.frame(len(packet))
+        self.queue.put(self.make_valid_packet(packet, bytearray(self.frame)))
+
+    def send_buffer(self):
+        """
+        Queues all buffered data, and blocks until the transmit thread has sent everything queued.
+        :return:
+        """
+        NanoConnection.send_buffer(self)
+        self.join()
+
+    def wait(self, estimate=None):
+        """
+        Blocks until everything queued is sent, then waits for task complete.
+        """
+        self.join()
+        NanoConnection.wait(self, estimate)
+
+    def join(self):
+        """
+        Blocks until the queue is empty and the transmit thread is idle.
+        """
+        self.queue.join()
+        self.raise_error()
+
+    def raise_error(self):
+        if self.error is not None:
+            self.raised = True
+            raise self.error
+
+    def transmit(self):
+        """
+        Transmit thread, sends queued packets until it receives None.
+        After an error the remaining queued packets are discarded.
+        """
+        while True:
+            packet = self.queue.get()
+            try:
+                if packet is None:
+                    return
+                if self.error is None:
+                    if self.window:
+                        self.send_pipelined_packet(packet)
+                    else:
+                        self.send_packet(packet)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+import struct
+import time
+
+TRACE_MAGIC = b'K40TRACE'
+TRACE_VERSION = 1
+
+RECORD_WRITE = 0  # data is the bytes written.
+RECORD_READ = 1  # data is the status byte read.
+RECORD_WRITE_ERROR = 2  # data is the bytes which failed to write.
+RECORD_READ_ERROR = 3  # no data.
+
+RECORD_HEADER = struct.Struct("<BI")  # record type, microseconds since the previous record.
+MAX_DELTA = 0xFFFFFFFF
+
+
+class TraceUsb:
+    """
+    Usb wrapper which records every packet written and status read to a compact binary trace.
+
+    The trace is the magic b'K40TRACE' and a version byte, followed by records. Reopening the connection
+    continues the same trace. Each record is a type byte
+    and the microseconds since the previous record as a 32 bit unsigned int. Writes are followed by the
+    length byte and the written bytes, reads by the status byte.
+
+    with NanoConnection(usb=TraceUsb(NanoUsb(), "job.k40trace")) as connection:
+        ...
+    """
+
+    def __init__(self, usb, trace):
+        """
+        :param usb: usb being recorded.
+        :param trace: filename or binary file-like object the trace is written to.
+        """
+        self.usb = usb
+        self.trace = trace
+        self.filename = None if hasattr(trace, "write") else trace
+        self.owns_trace = False
+        self.last_time = None
+
+    def initialize(self):
+        if self.filename is not None and not self.owns_trace:
+            self.trace = open(self.filename, "wb" if self.last_time is None else "ab")
+            self.owns_trace = True
+        if self.last_time is None:
+            self.trace.write(TRACE_MAGIC + struct.pack("<B", TRACE_VERSION))
+            self.last_time = time.time()
+        self.usb.initialize()
+
+    def reset_usb(self):
+        self.usb.reset_usb()
+
+    def release_usb(self):
+        self.usb.release_usb()
+        self.trace.flush()
+        if self.owns_trace:
+            self.trace.close()
+            self.owns_trace = False
+
+    def record(self, record_type, data=b''):
+        now = time.time()
+        delta = min(int((now - self.last_time) * 1000000), MAX_DELTA)
+        self.last_time = now
+        self.trace.write(RECORD_HEADER.pack(record_type, delta) + data)
+
+    def read(self):
+        try:
+            response = self.usb.read()
+        except IOError:
+            self.record(RECORD_READ_ERROR)
+            raise
+        self.record(RECORD_READ, struct.pack("<B", response & 0xFF))
+        return response
+
+    def write(self, packet):
+        data = bytes(bytearray(packet))
+        data = struct.pack("<B", len(data)) + data
+        try:
+            self.usb.write(packet)
+        except IOError:
+            self.record(RECORD_WRITE_ERROR, data)
+            raise
+        self.record(RECORD_WRITE, data)
+
+
+def read_trace(trace):
+    """
+    Reads the records of a trace.
+
+    :param trace: filename or binary file-like object of the trace.
+    :return: generator of (seconds since trace start, record type, data) tuples.
+    """
+    if not hasattr(trace, "read"):
+        with open(trace, "rb") as f:
+            for record in read_trace(f):
+                yield record
+        return
+    header = trace.read(len(TRACE_MAGIC) + 1)
+    if header[:len(TRACE_MAGIC)] != TRACE_MAGIC:
+        raise ValueError("Not a k40nano trace.")
+    seconds = 0.0
+    size = RECORD_HEADER.size
+    while True:
+        record = trace.read(size)
+        if len(record) < size:
+            return
+        record_type, delta = RECORD_HEADER.unpack(record)
+        seconds += delta / 1000000.0
+        if record_type == RECORD_WRITE or record_type == RECORD_WRITE_ERROR:
+            length = bytearray(trace.read(1))[0]
+            data = trace.read(length)
+        elif record_type == RECORD_READ:
+            data = trace.read(1)
+        else:
+            data = b''
+        yield seconds, record_type, data
+
+
+def trace_packets(trace):
+    """
+    Recovers the payloads the device accepted, in order, from the trace. Packets written since the
+    previous status read are dropped when the device answers with a CRC error, since they are resent.
+
+    :param trace: filename or binary file-like object of the trace.
+    :return: generator of 30 byte payloads.
+    """
+    pending = []
+    for seconds, record_type, data in read_trace(trace):
+        if record_type == RECORD_WRITE:
+            if len(data) == 34:
+                pending.append(data[2:32])
+        elif record_type == RECORD_READ:
+            if bytearray(data)[0] == 207:  # CRC error
+                pending = []
+            else:
+                for payload in pending:
+                    yield payload
+                pending = []
+    for payload in pending:
+        yield payload
+
+
+def replay_trace(trace, connection):
+    """
+    Sends the packets of a trace through the connection as fast as the connection allows.
+
+    :param trace: filename or binary file-like object of the trace.
+    :param connection: open NanoConnection to replay into, typically over a MockUsb or simulated device.
+    :return: number of packets replayed, seconds taken.
+    """
+    start = time.time()
+    count = 0
+    for payload in trace_packets(trace):
+        connection.send_valid_packet(payload)
+        count += 1
+    connection.flush()
+    return count, time.time() - start
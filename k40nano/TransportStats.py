@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+# MIT License.
+
+RESPONSE_NAMES = {
+    206: "ok",
+    238: "busy",
+    207: "crc_error",
+    236: "task_complete",
+    239: "power",
+    None: "no_response",
+}
+
+
+class TransportStats:
+    """
+    Counters for the transport between a NanoConnection and the device.
+
+    A connection only records into its stats when it was given one, otherwise nothing is counted.
+    The optional callback is called as callback(event, value) for every recorded event, to export
+    the values into other metrics systems. The events are:
+
+    "packet", round trip latency in seconds of a packet acknowledged by the device.
+    "resend", 1 for each packet written again after a CRC error.
+    "status", status response to a HELLO, None if the device did not respond.
+    "timeout", 1 for each USB write or read that timed out.
+    "frame", payload length of each packet framed.
+
+    Latencies are binned in a histogram of powers of two microseconds, latency_histogram[i] counts
+    round trips shorter than 2**i microseconds but not shorter than 2**(i-1).
+    """
+
+    HISTOGRAM_SIZE = 32
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        self.packets = 0
+        self.resends = 0
+        self.hellos = 0
+        self.responses = {}
+        self.timeouts = 0
+        self.payload_bytes = 0
+        self.padding_bytes = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_histogram = [0] * self.HISTOGRAM_SIZE
+
+    def packet(self, latency):
+        self.packets += 1
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+        index = min(int(latency * 1000000).bit_length(), self.HISTOGRAM_SIZE - 1)
+        self.latency_histogram[index] += 1
+        if self.callback is not None:
+            self.callback("packet", latency)
+
+    def resend(self):
+        self.resends += 1
+        if self.callback is not None:
+            self.callback("resend", 1)
+
+    def status(self, response):
+        self.hellos += 1
+        self.responses[response] = self.responses.get(response, 0) + 1
+        if self.callback is not None:
+            self.callback("status", response)
+
+    def timeout(self):
+        self.timeouts += 1
+        if self.callback is not None:
+            self.callback("timeout", 1)
+
+    def frame(self, length):
+        self.payload_bytes += length
+        self.padding_bytes += 30 - length
+        if self.callback is not None:
+            self.callback("frame", length)
+
+    def count(self, response):
+        """
+        :param response: status response code.
+        :return: number of HELLOs answered with that response.
+        """
+        return self.responses.get(response, 0)
+
+    @property
+    def busy(self):
+        return self.count(238)
+
+    @property
+    def power(self):
+        return self.count(239)
+
+    @property
+    def crc_errors(self):
+        return self.count(207)
+
+    @property
+    def latency_mean(self):
+        if self.packets == 0:
+            return 0.0
+        return self.latency_total / self.packets
+
+    def as_dict(self):
+        """
+        :return: all the counters as a dict.
+        """
+        values = {
+            "packets": self.packets,
+            "resends": self.resends,
+            "hellos": self.hellos,
+            "timeouts": self.timeouts,
+            "payload_bytes": self.payload_bytes,
+            "padding_bytes": self.padding_bytes,
+            "latency_mean": self.latency_mean,
+            "latency_max": self.latency_max,
+            "latency_histogram": list(self.latency_histogram),
+        }
+        for response, name in RESPONSE_NAMES.items():
+            values[name] = self.count(response)
+        return values
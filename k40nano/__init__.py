@@ -1,14 +1,33 @@
 
 from .SvgPlotter import SvgPlotter
 from .PngPlotter import PngPlotter
+from .PngRaster import PngRaster
 from .NanoPlotter import NanoPlotter
+from .PathOptimizer import PathOptimizer
+from .CoalescePlotter import CoalescePlotter
 
 from .NanoConnection import NanoConnection
+from .ThreadedNanoConnection import ThreadedNanoConnection
 from .FileWriteConnection import FileWriteConnection
 from .PrintConnection import PrintConnection
+from .Backoff import Backoff
+from .TransportStats import TransportStats
 
 from .MockUsb import MockUsb
+from .SimulatedUsb import SimulatedUsb
+from .EgvParser import EgvParser
+from .EgvPlayer import EgvPlayer
+from .JobEstimator import JobEstimator
+from .TraceUsb import TraceUsb, read_trace, replay_trace
+
+try:
+    from .AsyncNanoConnection import AsyncNanoConnection
+    from .AsyncNanoPlotter import AsyncNanoPlotter
+except (ImportError, SyntaxError):
+    pass  # asyncio support requires python 3.5+
 
 from .LaserSpeed import LaserSpeed
+from .BoardProfile import BoardProfile
+from .SpeedTable import SpeedTable
 
 name = "k40nano"
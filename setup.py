@@ -9,6 +9,9 @@ setuptools.setup(
     install_requires=[
         "pyusb"
     ],
+    extras_require={
+        "numpy": ["numpy"]
+    },
     author="Scorch / Tatarize",
     author_email="tatarize@gmail.com",
     description="Low Level K40 Control",
@@ -0,0 +1,26 @@
+import asyncio
+
+from k40nano import AsyncNanoPlotter
+
+
+async def plot_async(usb):
+    """
+    Plots test_async_plotter_matches_plotter with an AsyncNanoPlotter. Kept out of the test module, as
+    async def is a syntax error before python 3.5.
+
+    :return: position of the plotter.
+    """
+    async with AsyncNanoPlotter(usb=usb) as plotter:
+        await plotter.enter_compact_mode(50)
+        await plotter.move(100, 20)
+        await plotter.down()
+        await plotter.move(-30, 70)
+        await plotter.up()
+        return plotter.current_x, plotter.current_y
+
+
+async def write_concurrently(connection, writes):
+    """
+    Writes each of writes to the connection from a task of its own, the tasks started in order.
+    """
+    await asyncio.gather(*[asyncio.ensure_future(connection.write(data)) for data in writes])
@@ -0,0 +1,119 @@
+import os
+import unittest
+
+try:
+    import asyncio
+    from k40nano import AsyncNanoConnection, AsyncNanoPlotter
+    from async_plotting import plot_async, write_concurrently
+except (ImportError, SyntaxError):
+    asyncio = None  # asyncio support requires python 3.5+
+
+from k40nano import *
+
+
+class AsyncRecordUsb:
+    """
+    Usb that records every payload, reports busy for the first few polls, and task complete after 'F'.
+    The first few packet writes time out.
+    """
+
+    def __init__(self, busy=0, timeouts=0):
+        self.busy = busy
+        self.timeouts = timeouts
+        self.received = bytearray()
+        self.finish = False
+
+    def initialize(self):
+        pass
+
+    def release_usb(self):
+        pass
+
+    def read(self):
+        if self.busy > 0:
+            self.busy -= 1
+            return 238
+        if self.finish:
+            return 236
+        return 206
+
+    def write(self, packet):
+        if len(packet) != 1:
+            if self.timeouts > 0:
+                self.timeouts -= 1
+                raise IOError("Timeout.")
+            payload = bytes(packet[2:32])
+            if b'FNSE' in payload:
+                self.finish = True
+            self.received += payload
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@unittest.skipIf(asyncio is None, "asyncio requires python 3.5+")
+class TestAsync(unittest.TestCase):
+
+    def test_async_connection(self):
+        usb = AsyncRecordUsb(busy=2)
+        connection = AsyncNanoConnection(usb=usb)
+        run(connection.open())
+        for i in range(0, 100):
+            run(connection.write(b'BaN'))
+        run(connection.flush())
+        run(connection.close())
+        self.assertEqual(bytes(usb.received), b'BaN' * 100)
+
+    def test_async_write_timeout(self):
+        usb = AsyncRecordUsb(timeouts=2)
+        connection = AsyncNanoConnection(usb=usb)
+        run(connection.open())
+        run(connection.write(b'BaN' * 20))
+        run(connection.close())
+        self.assertEqual(bytes(usb.received), b'BaN' * 20)
+
+    def test_async_close_failed(self):
+        # The executor is shut down though the buffered data cannot be sent.
+        usb = AsyncRecordUsb(timeouts=100)
+        connection = AsyncNanoConnection(usb=usb)
+        run(connection.open())
+        run(connection.write(b'BaN'))
+        executor = connection.executor
+        with self.assertRaises(Exception):
+            run(connection.close())
+        self.assertIsNone(connection.executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(len, b'')
+
+    def test_async_concurrent_writes(self):
+        usb = AsyncRecordUsb(busy=3)
+        connection = AsyncNanoConnection(usb=usb)
+        run(connection.open())
+        run(write_concurrently(connection, [b'A' * 300, b'B' * 300, b'C' * 45]))
+        run(connection.close())
+        self.assertEqual(bytes(usb.received).rstrip(b'F'), b'A' * 300 + b'B' * 300 + b'C' * 45)
+
+    def test_async_plotter_matches_plotter(self):
+        def plot(p):
+            p.enter_compact_mode(50)
+            p.move(100, 20)
+            p.down()
+            p.move(-30, 70)
+            p.up()
+
+        filename = "test.egv"
+        with NanoPlotter(connection=FileWriteConnection(filename)) as plotter:
+            plot(plotter)
+        self.addCleanup(os.remove, filename)
+        with open(filename, "r") as f:
+            expected = f.read().replace("\n", "")
+
+        usb = AsyncRecordUsb()
+        position = run(plot_async(usb))
+        self.assertEqual(position, (70, 90))
+        self.assertEqual(bytes(usb.received).rstrip(b'F'), expected.encode("utf-8"))
@@ -0,0 +1,88 @@
+import unittest
+
+from k40nano import *
+from k40nano.Connection import Connection
+from k40nano.LaserSpeed import BOARDS
+
+
+class BytesConnection(Connection):
+    """
+    Connection collecting everything written.
+    """
+
+    def __init__(self):
+        Connection.__init__(self)
+        self.data = bytearray()
+
+    def write(self, data=None):
+        if not isinstance(data, (bytes, bytearray)):
+            data = data.encode("utf-8")
+        self.data += data
+
+
+# An M2 measured 5% slower than LASER-M2.
+MEASURED = BoardProfile("SHOP-M2", [
+    (8.0, 929.0 * 1.05),
+    (5120.0, 11148.0 * 1.05),
+    (5120.0, 11148.0 * 1.05),
+    (5632.0, 11148.0 * 1.05),
+    (6144.0, 11148.0 * 1.05)
+], suffix_c_speed=7, min_speed=0.4, min_raster_speed=5.0)
+
+
+class TestBoardProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.boards = dict(BOARDS)
+
+    def tearDown(self):
+        BOARDS.clear()
+        BOARDS.update(self.boards)
+        LaserSpeed.clear_caches(table=True)
+
+    def test_frozen(self):
+        profile = LaserSpeed.get_board("LASER-M2")
+        with self.assertRaises(AttributeError):
+            profile.diagonal = False
+        self.assertIs(LaserSpeed.get_board(profile), profile)
+        self.assertEqual(profile.gearing[3], (5632.0, 11148.0, 3))
+        self.assertFalse(LaserSpeed.get_board("LASER-M").diagonal)
+
+    def test_gearing(self):
+        self.assertEqual(LaserSpeed.get_gearing("B2", 5, True), (784.0, 2020.0, 1))
+        self.assertEqual(LaserSpeed.get_gearing("B2", 5, False), (784.0, 2020.0, 0))
+        self.assertEqual(LaserSpeed.get_gearing("LASER-B2", 8, True), (784.0, 1858.0, 1))
+        self.assertEqual(LaserSpeed.get_gearing("M2", 5, True), (8.0, 1010.0, 0))
+        self.assertEqual(LaserSpeed.get_gearing("M2", 200, True), (5632.0, 12120.0, 3))
+        self.assertEqual(LaserSpeed.validate_speed(8, "B2"), 9.509)
+        self.assertEqual(LaserSpeed.validate_speed(6, "B2"), 6)
+        self.assertEqual(LaserSpeed.validate_speed(6, "B2", True), 9.509)
+        self.assertEqual(LaserSpeed.validate_speed(0.1, "UNKNOWN"), 0.1)
+
+    def test_register(self):
+        LaserSpeed.register_board(MEASURED)
+        self.assertIs(LaserSpeed.get_board("SHOP-M2"), MEASURED)
+        for speed in (3.0, 20.0, 100.0):
+            speed_code = LaserSpeed.get_code_from_speed(speed, board="SHOP-M2")
+            self.assertNotEqual(speed_code, LaserSpeed.get_code_from_speed(speed, board="LASER-M2"))
+            self.assertAlmostEqual(LaserSpeed.get_speed_from_code(speed_code, "SHOP-M2"), speed, delta=speed / 100)
+        self.assertEqual(LaserSpeed.validate_speed(4, MEASURED, True), 5.0)
+
+    def test_replace(self):
+        LaserSpeed.register_board(BoardProfile("SHOP-B", [(784.0, 2000.0)] * 5, diagonal=False))
+        first = LaserSpeed.get_code_from_speed(20.0, board="SHOP-B")
+        LaserSpeed.register_board(BoardProfile("SHOP-B", [(784.0, 2200.0)] * 5, diagonal=False))
+        self.assertEqual(LaserSpeed.cache_stats()["get_code_from_speed"]["size"], 0)
+        self.assertNotEqual(LaserSpeed.get_code_from_speed(20.0, board="SHOP-B"), first)
+
+    def test_plotter(self):
+        for board in ("LASER-M2", LaserSpeed.get_board("LASER-M2")):
+            with NanoPlotter(board=board, connection=BytesConnection()) as plotter:
+                plotter.enter_compact_mode(25)
+                plotter.move(100, 0)
+            self.assertIn(LaserSpeed.get_code_from_speed(25, board="LASER-M2").encode("ascii"),
+                          bytes(plotter.connection.data))
+
+
+if __name__ == '__main__':
+    unittest.main()
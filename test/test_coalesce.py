@@ -0,0 +1,77 @@
+import random
+import unittest
+
+from k40nano import *
+from k40nano.CoalescePlotter import simplify, segment_distance
+from k40nano.Connection import Connection
+
+
+class BytesConnection(Connection):
+    """
+    Connection collecting everything written.
+    """
+
+    def __init__(self):
+        Connection.__init__(self)
+        self.data = bytearray()
+
+    def write(self, data=None):
+        if not isinstance(data, (bytes, bytearray)):
+            data = data.encode("utf-8")
+        self.data += data
+
+
+class TestCoalescePlotter(unittest.TestCase):
+
+    def test_collinear(self):
+        plotter = NanoPlotter(connection=BytesConnection())
+        with CoalescePlotter(plotter) as coalesce:
+            coalesce.enter_concat_mode()
+            for i in range(0, 100):
+                coalesce.move(3, 1)
+            coalesce.move(-3, -1)  # Doubles back, not merged.
+            coalesce.down()
+            coalesce.move(0, 5)
+            coalesce.move(0, 5)
+            coalesce.up()
+            self.assertEqual((coalesce.current_x, coalesce.current_y), (297, 109))
+        self.assertEqual((plotter.current_x, plotter.current_y), (297, 109))
+        self.assertEqual(coalesce.moves_in, 103)
+        self.assertEqual(coalesce.moves_out, 3)
+        self.assertEqual(plotter.connection.data, b'IBz|tR100NTcLaNDNRjNUNS1P')
+
+    def test_simplify(self):
+        rng = random.Random(5)
+        points = [(i * 10, rng.randint(-3, 3)) for i in range(0, 200)]
+        simplified = simplify(points, 4)
+        self.assertEqual(simplified, [points[0], points[-1]])
+        simplified = simplify(points, 2)
+        self.assertEqual(simplified[0], points[0])
+        self.assertEqual(simplified[-1], points[-1])
+        self.assertLess(len(simplified), len(points))
+        for point in points:
+            distance = min(segment_distance(point[0], point[1], x0, y0, x1, y1)
+                           for (x0, y0), (x1, y1) in zip(simplified, simplified[1:]))
+            self.assertLessEqual(distance, 2)
+        self.assertEqual(simplify([(0, 0), (100, 0), (50, 0)], 1), [(0, 0), (100, 0), (50, 0)])
+
+    def test_tolerance(self):
+        rng = random.Random(6)
+        moves = [(rng.randint(5, 10), rng.randint(-1, 1)) for i in range(0, 500)]
+        packets = []
+        for tolerance in (0, 2):
+            plotter = NanoPlotter(connection=BytesConnection())
+            with CoalescePlotter(plotter, tolerance=tolerance) as coalesce:
+                coalesce.enter_compact_mode(50)
+                coalesce.down()
+                for dx, dy in moves:
+                    coalesce.move(dx, dy)
+                coalesce.up()
+            self.assertEqual(plotter.current_x, sum(dx for dx, dy in moves))
+            self.assertEqual(plotter.current_y, sum(dy for dx, dy in moves))
+            packets.append(len(plotter.connection.data) // 30)
+        self.assertLess(packets[1], packets[0] / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,22 @@ import unittest
 import random
 
 from k40nano.NanoConnection import onewire_crc_lookup
+from k40nano.OneWireCrc import crc_table, onewire_crc_batch
+
+
+def crc_nibble_lookup(line):
+    """
+    Reference implementation, the 32 entry nibble table previously used by NanoConnection.
+
+    License: 2-clause "simplified" BSD license
+    Copyright (C) 1992-2017 Arjen Lentz
+    https://lentz.com.au/blog/calculating-crc-with-a-tiny-32-entry-lookup-table
+    """
+    crc = 0
+    for i in range(2, 32):
+        crc = line[i] ^ crc
+        crc = crc_table[crc & 0x0f] ^ crc_table[16 + ((crc >> 4) & 0x0f)]
+    return crc
 
 
 def crc_8bit_onewire(line):
@@ -32,3 +48,23 @@ class TestNanoCrc(unittest.TestCase):
         for q in range(0,10000):
             line = [random.randint(0,255) for m in range(0,32)]
             self.assertEqual(onewire_crc_lookup(line), crc_8bit_onewire(line))
+
+    def test_crc_nibble_reference(self):
+        for q in range(0, 10000):
+            line = [random.randint(0, 255) for m in range(0, 34)]
+            self.assertEqual(onewire_crc_lookup(line), crc_nibble_lookup(line))
+
+    def test_crc_batch(self):
+        lines = [[0, 0] + [random.randint(0, 255) for m in range(0, 30)] for q in range(0, 1000)]
+        data = bytearray()
+        for line in lines:
+            data += bytearray(line[2:])
+        crcs = onewire_crc_batch(data)
+        self.assertEqual(len(crcs), len(lines))
+        for crc, line in zip(crcs, lines):
+            self.assertEqual(crc, crc_nibble_lookup(line))
+
+    def test_crc_batch_short_packet(self):
+        crcs = onewire_crc_batch(b'IPP')
+        self.assertEqual(len(crcs), 1)
+        self.assertEqual(crcs[0], crc_nibble_lookup(bytearray(b'\xa6\x00IPP' + b'F' * 27)))
@@ -1,7 +1,7 @@
 import random
 import unittest
 
-from k40nano.NanoPlotter import nano_distance
+from k40nano.NanoPlotter import nano_distance, nano_distances, distance_lookup, DISTANCE_TABLE_SIZE
 
 
 def encode_distance(distance_mils):
@@ -29,6 +29,20 @@ def encode_distance(distance_mils):
         raise Exception("Could not create distance")  # This really shouldn't happen.
 
 
+def concatenate_distance(v):
+    """
+    Reference implementation, the nano_distance previously used by NanoPlotter.
+    """
+    dist = b''
+    if v >= 255:
+        zs = int(v / 255)
+        v %= 255
+        dist += (b'z' * zs)
+    if v >= 52:
+        return dist + b'%03d' % v
+    return dist + distance_lookup[v]
+
+
 class TestNanoDistance(unittest.TestCase):
 
     def test_distance(self):
@@ -36,3 +50,12 @@ class TestNanoDistance(unittest.TestCase):
             d0 = encode_distance(q)
             d1 = nano_distance(q)
             self.assertEqual(d0, d1)
+
+    def test_distance_beyond_table(self):
+        for q in range(DISTANCE_TABLE_SIZE - 1000, DISTANCE_TABLE_SIZE + 100000, 7):
+            self.assertEqual(encode_distance(q), nano_distance(q))
+
+    def test_distances(self):
+        values = [random.randint(0, 2 * DISTANCE_TABLE_SIZE) for i in range(0, 10000)]
+        self.assertEqual(nano_distances(values), b''.join(encode_distance(q) for q in values))
+        self.assertEqual(nano_distances([]), b'')
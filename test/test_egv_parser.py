@@ -0,0 +1,42 @@
+import unittest
+
+from k40nano import *
+from k40nano.NanoPlotter import nano_distance
+
+
+class TestEgvParser(unittest.TestCase):
+
+    def test_tokenize(self):
+        tokens = EgvParser.tokenize(b'IBzzcRaL|cM123CV2241031061161C\nNRBS1EDBzU@NSE')
+        self.assertEqual(tokens, [
+            ('I', None), ('B', 513), ('R', 1), ('L', 28), ('M', 123), ('C', 'CV2241031061161C'),
+            ('N', None), ('R', 0), ('B', 0), ('S', '1E'), ('D', None), ('B', 255), ('U', None),
+            ('@', None), ('N', None), ('S', 'E')])
+
+    def test_distances(self):
+        for v in range(0, 1000):
+            for command in "BTLRM":
+                data = command.encode("ascii") + nano_distance(v)
+                self.assertEqual(EgvParser.tokenize(data), [(command, v)])
+
+    def test_commands(self):
+        tokens = EgvParser.tokenize(b'IS1PFNSEIS2PIPPV1551921G002NCV0051131001065112C')
+        self.assertEqual(tokens, [
+            ('I', None), ('S', '1P'), ('F', None), ('N', None), ('S', 'E'), ('I', None), ('S', '2P'),
+            ('I', None), ('P', None), ('P', None), ('C', 'V1551921G002'), ('N', None),
+            ('C', 'CV0051131001065112C')])
+
+    def test_chunks(self):
+        data = b'IV1551921G002BzzcNRBS1EDBzzzU@NSEIS1PT|c' * 20
+        expected = EgvParser.tokenize(data)
+        for size in (1, 2, 3, 7, 30):
+            parser = EgvParser()
+            tokens = []
+            for i in range(0, len(data), size):
+                tokens += parser.feed(data[i:i + size])
+            tokens += parser.flush()
+            self.assertEqual(tokens, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import io
+import random
+import unittest
+
+from k40nano import *
+from k40nano.Connection import Connection
+from k40nano.NanoPlotter import line_runs
+from k40nano.Plotter import Plotter
+
+
+class BytesConnection(Connection):
+    """
+    Connection collecting everything written.
+    """
+
+    def __init__(self):
+        Connection.__init__(self)
+        self.data = bytearray()
+
+    def write(self, data=None):
+        if not isinstance(data, (bytes, bytearray)):
+            data = data.encode("utf-8")
+        self.data += data
+
+
+class BurnPlotter(Plotter):
+    """
+    Plotter recording the position of every step burned, along the Bresenham line of each move.
+    """
+
+    def __init__(self):
+        Plotter.__init__(self)
+        self.burns = set()
+
+    def move(self, dx, dy):
+        if self.pen_down:
+            x = self.current_x
+            y = self.current_y
+            for run_x, run_y in line_runs(dx, dy):
+                sx = (run_x > 0) - (run_x < 0)
+                sy = (run_y > 0) - (run_y < 0)
+                for i in range(0, max(abs(run_x), abs(run_y))):
+                    self.burns.add((min(x, x + sx), min(y, y + sy)))
+                    x += sx
+                    y += sy
+        Plotter.move(self, dx, dy)
+
+
+def vector_job(plotter):
+    rng = random.Random(5)
+    plotter.move_abs(200, 300)
+    plotter.enter_compact_mode(30)
+    for i in range(0, 100):
+        plotter.down()
+        plotter.move(rng.randint(-300, 300), rng.randint(-300, 300))
+        plotter.up()
+        plotter.move(rng.randint(-50, 50), rng.randint(-50, 50))
+    plotter.exit_compact_mode_reset()
+    plotter.move_abs(100, 100)
+    plotter.enter_compact_mode(60)
+    plotter.down()
+    plotter.move(1000, 0)
+    plotter.move(0, 300)
+    plotter.up()
+    plotter.exit_compact_mode_finish()
+
+
+def rail_job(plotter):
+    plotter.unlock_rail()
+    plotter.lock_rail()
+    plotter.move_abs(300, 200)
+    vector_job(plotter)
+    plotter.move_abs(0, 0)
+    plotter.unlock_rail()
+
+
+def raster_image():
+    rng = random.Random(6)
+    image = PngRaster(40, 20, 8, 0)
+    image.fill(255)
+    for i in range(0, 200):
+        image.pixel(rng.randint(0, 39), rng.randint(0, 19), 0)
+    return image
+
+
+def encode(job):
+    connection = BytesConnection()
+    with NanoPlotter(board="LASER-M2", connection=connection) as plotter:
+        job(plotter)
+    return bytes(connection.data)
+
+
+class TestEgvPlayer(unittest.TestCase):
+
+    def test_vector_positions(self):
+        data = encode(vector_job)
+        plotter = BurnPlotter()
+        with BurnPlotter() as expected:
+            vector_job(expected)
+        EgvPlayer(plotter).play(data)
+        self.assertEqual(plotter.burns, expected.burns)
+        self.assertEqual((plotter.current_x, plotter.current_y), (expected.current_x, expected.current_y))
+        self.assertEqual((plotter.min_x, plotter.max_x, plotter.min_y, plotter.max_y),
+                         (expected.min_x, expected.max_x, expected.min_y, expected.max_y))
+
+    def test_resend(self):
+        data = encode(vector_job)
+        connection = BytesConnection()
+        with NanoPlotter(board="LASER-M2", connection=connection) as plotter:
+            EgvPlayer(plotter).play(io.BytesIO(data), chunk_size=7)
+        self.assertEqual(bytes(connection.data), data)
+
+    def test_resend_rail(self):
+        data = encode(rail_job)
+        self.assertIn(b'IS2P', data)
+        self.assertIn(b'IS1P', data)
+        connection = BytesConnection()
+        with NanoPlotter(board="LASER-M2", connection=connection) as plotter:
+            EgvPlayer(plotter).play(data)
+        self.assertEqual(bytes(connection.data), data)
+
+    def test_raster(self):
+        data = encode(lambda plotter: plotter.raster(raster_image(), speed=100, raster_step=2))
+        plotter = BurnPlotter()
+        EgvPlayer(plotter).play(data)
+        connection = BytesConnection()
+        with NanoPlotter(board="LASER-M2", connection=connection) as resent:
+            EgvPlayer(resent).play(data)
+        self.assertEqual(plotter.current_y, resent.current_y)
+        self.assertEqual(JobEstimator().estimate(bytes(connection.data)), JobEstimator().estimate(data))
+        expected = set()
+        for y, row in enumerate(raster_image().get_samples()):
+            for x, sample in enumerate(row):
+                if sample == 0:
+                    expected.update((x * 2 + i, y * 2) for i in range(0, 2))
+        self.assertEqual(plotter.burns, expected)
+
+    def test_svg(self):
+        data = encode(vector_job)
+        output = io.BytesIO()
+        with SvgPlotter(output) as plotter:
+            EgvPlayer(plotter).play(data)
+        self.assertIn(b'<svg', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import random
+import unittest
+
+from k40nano import *
+from k40nano.Connection import Connection
+
+
+class BytesConnection(Connection):
+    """
+    Connection collecting everything written.
+    """
+
+    def __init__(self):
+        Connection.__init__(self)
+        self.data = bytearray()
+
+    def write(self, data=None):
+        if not isinstance(data, (bytes, bytearray)):
+            data = data.encode("utf-8")
+        self.data += data
+
+
+def plotter_job():
+    """
+    EGV data of a vector and raster job. The moves use Random.random(), randint() differs between
+    python 2 and 3 and so would the job.
+    """
+    connection = BytesConnection()
+    rng = random.Random(3)
+    with NanoPlotter(connection=connection) as plotter:
+        plotter.move_abs(200, 300)
+        plotter.enter_compact_mode(30)
+        for i in range(0, 200):
+            plotter.down()
+            plotter.move(int(rng.random() * 801) - 400, int(rng.random() * 801) - 400)
+            plotter.up()
+        plotter.exit_compact_mode_reset()
+        plotter.move_abs(0, 1000)
+        plotter.move_abs(1000, 1000)  # the raster starts heading right, the lines make all its switches.
+        plotter.enter_compact_mode(150, raster_step=2)
+        for i in range(0, 50):
+            plotter.down()
+            plotter.move(-600 if i % 2 else 600, 0)
+            plotter.up()
+            plotter.h_switch()
+        plotter.exit_compact_mode_finish()
+    return bytes(connection.data)
+
+
+def simulated_time(data):
+    """
+    Seconds SimulatedUsb takes to execute data, without homing.
+    """
+    tokens = [token for token in EgvParser.tokenize(data) if token[0] != 'P']
+    duration, finished = SimulatedUsb().execute(tokens)
+    return duration
+
+
+class TestJobEstimator(unittest.TestCase):
+
+    def test_matches_simulation(self):
+        data = plotter_job()
+        estimator = JobEstimator()
+        estimator.estimate(data)
+        self.assertAlmostEqual(estimator.time, simulated_time(data))
+        compact = [section for section in estimator.sections if section["compact"]]
+        self.assertEqual(len(compact), 2)
+        self.assertEqual(compact[1]["switches"], 50)
+
+    def test_plotter_connection(self):
+        data = plotter_job()
+        estimator = JobEstimator()
+        with NanoPlotter(board="LASER-M2", connection=estimator) as plotter:
+            plotter.enter_compact_mode(20)
+            plotter.move(2000, 0)
+            plotter.move(0, 500)
+            plotter.exit_compact_mode_finish()
+        self.assertAlmostEqual(estimator.time, 2500 * 0.0254 / 20, delta=0.1)
+        self.assertGreater(JobEstimator().estimate(data), 0.0)
+
+    def test_chunks(self):
+        data = plotter_job()
+        expected = JobEstimator().estimate(data)
+        for size in (1, 3, 7, 64):
+            estimator = JobEstimator()
+            for i in range(0, len(data), size):
+                estimator.feed(data[i:i + size])
+            estimator.flush()
+            self.assertAlmostEqual(estimator.time, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
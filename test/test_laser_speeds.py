@@ -4,6 +4,11 @@ import unittest
 
 from k40nano import *
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 codes = (
     "CV0051131001065112C M2 0.4 0",
     "CV0111421001063216C M2 0.41 0",
@@ -3289,3 +3294,43 @@ class TestLaserSpeeds(unittest.TestCase):
             # print("%s M2 speed: %f  is really %f" % (speed_code, speed, determined_speed))
             determined_speed /= flaw
             self.assertAlmostEquals(speed, determined_speed, delta=speed / 100)
+
+    def check_batch(self, use_numpy):
+        table = {}
+        for line in codes:
+            speed_code, board, mm_per_second, step_amount = line.split(" ")
+            table.setdefault(board, []).append((speed_code, float(mm_per_second), int(step_amount)))
+        sweep = [i / 10.0 for i in range(0, 5000, 7)] + [25.4, 60.0, 127.0, 320.0]  # and the gear limits.
+        boards = ["A", "B", "B1", "B2", "M", "M1", "M2",
+                  "LASER-A", "LASER-B", "LASER-B1", "LASER-B2", "LASER-M", "LASER-M1", "LASER-M2"]
+        for board in boards:
+            rows = table.get(board, [])
+            speeds = [row[1] for row in rows] + sweep + sweep
+            steps = [row[2] for row in rows] + [0] * len(sweep) + [2] * len(sweep)
+            created = LaserSpeed.get_codes_from_speeds(speeds, steps, board, use_numpy=use_numpy)
+            expected = [LaserSpeed.uncached_get_code_from_speed(speed, step, board)
+                        for speed, step in zip(speeds, steps)]
+            self.assertEqual(created, expected)
+            for gear in (0, 1, 4):
+                created = LaserSpeed.get_codes_from_speeds(sweep, 2, board, gear=gear, use_numpy=use_numpy)
+                expected = [LaserSpeed.uncached_get_code_from_speed(speed, 2, board, gear=gear) for speed in sweep]
+                self.assertEqual(created, expected)
+            speed_codes = [row[0] for row in rows] + expected
+            self.assertEqual(LaserSpeed.get_speeds_from_codes(speed_codes, board, use_numpy=use_numpy),
+                             [LaserSpeed.uncached_get_speed_from_code(code, board) for code in speed_codes])
+            self.assertEqual(LaserSpeed.parse_speed_codes(speed_codes),
+                             [LaserSpeed.parse_speed_code(code) for code in speed_codes])
+
+    def test_gear_for_speed(self):
+        # (speed, vector gear, raster gear) at and around the gear limits.
+        for speed, vector, raster in [(1.0, 1, 1), (25.4, 1, 1), (25.5, 2, 2), (60.0, 2, 2), (60.1, 3, 2),
+                                      (126.9, 3, 2), (127.0, 4, 3), (320.0, 4, 3), (320.1, 4, 4)]:
+            self.assertEqual(LaserSpeed.get_gear_for_speed(speed), vector)
+            self.assertEqual(LaserSpeed.get_gear_for_speed(speed, True), raster)
+
+    def test_batch(self):
+        self.check_batch(False)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_batch_numpy(self):
+        self.check_batch(True)
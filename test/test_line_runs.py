@@ -0,0 +1,110 @@
+import random
+import unittest
+
+from k40nano.NanoPlotter import line_runs, DISTANCE_TABLE_SIZE
+
+
+def bresenham_runs(dx, dy):
+    """
+    Reference implementation, the per step Bresenham's line draw algorithm previously used by NanoPlotter.
+    """
+    x0 = 0
+    y0 = 0
+    diagonal = 0
+    straight = 0
+    if dy < 0:
+        dy = -dy
+        step_y = -1
+    else:
+        step_y = 1
+    if dx < 0:
+        dx = -dx
+        step_x = -1
+    else:
+        step_x = 1
+    x1 = dx * step_x
+    y1 = dy * step_y
+    if dx > dy:
+        dy <<= 1  # dy is now 2*dy
+        dx <<= 1
+        fraction = dy - (dx >> 1)  # same as 2*dy - dx
+
+        while x0 != x1:
+            if fraction >= 0:
+                y0 += step_y
+                fraction -= dx  # same as fraction -= 2*dx
+                if straight != 0:
+                    yield straight * step_x, 0
+                    straight = 0
+                diagonal += 1
+            else:
+                if diagonal != 0:
+                    yield diagonal * step_x, diagonal * step_y
+                    diagonal = 0
+                straight += 1
+            x0 += step_x
+            fraction += dy  # same as fraction += 2*dy
+        if straight != 0:
+            yield straight * step_x, 0
+    else:
+        dy <<= 1  # dy is now 2*dy
+        dx <<= 1  # dx is now 2*dx
+        fraction = dx - (dy >> 1)
+
+        while y0 != y1:
+            if fraction >= 0:
+                x0 += step_x
+                fraction -= dy
+                if straight != 0:
+                    yield 0, straight * step_y
+                    straight = 0
+                diagonal += 1
+            else:
+                if diagonal != 0:
+                    yield diagonal * step_x, diagonal * step_y
+                    diagonal = 0
+                straight += 1
+            y0 += step_y
+            fraction += dx
+        if straight != 0:
+            yield 0, straight * step_y
+    if diagonal != 0:
+        yield diagonal * step_x, diagonal * step_y
+
+
+class TestLineRuns(unittest.TestCase):
+
+    def test_small_lines(self):
+        for dx in range(0, 160):
+            for dy in range(0, 160):
+                self.assertEqual(list(line_runs(dx, dy)), list(bresenham_runs(dx, dy)), (dx, dy))
+
+    def test_directions(self):
+        for dx in range(-30, 31):
+            for dy in range(-30, 31):
+                self.assertEqual(list(line_runs(dx, dy)), list(bresenham_runs(dx, dy)), (dx, dy))
+
+    def test_boundaries(self):
+        """
+        Majors around the distance table size, with minors at both ends of each closed form and where they meet.
+        """
+        size = DISTANCE_TABLE_SIZE
+        for major in (size - 1, size, size + 1, 2 * size + 1):
+            half = major // 2
+            for minor in (0, 1, 2, half - 1, half, half + 1, major - 2, major - 1, major):
+                for dx, dy in ((major, minor), (-minor, major), (-major, -minor), (minor, -major)):
+                    self.assertEqual(list(line_runs(dx, dy)), list(bresenham_runs(dx, dy)), (dx, dy))
+        for major in range(1, 2000):
+            self.assertEqual(list(line_runs(major, major - 1)), list(bresenham_runs(major, major - 1)), major)
+            self.assertEqual(list(line_runs(1 - major, major)), list(bresenham_runs(1 - major, major)), major)
+
+    def test_long_lines(self):
+        rng = random.Random(2)
+        for i in range(0, 100):
+            dx = rng.randint(-20000, 20000)
+            dy = rng.randint(-20000, 20000)
+            self.assertEqual(list(line_runs(dx, dy)), list(bresenham_runs(dx, dy)), (dx, dy))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,310 @@
+import random
+import time
+import unittest
+
+from k40nano import *
+from k40nano.Connection import Connection
+from k40nano.NanoConnection import onewire_crc_lookup
+
+
+class RecordUsb:
+    """
+    Usb that records every packet written and always responds OK.
+    """
+
+    def __init__(self):
+        self.packets = []
+
+    def initialize(self):
+        pass
+
+    def release_usb(self):
+        pass
+
+    def read(self):
+        return 206
+
+    def write(self, packet):
+        if len(packet) != 1:
+            self.packets.append(bytes(packet))
+
+
+class BurstUsb:
+    """
+    Device double which discards the packets sent since the last HELLO when any fails the crc.
+    Corrupts the given write indices, and reports busy every few polls.
+    """
+
+    def __init__(self, corrupt=(), busy_every=0):
+        self.corrupt = set(corrupt)
+        self.busy_every = busy_every
+        self.writes = 0
+        self.hellos = 0
+        self.staged = []
+        self.failed = False
+        self.status = 206
+        self.received = bytearray()
+
+    def initialize(self):
+        pass
+
+    def release_usb(self):
+        pass
+
+    def read(self):
+        return self.status
+
+    def write(self, packet):
+        if len(packet) == 1:
+            self.hellos += 1
+            if self.failed:
+                self.status = 207
+            else:
+                for staged in self.staged:
+                    self.received += staged
+                self.status = 206
+                if self.busy_every and self.hellos % self.busy_every == 0:
+                    self.status = 238
+            self.staged = []
+            self.failed = False
+            return
+        packet = bytearray(packet)
+        if self.writes in self.corrupt:
+            packet[5] ^= 0xFF
+        self.writes += 1
+        if onewire_crc_lookup(packet) != packet[33]:
+            self.failed = True
+        self.staged.append(bytes(packet[2:32]))
+
+
+class CompleteUsb:
+    """
+    Usb that reports task complete after the given number of status polls, recording the time of each poll.
+    """
+
+    def __init__(self, polls):
+        self.polls = polls
+        self.times = []
+
+    def initialize(self):
+        pass
+
+    def release_usb(self):
+        pass
+
+    def read(self):
+        self.times.append(time.time())
+        if len(self.times) >= self.polls:
+            return 236
+        return 206
+
+    def write(self, packet):
+        pass
+
+
+class DeafUsb(SimulatedUsb):
+    """
+    Simulated device whose status reads are all lost after the given number of reads.
+    """
+
+    def __init__(self, reads):
+        SimulatedUsb.__init__(self)
+        self.reads = reads
+
+    def read(self):
+        if self.reads <= 0:
+            raise IOError("Simulated read timeout.")
+        self.reads -= 1
+        return SimulatedUsb.read(self)
+
+
+class WaitConnection(Connection):
+    def __init__(self):
+        Connection.__init__(self)
+        self.estimates = []
+
+    def wait(self, estimate=None):
+        self.estimates.append(estimate)
+
+
+class PacketConnection(NanoConnection):
+    """
+    NanoConnection collecting the payload of each packet rather than sending it.
+    """
+
+    def __init__(self):
+        NanoConnection.__init__(self)
+        self.payloads = []
+
+    def send_valid_packet(self, packet):
+        self.payloads.append(bytes(packet))
+
+
+class ConcatenateConnection(PacketConnection):
+    """
+    Reference implementation, the bytes concatenation write previously used by NanoConnection.
+    """
+
+    def __init__(self):
+        PacketConnection.__init__(self)
+        self.buffer = b''
+
+    def write(self, data=None):
+        size = self.PACKET_SIZE
+        data = self.buffer + data
+        chunks = [data[i:i + size] for i in range(0, len(data), size)]
+        for chunk in chunks[:-1]:
+            self.send_valid_packet(chunk)
+        self.buffer = chunks[-1]
+        if len(self.buffer) == self.PACKET_SIZE:
+            self.send_valid_packet(self.buffer)
+            self.buffer = b''
+
+
+class TestNanoConnection(unittest.TestCase):
+
+    def test_make_valid_packet(self):
+        connection = NanoConnection()
+        packet = connection.make_valid_packet(b'IPP')
+        self.assertEqual(list(packet), [166, 0, 73, 80, 80, 70, 70, 70,
+                                        70, 70, 70, 70, 70, 70, 70, 70,
+                                        70, 70, 70, 70, 70, 70, 70, 70,
+                                        70, 70, 70, 70, 70, 70, 70, 70,
+                                        166, 228])
+
+    def test_make_valid_packet_reuse(self):
+        connection = NanoConnection()
+        full = bytes(connection.make_valid_packet(b'A' * 30))
+        short = bytes(connection.make_valid_packet(b'IPP'))
+        self.assertEqual(short, bytes(NanoConnection().make_valid_packet(b'IPP')))
+        self.assertEqual(full[2:32], b'A' * 30)
+        frame = bytearray(34)
+        frame[0] = 166
+        frame[32] = 166
+        connection.make_valid_packet(b'IPP', frame)
+        self.assertEqual(bytes(frame), short)
+
+    def test_send_str(self):
+        usb = RecordUsb()
+        with NanoConnection(usb=usb) as connection:
+            connection.send("IPP")
+        self.assertEqual(usb.packets, [bytes(NanoConnection().make_valid_packet(b'IPP'))])
+
+    def test_pipelined_stream(self):
+        data = bytes(bytearray(random.randint(65, 90) for i in range(0, 3000)))
+        for window in (None, 1, 4, 8):
+            usb = BurstUsb(corrupt=(3, 17, 18, 40), busy_every=40)
+            connection = NanoConnection(usb=usb, window=window)
+            connection.open()
+            for i in range(0, len(data), 7):
+                connection.write(data[i:i + 7])
+            connection.flush()
+            self.assertEqual(bytes(usb.received), data)
+
+    def test_pipelined_simulated(self):
+        data = b''.join(b'%06d' % i for i in range(0, 1000))
+        for window in (1, 4, 8):
+            usb = SimulatedUsb(crc_error_rate=0.05, timeout_rate=0.1, seed=window)
+            stats = TransportStats()
+            with NanoConnection(usb=usb, window=window, stats=stats) as connection:
+                for i in range(0, len(data), 7):
+                    connection.write(data[i:i + 7])
+            self.assertEqual(bytes(usb.received), data)
+            self.assertGreater(stats.timeouts, 0)  # reads were dropped.
+            self.assertGreater(stats.resends, 0)
+
+    def test_window_cap(self):
+        connection = NanoConnection(window=1000)
+        self.assertEqual(connection.window, connection.MAX_WINDOW)
+        self.assertEqual(NanoConnection(window=4).window, 4)
+        self.assertEqual(ThreadedNanoConnection(window=1000).window, connection.MAX_WINDOW)
+
+    def test_pipelined_lost_status(self):
+        # The device accepted the window, but as its status is lost the window is neither dropped nor resent.
+        usb = DeafUsb(1)
+        connection = NanoConnection(usb=usb, window=4)
+        connection.open()
+        with self.assertRaises(IOError):
+            connection.write(b'B' * 300)
+        self.assertEqual(len(connection.unacknowledged), 4)
+        self.assertEqual(bytes(usb.received), b'B' * 120)
+
+    def test_pipelined_polls(self):
+        data = b'B' * 3000
+        usb = BurstUsb()
+        with NanoConnection(usb=usb) as connection:
+            connection.write(data)
+        lockstep_hellos = usb.hellos
+        usb = BurstUsb()
+        with NanoConnection(usb=usb, window=10) as connection:
+            connection.write(data)
+        self.assertEqual(lockstep_hellos, 200)
+        self.assertEqual(usb.hellos, 11)
+
+    def test_backoff(self):
+        delays = Backoff(0.01, 0.1, 3.0).delays()
+        self.assertEqual([round(next(delays), 6) for i in range(0, 5)], [0.01, 0.03, 0.09, 0.1, 0.1])
+
+    def test_wait_backoff(self):
+        usb = CompleteUsb(5)
+        connection = NanoConnection(usb=usb, backoff=Backoff(0.001, 0.004))
+        start = time.time()
+        connection.wait()
+        self.assertEqual(len(usb.times), 5)
+        self.assertLess(usb.times[-1] - start, 0.1)
+
+    def test_wait_estimate(self):
+        usb = CompleteUsb(1)
+        connection = NanoConnection(usb=usb)
+        estimate = time.time() + 0.05
+        connection.wait(estimate)
+        self.assertGreaterEqual(usb.times[0], estimate)
+
+    def test_plotter_estimate(self):
+        connection = WaitConnection()
+        start = time.time()
+        with NanoPlotter(connection=connection) as plotter:
+            plotter.enter_compact_mode(25.4)  # 1 inch per second, 1 ms per step.
+            plotter.move(1000, 0)
+            plotter.move(500, 500)
+        self.assertEqual(len(connection.estimates), 1)
+        self.assertAlmostEqual(connection.estimates[0] - start, 1.5, delta=0.1)
+
+    def test_write_fragments(self):
+        data = bytes(bytearray(random.randint(65, 90) for i in range(0, 10000)))
+        for fragment in (1, 2, 3, 7, 29, 30, 31, 100, 4000):
+            connection = PacketConnection()
+            for i in range(0, len(data), fragment):
+                connection.write(data[i:i + fragment])
+            connection.flush()
+            self.assertEqual(b''.join(connection.payloads), data)
+            self.assertTrue(all(len(p) == 30 for p in connection.payloads[:-1]))
+
+    def test_stats(self):
+        events = []
+        stats = TransportStats(callback=lambda event, value: events.append(event))
+        usb = BurstUsb(corrupt=(2,), busy_every=3)
+        with NanoConnection(usb=usb, stats=stats, backoff=Backoff(0.001, 0.001)) as connection:
+            connection.write(b'B' * 100)
+        self.assertEqual(stats.packets, 4)
+        self.assertEqual(stats.resends, 1)
+        self.assertEqual(stats.crc_errors, 1)
+        self.assertEqual(stats.hellos, usb.hellos)
+        self.assertEqual(stats.busy, stats.count(238))
+        self.assertGreater(stats.busy, 0)
+        self.assertEqual(stats.payload_bytes, 100)
+        self.assertEqual(stats.padding_bytes, 20)
+        self.assertEqual(sum(stats.latency_histogram), 4)
+        self.assertEqual(events.count("packet"), 4)
+        values = stats.as_dict()
+        self.assertEqual(values["crc_error"], 1)
+        self.assertEqual(values["packets"], 4)
+
+    def test_stats_pipelined(self):
+        stats = TransportStats()
+        usb = BurstUsb(corrupt=(5,))
+        with NanoConnection(usb=usb, window=4, stats=stats) as connection:
+            connection.write(b'B' * 300)
+        self.assertEqual(stats.packets, 10)
+        self.assertEqual(stats.resends, 4)
+        self.assertEqual(stats.hellos, usb.hellos)
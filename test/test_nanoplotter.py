@@ -1,7 +1,61 @@
+import io
 import os
+import random
 import unittest
 
 from k40nano import *
+from k40nano.Connection import Connection
+
+
+class BytesConnection(Connection):
+    """
+    Connection collecting everything written.
+    """
+
+    def __init__(self):
+        Connection.__init__(self)
+        self.data = bytearray()
+        self.writes = 0
+
+    def write(self, data=None):
+        if not isinstance(data, (bytes, bytearray)):
+            data = data.encode("utf-8")
+        self.writes += 1
+        self.data += data
+
+
+def raster_burns(data, raster_step):
+    """
+    Positions burned in raster compact mode within data, following rapid moves outside of it.
+    """
+    x = 0
+    y = 0
+    is_left = False
+    is_on = False
+    compact = False
+    burns = set()
+    for command, value in EgvParser.tokenize(bytes(data)):
+        if command == 'B' or command == 'T':
+            if compact and is_left != (command == 'T'):
+                y += raster_step
+                is_on = False
+            is_left = command == 'T'
+            for i in range(0, value):
+                x += -1 if is_left else 1
+                if is_on:
+                    burns.add((min(x, x + (1 if is_left else -1)), y))
+        elif command == 'L' or command == 'R':
+            y += -value if command == 'L' else value
+        elif command == 'D':
+            is_on = True
+        elif command == 'U':
+            is_on = False
+        elif command == 'S' and value == '1E':
+            compact = True
+        elif command == '@' or command == 'F':
+            compact = False
+            is_on = False
+    return burns
 
 
 class TestNanoController(unittest.TestCase):
@@ -178,3 +232,124 @@ class TestNanoController(unittest.TestCase):
                 lines.append(line)
         self.assertEqual("IBaNRaNBbRbNTaLaNS1P\n", lines[0])
         self.addCleanup(os.remove, filename)
+
+    def test_nano_controller_h_switch(self):
+        # h_switch only switches the direction, even in raster mode the position and laser are kept.
+        connection = BytesConnection()
+        with NanoPlotter(connection=connection) as plotter:
+            plotter.enter_compact_mode(50, raster_step=2)
+            plotter.down()
+            plotter.move(2, 0)
+            plotter.h_switch()
+            self.assertEqual((plotter.current_x, plotter.current_y), (2, 0))
+            plotter.down()
+            plotter.move(-2, 0)
+            speed_code = LaserSpeed.get_code_from_speed(50.0, 2, plotter.board)
+        self.assertEqual(bytes(connection.data), ("I" + speed_code + "NRBS1EDBbTTbFNSE").encode("ascii"))
+
+    def test_plot_polyline(self):
+        rng = random.Random(1)
+        paths = [[(rng.randint(-500, 500), rng.randint(-500, 500)) for i in range(0, 50)]
+                 for j in range(0, 10)]
+        for raster_step in (None, 2):
+            expected = NanoPlotter(connection=BytesConnection())
+            with expected:
+                expected.enter_compact_mode(50, raster_step=raster_step)
+                for path in paths:
+                    expected.up()
+                    expected.move_abs(*path[0])
+                    expected.down()
+                    for x, y in path[1:]:
+                        expected.move_abs(x, y)
+                bounds = (expected.min_x, expected.min_y, expected.max_x, expected.max_y)
+                position = (expected.current_x, expected.current_y, expected.job_time)
+            plotter = NanoPlotter(connection=BytesConnection())
+            with plotter:
+                plotter.enter_compact_mode(50, raster_step=raster_step)
+                plotter.plot_polylines(paths)
+                self.assertEqual((plotter.min_x, plotter.min_y, plotter.max_x, plotter.max_y), bounds)
+                self.assertEqual((plotter.current_x, plotter.current_y), position[:2])
+                self.assertAlmostEqual(plotter.job_time, position[2])
+            self.assertEqual(plotter.connection.data, expected.connection.data)
+
+    def test_encoding_buffer(self):
+        rng = random.Random(3)
+        moves = [(rng.randint(-500, 500), rng.randint(-500, 500)) for i in range(0, 500)]
+        unbuffered = NanoPlotter(connection=BytesConnection(), buffer_size=1)
+        plotter = NanoPlotter(connection=BytesConnection())
+        for p in (unbuffered, plotter):
+            with p:
+                p.enter_compact_mode(50)
+                for dx, dy in moves:
+                    p.move(dx, dy)
+                p.exit_compact_mode_reset()
+                self.assertEqual(len(p.buffer), 0)
+                self.assertTrue(p.connection.data.endswith(b'@NSE'))
+                p.move(10, 10)
+                p.enter_compact_mode(50)
+                p.move(10, 10)
+        self.assertEqual(plotter.connection.data, unbuffered.connection.data)
+        self.assertLess(plotter.connection.writes, unbuffered.connection.writes / 50)
+
+    def test_raster(self):
+        rng = random.Random(4)
+        raster = PngRaster(40, 20, 8, 0)
+        raster.fill(255)
+        for i in range(0, 300):
+            raster.pixel(rng.randint(0, 39), rng.randint(0, 19), 0)
+        expected = set()
+        for y, row in enumerate(raster.get_samples()):
+            for x, sample in enumerate(row):
+                if sample == 0:
+                    expected.update((x * 3 + i, y * 3) for i in range(0, 3))
+        with NanoPlotter(connection=BytesConnection()) as plotter:
+            stats = plotter.raster(raster, speed=100, raster_step=3)
+        self.assertEqual(raster_burns(plotter.connection.data, 3), expected)
+        self.assertEqual(stats["rows"] + stats["blank_rows"], 20)
+        self.assertEqual(stats["travel"] + stats["saved"], 20 * 40 * 3)
+        self.assertLessEqual(plotter.max_x, 120)
+        self.assertLessEqual(plotter.max_y, 57)
+
+    def test_raster_blank(self):
+        raster = PngRaster(100, 60, 8, 0)
+        raster.fill(255)
+        for x in range(40, 50):
+            for y in (10, 11, 13, 50):
+                raster.pixel(x, y, 0)
+        raster.pixel(90, 51, 0)
+        expected = set()
+        for y, row in enumerate(raster.get_samples()):
+            for x, sample in enumerate(row):
+                if sample == 0:
+                    expected.add((x, y))
+        with NanoPlotter(connection=BytesConnection()) as plotter:
+            stats = plotter.raster(raster, speed=100, raster_step=1, overscan=5)
+        self.assertEqual(raster_burns(plotter.connection.data, 1), expected)
+        self.assertEqual(stats["rows"], 5)
+        self.assertEqual(stats["blank_rows"], 55)
+        self.assertEqual(plotter.connection.data.count(b'S1E'), 2)  # Entered at row 10, rapid move to row 50.
+        self.assertEqual(stats["travel"], 20 * 5 + 41 + 11)
+        self.assertEqual(stats["saved"], 60 * 100 - stats["travel"])
+
+    def test_raster_alpha(self):
+        # Transparent samples are blank whatever their colour, opaque black samples are burned.
+        for bit_depth, color_type, black in ((8, 4, 0xff), (8, 6, 0xff), (16, 4, 0xffff)):
+            raster = PngRaster(10, 2, bit_depth, color_type)
+            raster.fill(0)
+            for x in range(3, 7):
+                raster.pixel(x, 0, black)
+            with NanoPlotter(connection=BytesConnection()) as plotter:
+                stats = plotter.raster(raster, speed=100, raster_step=1)
+            self.assertEqual(raster_burns(plotter.connection.data, 1), set((x, 0) for x in range(3, 7)))
+            self.assertEqual(stats["rows"], 1)
+            self.assertEqual(stats["travel"], 4)
+
+    def test_raster_scanlines(self):
+        raster = PngRaster(16, 8, 1, 0)
+        raster.fill(1)
+        raster.draw_line(0, 0, 15, 7, 0)
+        with NanoPlotter(connection=BytesConnection()) as plotter:
+            plotter.raster(raster, speed=100, raster_step=2)
+        with NanoPlotter(connection=BytesConnection()) as scanlines:
+            scanlines.raster(PngRaster.png_scanlines(io.BytesIO(raster.get_png_bytes())), speed=100, raster_step=2)
+        self.assertEqual(scanlines.connection.data, plotter.connection.data)
@@ -0,0 +1,86 @@
+import random
+import unittest
+
+from k40nano import *
+from k40nano.Connection import Connection
+
+
+def random_paths(count, seed):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(0, count):
+        x = rng.randint(0, 20000)
+        y = rng.randint(0, 12000)
+        paths.append([(x, y), (x + rng.randint(-300, 300), y + rng.randint(-300, 300))])
+    return paths
+
+
+def brute_nearest_neighbor(paths, reverse, start=(0, 0)):
+    """
+    Reference nearest neighbor order, searching every remaining path.
+    """
+    remaining = set(range(0, len(paths)))
+    x, y = start
+    order = []
+    while len(remaining) != 0:
+        candidates = [(max(abs(paths[i][0][0] - x), abs(paths[i][0][1] - y)), paths[i][0][0], paths[i][0][1], i, 0)
+                      for i in remaining]
+        if reverse:
+            candidates += [(max(abs(paths[i][-1][0] - x), abs(paths[i][-1][1] - y)),
+                            paths[i][-1][0], paths[i][-1][1], i, 1) for i in remaining]
+        d, px, py, index, end = min(candidates)
+        remaining.remove(index)
+        order.append((index, end == 1))
+        x, y = paths[index][0] if end == 1 else paths[index][-1]
+    return order
+
+
+class TestPathOptimizer(unittest.TestCase):
+
+    def test_nearest_neighbor(self):
+        paths = random_paths(300, 1)
+        for reverse in (False, True):
+            optimizer = PathOptimizer(reverse=reverse, window=0)
+            order = optimizer.optimize(paths)
+            self.assertEqual(PathOptimizer.travel(paths, order),
+                             PathOptimizer.travel(paths, brute_nearest_neighbor(paths, reverse)))
+            if not reverse:
+                self.assertFalse(any(flip for i, flip in order))
+
+    def test_far_start(self):
+        # The search starts at the grid rather than ringing outwards from a far head.
+        paths = random_paths(300, 1)
+        for start in ((-10 ** 7, 5000), (3 * 10 ** 7, 4 * 10 ** 7), (10000, -10 ** 8)):
+            optimizer = PathOptimizer(window=0)
+            order = optimizer.optimize(paths, start)
+            self.assertEqual(PathOptimizer.travel(paths, order, start),
+                             PathOptimizer.travel(paths, brute_nearest_neighbor(paths, True, start), start))
+
+    def test_optimize(self):
+        paths = random_paths(2000, 2)
+        paths.insert(10, [])
+        optimizer = PathOptimizer()
+        order = optimizer.optimize(paths)
+        self.assertEqual(sorted(i for i, flip in order), list(range(0, len(paths))))
+        self.assertEqual(optimizer.before, PathOptimizer.travel(paths))
+        self.assertEqual(optimizer.after, PathOptimizer.travel(paths, order))
+        self.assertLess(optimizer.after, optimizer.before / 10)
+        nearest = PathOptimizer(window=0)
+        nearest.optimize(paths)
+        self.assertLessEqual(optimizer.after, nearest.after)
+        ordered = optimizer.ordered(paths)
+        self.assertEqual(PathOptimizer.travel(ordered), optimizer.after)
+
+    def test_plotter(self):
+        paths = [[(100, 100), (200, 100)], [(1000, 1000), (1000, 900)], [(210, 100), (300, 200)]]
+        optimizer = PathOptimizer()
+        with NanoPlotter(connection=Connection()) as plotter:
+            plotter.enter_compact_mode(50)
+            plotter.plot_polylines(optimizer.ordered(paths))
+        self.assertEqual(optimizer.before, 100 + 800 + 900)
+        self.assertEqual(optimizer.after, 100 + 10 + 700)
+        self.assertEqual((plotter.current_x, plotter.current_y), (1000, 1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
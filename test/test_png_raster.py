@@ -0,0 +1,103 @@
+import io
+import random
+import unittest
+
+from k40nano import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# (bit_depth, color_type) of the rasters drawn.
+FORMATS = [(1, 0), (2, 0), (4, 0), (8, 0), (16, 0), (1, 3), (4, 3), (8, 2), (8, 4), (8, 6), (16, 4)]
+
+
+def draw(raster, seed):
+    rng = random.Random(seed)
+    mask = (1 << (raster.bit_depth * raster.samples_per_pixel)) - 1
+    raster.fill(rng.randint(0, mask))
+    for i in range(30):
+        raster.draw_line(rng.randint(-10, raster.width + 10), rng.randint(-10, raster.height + 10),
+                         rng.randint(-10, raster.width + 10), rng.randint(-10, raster.height + 10),
+                         rng.randint(0, mask))
+    for i in range(30):
+        raster.plot(rng.randint(-5, raster.width + 5), rng.randint(-5, raster.height + 5),
+                    rng.randint(0, mask))
+    return raster
+
+
+def read(data, use_numpy):
+    raster = PngRaster(use_numpy=use_numpy)
+    raster.read_png_stream(io.BytesIO(data))
+    return raster
+
+
+class TestPngRaster(unittest.TestCase):
+
+    def test_draw_python(self):
+        raster = PngRaster(37, 21, 1, 0, use_numpy=False)
+        raster.fill(1)
+        raster.draw_line(0, 0, 36, 20, 0)
+        raster.draw_line(36, 0, 0, 20, 0)
+        rows = list(raster.get_samples())
+        self.assertTrue(all(isinstance(row, list) for row in rows))
+        self.assertEqual(rows[0][0], 0)
+        self.assertEqual(rows[10][18], 0)
+        self.assertEqual(rows[0][36], 0)
+        self.assertEqual(rows[0][1], 1)
+        self.assertEqual(rows[20][36], 1)  # lines do not plot their end.
+        self.assertEqual([len(row) for row in rows], [37] * 21)
+        self.assertEqual(sum(row.count(0) for row in rows), 71)
+
+    def test_fill_python(self):
+        for bit_depth, color_type in FORMATS:
+            raster = PngRaster(13, 3, bit_depth, color_type, use_numpy=False)
+            mask = (1 << (bit_depth * raster.samples_per_pixel)) - 1
+            raster.fill(mask)
+            for y in range(3):
+                for x in range(13):
+                    self.assertEqual(raster.pixel(x, y), mask)
+                self.assertEqual(raster.buf[y][0], 0)  # filter type byte.
+                self.assertEqual(raster.buf[y], raster.buf[0])
+
+    def test_round_trip_python(self):
+        for bit_depth, color_type in FORMATS:
+            raster = draw(PngRaster(23, 17, bit_depth, color_type, use_numpy=False), bit_depth)
+            data = raster.get_png_bytes()
+            self.assertEqual(read(data, False).get_png_bytes(), data)
+
+    def test_filtered_round_trip(self):
+        raster = draw(PngRaster(23, 17, 8, 0, use_numpy=False), 8)
+        png_data = bytearray(raster.get_raw_data())
+        png_data[raster.stride * 3] = 1  # sub filter.
+        raster.set_raw_data(bytes(png_data))
+        data = raster.get_png_bytes()
+        for use_numpy in (False, True) if numpy is not None else (False,):
+            loaded = read(data, use_numpy)
+            self.assertFalse(loaded.is_array)
+            self.assertEqual(loaded.get_png_bytes(), data)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_matches_python(self):
+        for bit_depth, color_type in FORMATS:
+            python = draw(PngRaster(23, 17, bit_depth, color_type, use_numpy=False), bit_depth)
+            array = draw(PngRaster(23, 17, bit_depth, color_type, use_numpy=True), bit_depth)
+            self.assertTrue(array.is_array)
+            data = python.get_png_bytes()
+            self.assertEqual(array.get_png_bytes(), data)
+            self.assertEqual(list(array.get_samples()), list(python.get_samples()))
+            self.assertEqual(array.pixel(5, 7), python.pixel(5, 7))
+            loaded = read(data, True)
+            self.assertTrue(loaded.is_array)
+            self.assertEqual(loaded.get_png_bytes(), data)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_fallback(self):
+        self.assertFalse(PngRaster(4, 4, 12, 0, use_numpy=True).is_array)
+        self.assertFalse(PngRaster(4, 4, 3, 2, use_numpy=True).is_array)
+        self.assertTrue(PngRaster(4, 4, 2, 2, use_numpy=True).is_array)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import sys
+import unittest
+
+from k40nano import *
+
+
+class StepClock:
+    """
+    Clock which advances by step seconds every time it is read.
+    """
+
+    def __init__(self, step=0.0):
+        self.time = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.time += self.step
+        return self.time
+
+
+class ScriptedUsb(SimulatedUsb):
+    """
+    Simulated device which corrupts and times out the given packet writes, and times out the given
+    status reads, each counted from 0.
+    """
+
+    def __init__(self, corrupt=(), write_timeouts=(), read_timeouts=(), discard_window=True):
+        SimulatedUsb.__init__(self, discard_window=discard_window)
+        self.corrupt = set(corrupt)
+        self.write_timeouts = set(write_timeouts)
+        self.read_timeouts = set(read_timeouts)
+        self.packet_writes = 0
+        self.reads = 0
+
+    def read(self):
+        self.reads += 1
+        if self.reads - 1 in self.read_timeouts:
+            raise IOError("Simulated read timeout.")
+        return SimulatedUsb.read(self)
+
+    def write(self, packet):
+        if len(packet) != 1:
+            self.packet_writes += 1
+            if self.packet_writes - 1 in self.write_timeouts:
+                raise IOError("Simulated write timeout.")
+            if self.packet_writes - 1 in self.corrupt:
+                packet = bytearray(packet)
+                packet[33] ^= 0xFF
+        SimulatedUsb.write(self, packet)
+
+
+class Output:
+    """
+    Stand-in for stdout, collecting what is printed.
+    """
+
+    def __init__(self):
+        self.text = []
+
+    def write(self, text):
+        self.text.append(text)
+
+    def flush(self):
+        pass
+
+
+class TestSimulatedUsb(unittest.TestCase):
+
+    def test_stream(self):
+        data = b''.join(b'%06d' % i for i in range(0, 1000))
+        for window in (None, 8):
+            usb = SimulatedUsb(crc_error_rate=0.05, timeout_rate=0.02, seed=window)
+            with NanoConnection(usb=usb, window=window) as connection:
+                connection.write(data)
+            self.assertEqual(bytes(usb.received), data)
+
+    def test_threaded_stream(self):
+        data = b''.join(b'%06d' % i for i in range(0, 1000))
+        usb = SimulatedUsb(crc_error_rate=0.05, timeout_rate=0.02, seed=1)
+        with ThreadedNanoConnection(usb=usb, window=8) as connection:
+            connection.write(data)
+        self.assertEqual(bytes(usb.received), data)
+
+    def test_write_timeout_resent(self):
+        # The packet write times out, the packet is resent rather than polled for as if it were sent.
+        data = b''.join(b'%06d' % i for i in range(0, 25))
+        usb = ScriptedUsb(write_timeouts=(0, 3))
+        with NanoConnection(usb=usb) as connection:
+            connection.write(data)
+        self.assertEqual(bytes(usb.received), data)
+        self.assertEqual(usb.packet_writes, 7)
+
+    def test_lost_status_polled_again(self):
+        # The CRC error status of the corrupt packet is lost, the status is asked for again and the packet resent.
+        data = b''.join(b'%06d' % i for i in range(0, 25))
+        usb = ScriptedUsb(corrupt=(0,), read_timeouts=(1,))
+        stats = TransportStats()
+        with NanoConnection(usb=usb, stats=stats) as connection:
+            connection.write(data)
+        self.assertEqual(bytes(usb.received), data)
+        self.assertEqual(stats.resends, 1)
+        self.assertEqual(stats.count(None), 0)
+
+    def test_window_overflow(self):
+        # A window larger than the input buffer overflows it, lockstep packets always have room.
+        data = b'Bz' * 15 * 40  # about a second per packet.
+        for window in (None, 8):
+            usb = SimulatedUsb(buffer_size=4, clock=StepClock(0.01))
+            with NanoConnection(usb=usb, window=window, backoff=Backoff(0.0, 0.0)) as connection:
+                connection.write(data)
+            if window is None:
+                self.assertEqual(usb.dropped, 0)
+                self.assertEqual(bytes(usb.received), data)
+            else:
+                self.assertGreater(usb.dropped, 0)
+                self.assertNotEqual(bytes(usb.received), data)
+
+    def test_crc_keeps_good_packets(self):
+        # On a board keeping the good packets of a failed window, resending the window sends them twice.
+        data = b''.join(b'%06d' % i for i in range(0, 25))
+        for window in (None, 4):
+            usb = ScriptedUsb(corrupt=(2,), discard_window=False)
+            with NanoConnection(usb=usb, window=window) as connection:
+                connection.write(data)
+            if window is None:
+                self.assertEqual(bytes(usb.received), data)
+            else:
+                self.assertEqual(bytes(usb.received), data[:60] + data[90:120] + data)
+
+    def test_mock_usb_quiet(self):
+        # MockUsb prints the packets it is sent only when verbose.
+        quiet = Output()
+        verbose = Output()
+        stdout = sys.stdout
+        try:
+            for output, usb in ((quiet, MockUsb()), (verbose, MockUsb(verbose=True))):
+                sys.stdout = output
+                with NanoConnection(usb=usb) as connection:
+                    connection.write(b'IPP')
+                self.assertEqual(bytes(usb.received), b'IPP' + b'F' * 27)
+        finally:
+            sys.stdout = stdout
+        self.assertFalse(any("IPPFFF" in text for text in quiet.text))
+        self.assertTrue(any("IPPFFF" in text for text in verbose.text))
+
+    def test_busy(self):
+        clock = StepClock()
+        usb = SimulatedUsb(buffer_size=4, rapid_speed=25.4, clock=clock)  # 1 ms per step.
+        usb.initialize()
+        connection = NanoConnection(usb=usb)
+        for i in range(0, 4):
+            usb.write(connection.make_valid_packet(b'Bz' * 15))
+        usb.write(connection.HELLO)
+        self.assertEqual(usb.read(), 238)
+        clock.time += 3.9  # first packet takes 3.825 seconds.
+        usb.write(connection.HELLO)
+        self.assertEqual(usb.read(), 206)
+
+    def test_task_complete(self):
+        usb = SimulatedUsb()
+        stats = TransportStats()
+        with NanoPlotter(connection=NanoConnection(usb=usb, stats=stats)) as plotter:
+            plotter.enter_compact_mode(100)  # 0.254 ms per step.
+            plotter.move(1000, 0)
+            plotter.move(500, 500)
+        self.assertEqual(stats.count(236), 1)
+        self.assertGreaterEqual(usb.now(), 0.381)
+        self.assertLess(usb.now(), 1.0)
+        self.assertEqual((usb.x, usb.y), (1500, 500))
+
+
+if __name__ == '__main__':
+    unittest.main()
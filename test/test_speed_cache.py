@@ -0,0 +1,54 @@
+import unittest
+
+from k40nano import *
+from k40nano.SpeedCache import SpeedCache
+
+
+class TestSpeedCache(unittest.TestCase):
+
+    def test_bounded(self):
+        cache = SpeedCache(size=3)
+        for key in (1, 2, 3, 1, 4, 1, 2):
+            self.assertEqual(cache.get((key,), lambda v: v * 10), key * 10)
+        # 2 was dropped for 4, as 1 was used more recently.
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 5, "size": 3, "table": 0})
+        self.assertEqual(list(cache.entries), [(4,), (1,), (2,)])
+
+    def test_table(self):
+        cache = SpeedCache(size=1)
+        cache.preload((5,), "five")
+        cache.get((1,), str)
+        cache.get((2,), str)
+        self.assertEqual(cache.get((5,), str), "five")
+        cache.clear()
+        self.assertEqual(cache.get((5,), str), "five")
+        cache.clear(table=True)
+        self.assertEqual(cache.get((5,), str), "5")
+
+    def test_laser_speed(self):
+        LaserSpeed.clear_caches()
+        for i in range(0, 5):
+            for speed in (10, 20.5, 100):
+                for board in ("M2", "LASER-M2", "B2"):
+                    for raster_step in (0, 2):
+                        speed_code = LaserSpeed.get_code_from_speed(speed, raster_step, board)
+                        self.assertEqual(speed_code,
+                                         LaserSpeed.uncached_get_code_from_speed(speed, raster_step, board))
+                        self.assertEqual(LaserSpeed.get_speed_from_code(speed_code, board),
+                                         LaserSpeed.uncached_get_speed_from_code(speed_code, board))
+        stats = LaserSpeed.cache_stats()["get_code_from_speed"]
+        self.assertEqual((stats["hits"], stats["misses"]), (72, 18))
+
+    def test_preload(self):
+        LaserSpeed.clear_caches(table=True)
+        LaserSpeed.preload("LASER-M2", raster_steps=(0, 1))
+        self.assertEqual(LaserSpeed.get_code_from_speed(35, 1, "LASER-M2"),
+                         LaserSpeed.uncached_get_code_from_speed(35, 1, "LASER-M2"))
+        stats = LaserSpeed.cache_stats()
+        self.assertEqual(stats["get_code_from_speed"]["misses"], 0)
+        self.assertEqual(stats["get_code_from_speed"]["table"], 2 * 128)
+        LaserSpeed.clear_caches(table=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
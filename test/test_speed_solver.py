@@ -0,0 +1,75 @@
+import random
+import unittest
+
+from k40nano import *
+
+BOARDS = ["LASER-M2", "M2", "LASER-B2", "B2", "LASER-M1", "B1", "A"]
+
+
+class TestSpeedSolver(unittest.TestCase):
+
+    def test_solve_round_trip(self):
+        rng = random.Random(3)
+        for board in BOARDS:
+            for raster_step in (0, 2):
+                for i in range(200):
+                    speed = rng.uniform(10.0, 240.0)
+                    solved = LaserSpeed.solve_speed(speed, raster_step, board)
+                    self.assertAlmostEqual(LaserSpeed.get_speed_from_code(solved["code"], board), solved["speed"])
+                    self.assertAlmostEqual(solved["error"], (solved["speed"] - speed) / speed)
+                    self.assertEqual(LaserSpeed.parse_speed_code(solved["code"])[4], raster_step)
+
+    def test_solve_nearest(self):
+        # The neighbouring values are no nearer the requested speed.
+        for board in ("LASER-M2", "B2"):
+            for speed in (0.8, 3.0, 12.7, 25.4, 33.3, 60.5, 100.0, 200.0):
+                solved = LaserSpeed.solve_speed(speed, 0, board)
+                b, m, gear = LaserSpeed.get_board(board).gearing[solved["gear"]]
+                for value in (solved["value"] - 1, solved["value"] + 1):
+                    other = LaserSpeed.get_speed_from_value(65536 - value, b, m)
+                    self.assertLessEqual(abs(solved["speed"] - speed), abs(other - speed))
+
+    def test_solve_exact(self):
+        solved = LaserSpeed.solve_speed(25.4, 0, "LASER-M2")
+        self.assertEqual(solved["code"], LaserSpeed.get_code_from_speed(25.4, 0, "LASER-M2"))
+        self.assertAlmostEqual(solved["error"], 0)
+        with self.assertRaises(ValueError):
+            LaserSpeed.solve_speed(0)
+
+    def test_solve_slowest_raster(self):
+        # Raster codes have no C-suffix gear, the slowest is the slowest valid raster speed.
+        self.assertAlmostEqual(LaserSpeed.solve_speed(1.0, 2, "LASER-M2")["speed"], 4.688, 2)
+        self.assertAlmostEqual(LaserSpeed.solve_speed(1.0, 2, "M2")["speed"], 5.096, 2)
+        solved = LaserSpeed.solve_speed(5.0, 2, "LASER-M2")
+        self.assertAlmostEqual(LaserSpeed.get_speed_from_code(solved["code"], "LASER-M2"), 5.0, 3)
+
+    def test_achievable(self):
+        achievable = LaserSpeed.get_achievable_values(20.0, 30.0, 0, "LASER-M2")
+        speeds = [entry[0] for entry in achievable]
+        self.assertEqual(speeds, sorted(speeds))
+        self.assertTrue(20.0 <= speeds[0] and speeds[-1] <= 30.0)
+        for speed, value, gearing in achievable:
+            self.assertEqual(gearing, LaserSpeed.get_gearing("LASER-M2", speed))
+
+    def test_table_snap(self):
+        rng = random.Random(5)
+        for board in ("LASER-M2", "B2"):
+            for raster_step in (0, 2):
+                table = SpeedTable(board, raster_step)
+                for i in range(200):
+                    speed = rng.uniform(10.0, 240.0)
+                    snapped = table.snap(speed)
+                    solved = LaserSpeed.solve_speed(speed, raster_step, board)
+                    self.assertLessEqual(abs(snapped["error"]), abs(solved["error"]) + 1e-12)
+                    self.assertAlmostEqual(LaserSpeed.get_speed_from_code(snapped["code"], board), snapped["speed"])
+                    # Snapped speeds are achievable, they snap to themselves.
+                    self.assertAlmostEqual(table.snap_speed(snapped["speed"]), snapped["speed"])
+
+    def test_table_ends(self):
+        table = SpeedTable("LASER-M2", low=10.0, high=20.0)
+        self.assertAlmostEqual(table.snap_speed(1.0), table.speeds[0])
+        self.assertAlmostEqual(table.snap_speed(100.0), table.speeds[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
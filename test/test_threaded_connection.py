@@ -0,0 +1,113 @@
+import threading
+import time
+import unittest
+
+from k40nano import *
+
+
+class SlowUsb:
+    """
+    Usb that records the payload of every packet, taking a while for each one.
+    """
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.received = bytearray()
+        self.threads = set()
+
+    def initialize(self):
+        pass
+
+    def release_usb(self):
+        pass
+
+    def read(self):
+        return 236
+
+    def write(self, packet):
+        if self.fail:
+            raise RuntimeError("Device disconnected.")
+        self.threads.add(threading.current_thread().name)
+        if len(packet) != 1:
+            time.sleep(self.delay)
+            self.received += packet[2:32]
+
+
+class TestThreadedNanoConnection(unittest.TestCase):
+
+    def test_threaded_stream(self):
+        usb = SlowUsb()
+        data = b''.join(b'%05d' % i for i in range(0, 1800))
+        with ThreadedNanoConnection(usb=usb, queue_size=4) as connection:
+            for i in range(0, len(data), 3):
+                connection.write(data[i:i + 3])
+        self.assertEqual(bytes(usb.received), data)
+        self.assertEqual(usb.threads, {"k40nano-transmit"})
+
+    def test_positional_arguments(self):
+        stats = TransportStats()
+        connection = ThreadedNanoConnection(SlowUsb(), 8, 4, Backoff(0.001, 0.001), stats)
+        self.assertEqual(connection.window, 8)
+        self.assertEqual(connection.queue.maxsize, 4)
+        self.assertIs(connection.stats, stats)
+
+    def test_flush_barrier(self):
+        usb = SlowUsb(delay=0.005)
+        with ThreadedNanoConnection(usb=usb) as connection:
+            connection.write(b'I' * 305)
+            connection.flush()
+            self.assertEqual(len(usb.received), 330)
+            connection.wait()
+
+    def test_pipelined_window(self):
+        usb = SlowUsb()
+        data = b'B' * 3000
+        with ThreadedNanoConnection(usb=usb, window=8) as connection:
+            connection.write(data)
+        self.assertEqual(bytes(usb.received), data)
+
+    def test_error_raised(self):
+        usb = SlowUsb(fail=True)
+        connection = ThreadedNanoConnection(usb=usb)
+        connection.open()
+        connection.write(b'I' * 30)
+        self.assertRaises(RuntimeError, connection.flush)
+        usb.fail = False
+        connection.close()
+
+    def test_error_fails_connection(self):
+        usb = SlowUsb(fail=True)
+        connection = ThreadedNanoConnection(usb=usb)
+        connection.open()
+        connection.write(b'A' * 60)
+        self.assertRaises(RuntimeError, connection.flush)
+        usb.fail = False
+        # The device missed packets, nothing more is sent until the connection is reopened.
+        self.assertRaises(RuntimeError, connection.write, b'B' * 60)
+        self.assertRaises(RuntimeError, connection.flush)
+        self.assertRaises(RuntimeError, connection.wait)
+        connection.close()
+        self.assertEqual(len(usb.received), 0)
+        connection.open()
+        connection.write(b'C' * 60)
+        connection.close()
+        self.assertEqual(bytes(usb.received), b'C' * 60)
+
+    def test_error_raised_by_close(self):
+        usb = SlowUsb(fail=True)
+        connection = ThreadedNanoConnection(usb=usb)
+        connection.open()
+        connection.write(b'I' * 30)
+        connection.queue.join()
+        self.assertRaises(RuntimeError, connection.close)
+        self.assertIsNone(connection.thread)
+
+    def test_plotter(self):
+        usb = SlowUsb()
+        with NanoPlotter(connection=ThreadedNanoConnection(usb=usb)) as plotter:
+            plotter.enter_compact_mode(50)
+            for i in range(0, 100):
+                plotter.move(10, 3)
+        self.assertTrue(bytes(usb.received).startswith(b'I'))
+        self.assertIn(b'FNSE', bytes(usb.received))
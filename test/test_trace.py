@@ -0,0 +1,83 @@
+import io
+import os
+import unittest
+
+from k40nano import *
+from k40nano.TraceUsb import trace_packets, RECORD_READ, RECORD_WRITE
+
+
+class CrcErrorUsb:
+    """
+    Usb that answers CRC error once after each of the given packet writes, and records accepted payloads.
+    """
+
+    def __init__(self, errors=()):
+        self.errors = set(errors)
+        self.writes = 0
+        self.received = bytearray()
+        self.status = 206
+
+    def initialize(self):
+        pass
+
+    def release_usb(self):
+        pass
+
+    def read(self):
+        return self.status
+
+    def write(self, packet):
+        if len(packet) == 1:
+            return
+        self.writes += 1
+        if self.writes in self.errors:
+            self.status = 207
+            return
+        self.status = 206
+        self.received += packet[2:32]
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_record(self):
+        trace = io.BytesIO()
+        with NanoConnection(usb=TraceUsb(CrcErrorUsb(), trace)) as connection:
+            connection.write(b'IPP')
+        trace.seek(0)
+        records = list(read_trace(trace))
+        self.assertEqual([r[1] for r in records],
+                         [RECORD_WRITE, RECORD_READ, RECORD_WRITE, RECORD_WRITE, RECORD_READ])
+        self.assertEqual(records[0][2], b'\xa0')
+        self.assertEqual(records[2][2][2:5], b'IPP')
+        self.assertEqual(records[1][2], b'\xce')
+        times = [r[0] for r in records]
+        self.assertEqual(times, sorted(times))
+
+    def test_reopen(self):
+        # Reopening the connection continues the trace file, rather than writing to the closed file.
+        filename = "test.k40trace"
+        self.addCleanup(os.remove, filename)
+        device = CrcErrorUsb()
+        connection = NanoConnection(usb=TraceUsb(device, filename))
+        for data in (b'IPP', b'IBzzzS1P'):
+            with connection:
+                connection.write(data)
+        self.assertEqual(b''.join(trace_packets(filename)), bytes(device.received))
+        self.assertEqual(bytes(device.received)[30:38], b'IBzzzS1P')
+
+    def test_replay(self):
+        data = b''.join(b'%06d' % i for i in range(0, 1000))
+        trace = io.BytesIO()
+        device = CrcErrorUsb(errors=(3, 50, 51))
+        with NanoConnection(usb=TraceUsb(device, trace)) as connection:
+            connection.write(data)
+        self.assertEqual(bytes(device.received), data)
+        trace.seek(0)
+        self.assertEqual(b''.join(trace_packets(trace)), data)
+
+        trace.seek(0)
+        replayed = CrcErrorUsb()
+        with NanoConnection(usb=replayed) as connection:
+            count, seconds = replay_trace(trace, connection)
+        self.assertEqual(count, 200)
+        self.assertEqual(bytes(replayed.received), data)